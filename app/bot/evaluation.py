@@ -1,12 +1,19 @@
-from typing import NamedTuple
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Union
+import threading
 
 from app.engine.board import ChessBoard
+from app.engine.compact import CompactBoard
+from app.engine import zobrist
 from app.engine.utils import WHITE, BLACK, Win, Check
 from app.utils.constants import CHECKMATE, CHECK, NONE, PAT, STALEMATE
 
 BLACK_ADVANTAGE = -1
 WHITE_ADVANTAGE = 1
 
+# Les fonctions d'évaluation acceptent un `ChessBoard` ou un `CompactBoard` (même interface)
+Board = Union[ChessBoard, CompactBoard]
+
 class Coefficients(NamedTuple):
     """
     Correspond aux coefficients de chaque fonction dans la moyenne des scores
@@ -15,6 +22,7 @@ class Coefficients(NamedTuple):
     control: float = 1.0
     state: float = 2.0
     threat:float = 1.0
+    position:float = 0.0 # Bonus pièce-case, désactivés par défaut : l'évaluation et le jeu du bot restent inchangés
 
 def evaluation(black_eval: float, white_eval: float) -> float:
     """
@@ -43,7 +51,7 @@ def evaluation(black_eval: float, white_eval: float) -> float:
     return decorator
 
 @evaluation(black_eval=-12, white_eval=12)
-def evaluation_materielle(board:ChessBoard):
+def evaluation_materielle(board:Board):
     """Retourne le rapport des valeurs de pièces blanches et des noirs"""
     white = board.get_material_value(WHITE)
     black = board.get_material_value(BLACK)
@@ -52,7 +60,7 @@ def evaluation_materielle(board:ChessBoard):
     return result
 
 @evaluation(black_eval=0, white_eval=1)
-def control_evaluation(board:ChessBoard):
+def control_evaluation(board:Board):
     """Regarde le nombre de cases controlées par les deux côtés puis retourne le nombre"""
     white = board.get_total_moves_score(WHITE)
     black = board.get_total_moves_score(BLACK)
@@ -60,7 +68,7 @@ def control_evaluation(board:ChessBoard):
     return white/total if total != 0 else 0.5
 
 @evaluation(black_eval=-1, white_eval=1)
-def state_evaluation(board:ChessBoard):
+def state_evaluation(board:Board):
     """Retourne un score dépendant de si l'échiquier est en situation d'échecs, d'échecs et mats, ..."""
     state = board.get_state()
 
@@ -72,7 +80,7 @@ def state_evaluation(board:ChessBoard):
         return 0
     
 @evaluation(black_eval=1, white_eval=0)
-def threat_evaluation(board:ChessBoard):
+def threat_evaluation(board:Board):
     """Retourne un score correspondant à la valeur des pièces attaquées"""
     white = board.threat_score(WHITE)
     black = board.threat_score(BLACK)
@@ -80,14 +88,134 @@ def threat_evaluation(board:ChessBoard):
 
     return white/total if total != 0 else 0.5
     
-def final_evaluation(board:ChessBoard, coeffs:Coefficients):
+@evaluation(black_eval=-150, white_eval=150)
+def position_evaluation(board:Board):
+    """Retourne la différence des bonus pièce-case (en centièmes de pion) entre les blancs et les noirs"""
+    return board.get_position_value(WHITE) - board.get_position_value(BLACK)
+
+def pawn_value(coeffs:Coefficients) -> float:
+    """Variation de `final_evaluation` correspondant à un pion de matériel (évaluation matérielle sur [-12, 12])"""
+    total = sum(coeffs)
+    return coeffs.material / total / 12 if total != 0 else 0
+
+def final_evaluation(board:Board, coeffs:Coefficients):
     """Fais la moyenne des évaluations en utilisant les coefficients"""
     total = 0
     final_score = 0
 
-    for fn, coeff in zip([evaluation_materielle, control_evaluation, state_evaluation, threat_evaluation], coeffs):
+    # Les termes de mobilité, de menaces et d'état viennent de la même génération de coups (`attack_summary`)
+    for fn, coeff in zip([evaluation_materielle, control_evaluation, state_evaluation, threat_evaluation, position_evaluation], coeffs):
+        if coeff == 0:
+            continue # Terme désactivé : pas calculé
         score = fn(board)
         final_score += score * coeff
         total += coeff
 
-    return final_score / total if total != 0 else 0
\ No newline at end of file
+    return final_score / total if total != 0 else 0
+
+# ---------------------------------------------------------------------
+# Cache des évaluations
+#----------------------------------------------------------------------
+
+DEFAULT_CACHE_SIZE = 100_000 # Nombre de positions gardées
+
+class CacheStats(NamedTuple):
+    hits:int
+    misses:int
+    invalidations:int # Entrées retirées explicitement (`invalidate`)
+    evictions:int # Entrées les moins récemment utilisées retirées faute de place
+    size:int # Nombre d'entrées présentes
+    capacity:int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class EvaluationCache:
+    """
+    Cache LRU borné de `final_evaluation`, indexé par (clé de Zobrist de la position, `Coefficients`).
+    Utilisable depuis plusieurs threads (requêtes HTTP d'une même partie).
+    """
+    def __init__(self, capacity:int = DEFAULT_CACHE_SIZE):
+        """
+        Parameters
+        ----------
+        capacity:int
+            Nombre maximal de positions gardées, les moins récemment utilisées sont retirées en premier
+        """
+        self.capacity = max(1, capacity)
+        self.entries:OrderedDict[tuple[int, Coefficients], float] = OrderedDict()
+        self.coeffs:dict[int, set[Coefficients]] = {} # Coefficients en cache pour chaque position, pour `invalidate`
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(board:Board) -> int:
+        return board.hash if isinstance(board, ChessBoard) else zobrist.hash_compact(board)
+
+    def evaluate(self, board:Board, coeffs:Coefficients = Coefficients()) -> float:
+        """Retourne `final_evaluation(board, coeffs)`, calculée seulement si la position n'est pas dans le cache"""
+        key = (self.key(board), coeffs)
+        with self.lock:
+            score = self.entries.get(key)
+            if score is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return score
+            self.misses += 1
+
+        score = final_evaluation(board, coeffs) # Hors du verrou : l'évaluation est longue
+        with self.lock:
+            self.entries[key] = score
+            self.entries.move_to_end(key)
+            self.coeffs.setdefault(key[0], set()).add(coeffs)
+            while len(self.entries) > self.capacity:
+                (old, old_coeffs), _ = self.entries.popitem(last=False)
+                self._forget(old, old_coeffs)
+                self.evictions += 1
+        return score
+
+    def _forget(self, key:int, coeffs:Coefficients):
+        remaining = self.coeffs.get(key)
+        if remaining is not None:
+            remaining.discard(coeffs)
+            if not remaining:
+                del self.coeffs[key]
+
+    def invalidate(self, board:Optional[Board] = None, key:Optional[int] = None) -> int:
+        """
+        Retire les évaluations d'une position (tous coefficients confondus), ou tout le cache si rien n'est spécifié
+
+        Parameters
+        ----------
+        board:Board
+            Position à retirer
+        key:int
+            Clé de Zobrist de la position à retirer (si l'échiquier a déjà changé)
+
+        Returns
+        -------
+        int : nombre d'entrées retirées
+        """
+        if board is not None:
+            key = self.key(board)
+        with self.lock:
+            if key is None:
+                removed = len(self.entries)
+                self.entries.clear()
+                self.coeffs.clear()
+            else:
+                stale = self.coeffs.pop(key, ())
+                for coeffs in stale:
+                    del self.entries[(key, coeffs)]
+                removed = len(stale)
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> CacheStats:
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.invalidations, self.evictions, len(self.entries), self.capacity)
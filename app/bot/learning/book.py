@@ -0,0 +1,207 @@
+"""
+Livre d'ouvertures compact : pour chaque position (clé de Zobrist), les coups joués avec leur nombre de parties,
+les résultats et l'Elo moyen du joueur. Aucun échiquier n'est gardé, ni à la construction ni à la lecture.
+
+Format du fichier (petit-boutiste), entrées triées par clé puis par coup :
+    en-tête    : MAGIC (8 octets), nombre d'entrées n (uint32), réservé (uint32)
+    clés       : n x uint64
+    résultats  : n x 4 x uint32 (parties, victoires blancs, nulles, victoires noirs)
+    coups      : n x uint32 (encodage de app.engine.compact)
+    Elo moyen  : n x uint16
+Le fichier est projeté en mémoire (`mmap`) et les clés sont cherchées par dichotomie :
+seules les pages lues sont chargées, partagées entre les processus qui ouvrent le même livre.
+
+Utilisation :
+    python -m app.bot.learning.book build datas/lichess_elite_2025-05.pgn datas/book.bin --workers 8
+    python -m app.bot.learning.book probe datas/book.bin --fen "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Callable, NamedTuple, Optional
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+from app.bot.learning.ingest import OpeningStats, IngestResult, Progress, ingest, print_progress, MAX_PLIES
+from app.engine.board import ChessBoard
+from app.engine.compact import decode_move, move_to_uci
+from app.engine.utils import Move
+
+MAGIC = b"WCBOOK1\n"
+HEADER = struct.Struct("<8sII")
+MIN_COUNT = 2 # Coups joués moins souvent : non écrits dans le livre
+UINT32_MAX = (1 << 32) - 1
+ENTRY_SIZE = 8 + 16 + 4 + 2 # Octets par entrée (clé, résultats, coup, Elo)
+
+class BookEntry(NamedTuple):
+    move:int # Coup encodé
+    count:int
+    white:int # Victoires des blancs
+    draws:int
+    black:int
+    elo:int # Elo moyen du joueur ayant joué le coup
+
+    @property
+    def uci(self) -> str:
+        return move_to_uci(self.move)
+
+    @property
+    def white_score(self) -> float:
+        """Score moyen des blancs après ce coup (1 : victoire, 0.5 : nulle)"""
+        return (self.white + self.draws / 2) / self.count if self.count else 0.0
+
+class BuildResult(NamedTuple):
+    ingest:IngestResult
+    entries:int # Entrées écrites dans le livre
+    size:int # Taille du fichier en octets
+
+def write_book(path:str, stats:OpeningStats, min_count:int = MIN_COUNT) -> int:
+    """
+    Ecrit les statistiques dans un fichier de livre, retourne le nombre d'entrées écrites
+
+    Parameters
+    ----------
+    min_count:int
+        Les coups joués dans moins de parties sont ignorés
+    """
+    keys, results, moves, elos = array("Q"), array("I"), array("I"), array("H")
+    for (key, move), (count, white, draws, black, elo_sum) in sorted(stats.moves.items()):
+        if count < min_count:
+            continue
+        keys.append(key)
+        results.extend(min(value, UINT32_MAX) for value in (count, white, draws, black))
+        moves.append(move)
+        elos.append(min(elo_sum // count, 0xFFFF))
+
+    if sys.byteorder != "little":
+        for section in (keys, results, moves, elos):
+            section.byteswap()
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(keys), 0))
+        for section in (keys, results, moves, elos):
+            section.tofile(file)
+    return len(keys)
+
+def build_book(pgn_path:str, book_path:str, workers:Optional[int] = None, max_plies:int = MAX_PLIES, min_count:int = MIN_COUNT,
+               on_progress:Optional[Callable[[Progress], None]] = None) -> BuildResult:
+    """Lit les parties du fichier PGN (en parallèle, voir `ingest`) et écrit le livre"""
+    result = ingest(pgn_path, workers, max_plies, on_progress)
+    entries = write_book(book_path, result.stats, min_count)
+    return BuildResult(result, entries, os.path.getsize(book_path))
+
+class OpeningBook:
+    """Livre d'ouvertures lu depuis un fichier projeté en mémoire"""
+    def __init__(self, path:str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} n'est pas un livre d'ouvertures")
+        if len(self._map) != HEADER.size + count * ENTRY_SIZE:
+            self.close()
+            raise ValueError(f"{path} : fichier tronqué")
+
+        self.count = count
+        offset = HEADER.size
+        self.keys = self._section("Q", offset, count)
+        offset += count * 8
+        self.results = self._section("I", offset, count * 4)
+        offset += count * 16
+        self.moves = self._section("I", offset, count)
+        offset += count * 4
+        self.elos = self._section("H", offset, count)
+
+    def _section(self, typecode:str, offset:int, length:int):
+        """Tableau lu directement dans le fichier projeté (copié seulement sur une machine gros-boutiste)"""
+        size = array(typecode).itemsize * length
+        if sys.byteorder == "little":
+            return memoryview(self._map)[offset:offset + size].cast(typecode)
+        section = array(typecode, self._map[offset:offset + size])
+        section.byteswap()
+        return section
+
+    def entries(self, key:int) -> list[BookEntry]:
+        """Coups du livre pour une clé de Zobrist, les plus joués en premier"""
+        found = []
+        i = bisect_left(self.keys, key)
+        while i < self.count and self.keys[i] == key:
+            found.append(BookEntry(self.moves[i], *self.results[4 * i:4 * i + 4], self.elos[i]))
+            i += 1
+        found.sort(key=lambda entry: entry.count, reverse=True)
+        return found
+
+    def probe(self, board:ChessBoard) -> list[BookEntry]:
+        """Coups du livre pour la position, en ignorant les coups illégaux (collision de clés)"""
+        entries = self.entries(board.hash)
+        if not entries:
+            return entries
+        legal = set(board.bitboards().legal_moves())
+        return [entry for entry in entries if entry.move in legal]
+
+    def choose(self, board:ChessBoard, min_count:int = 1, rng:Optional[random.Random] = None) -> Optional[Move]:
+        """
+        Tire un coup du livre, avec une probabilité proportionnelle au nombre de parties où il a été joué
+
+        Returns
+        -------
+        Move : coup légal à jouer, None si la position n'est pas dans le livre
+        """
+        entries = [entry for entry in self.probe(board) if entry.count >= min_count]
+        if not entries:
+            return None
+        entry = (rng or random).choices(entries, weights=[entry.count for entry in entries])[0]
+        return decode_move(board.board, entry.move)
+
+    def close(self):
+        for name in ("keys", "results", "moves", "elos"):
+            section = self.__dict__.pop(name, None)
+            if isinstance(section, memoryview):
+                section.release()
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def main(argv:Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Livre d'ouvertures compact")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Construit le livre depuis un fichier PGN")
+    build.add_argument("pgn")
+    build.add_argument("book")
+    build.add_argument("-w", "--workers", type=int, default=None, help="Nombre de processus (par défaut : nombre de coeurs)")
+    build.add_argument("-p", "--plies", type=int, default=MAX_PLIES, help="Demi-coups gardés par partie")
+    build.add_argument("-m", "--min-count", type=int, default=MIN_COUNT, help="Parties minimum pour garder un coup")
+    probe = commands.add_parser("probe", help="Affiche les coups du livre pour une position")
+    probe.add_argument("book")
+    probe.add_argument("--fen", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        result = build_book(args.pgn, args.book, args.workers, args.plies, args.min_count, on_progress=print_progress)
+        print(f"\r{result.ingest.games} parties ({result.ingest.games_per_second:.0f} parties/s), {result.ingest.skipped} ignorées")
+        print(f"{result.entries} entrées, {result.size / 1e6:.1f} Mo, {time.perf_counter() - start:.1f}s")
+        return 0
+
+    board = ChessBoard.from_fen(args.fen) if args.fen else ChessBoard()
+    with OpeningBook(args.book) as book:
+        for entry in book.probe(board):
+            print(f"{entry.uci:6} {entry.count:8} parties  blancs {entry.white_score:.0%}  Elo {entry.elo}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+"""
+Lecture d'un fichier PGN en parallèle : le fichier est découpé en plages d'octets commençant sur une ligne `[Event`,
+chaque processus lit et rejoue les parties de sa plage, puis les statistiques partielles sont fusionnées.
+
+Utilisation :
+    python -m app.bot.learning.ingest datas/lichess_elite_2025-05.pgn --workers 8 --plies 20
+"""
+
+from typing import Callable, Iterator, NamedTuple, Optional
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+
+from app.bot.learning.pgn_parser import PGN_FILE, PgnGame, iter_games
+from app.engine.board import ChessBoard
+from app.engine.compact import decode_move
+from app.engine.san import parse_san, SanError
+
+EVENT = b"[Event "
+MAX_PLIES = 20 # Demi-coups de chaque partie gardés dans les statistiques (ouverture)
+SHARDS_PER_WORKER = 4 # Plusieurs plages par processus : les plus rapides en prennent d'autres
+PROGRESS_EVERY = 1000 # Parties lues entre deux mises à jour du compteur partagé
+
+RESULTS = {"1-0": 1, "1/2-1/2": 2, "0-1": 3} # Indice dans les statistiques d'un coup
+
+class Progress(NamedTuple):
+    games:int
+    elapsed:float
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+class OpeningStats:
+    """
+    Statistiques des coups joués depuis chaque position, pouvant être fusionnées
+    Sous forme {(clé de Zobrist, coup encodé): [parties, victoires blancs, nulles, victoires noirs, somme des Elo du joueur]}
+    """
+    def __init__(self):
+        self.moves:dict[tuple[int, int], list[int]] = {}
+
+    def add(self, key:int, move:int, result:int, elo:int):
+        """
+        Parameters
+        ----------
+        result:int
+            Indice du résultat de la partie dans `RESULTS`
+        elo:int
+            Elo du joueur ayant joué le coup
+        """
+        stats = self.moves.get((key, move))
+        if stats is None:
+            stats = self.moves[(key, move)] = [0, 0, 0, 0, 0]
+        stats[0] += 1
+        stats[result] += 1
+        stats[4] += elo
+
+    def merge(self, other:'OpeningStats') -> 'OpeningStats':
+        """Ajoute les statistiques d'un autre processus"""
+        for entry, values in other.moves.items():
+            stats = self.moves.get(entry)
+            if stats is None:
+                self.moves[entry] = values
+            else:
+                for i, value in enumerate(values):
+                    stats[i] += value
+        return self
+
+    def positions(self) -> int:
+        """Nombre de positions différentes"""
+        return len({key for key, _ in self.moves})
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __eq__(self, other):
+        return isinstance(other, OpeningStats) and self.moves == other.moves
+
+class IngestResult(NamedTuple):
+    games:int # Parties rejouées
+    skipped:int # Parties dont un coup n'a pas pu être lu
+    elapsed:float
+    stats:OpeningStats
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+# ------------------------ Découpage du fichier ------------------------
+def next_game_offset(file, offset:int) -> int:
+    """Position de la première ligne commençant par `[Event` à partir de l'octet `offset` (fin du fichier si aucune)"""
+    if offset == 0:
+        return 0
+    file.seek(offset - 1)
+    position = offset - 1 + len(file.readline()) # Fin de la ligne coupée par `offset`
+    for line in file:
+        if line.startswith(EVENT):
+            return position
+        position += len(line)
+    return position
+
+def shard_ranges(path:str, shards:int) -> list[tuple[int, int]]:
+    """
+    Découpe le fichier en `shards` plages d'octets (début, fin) commençant chacune sur une ligne `[Event`.
+    Les fichiers compressés ne peuvent pas être lus à partir d'un octet quelconque : une seule plage.
+    """
+    size = os.path.getsize(path)
+    if shards <= 1 or path.endswith((".gz", ".bz2", ".zst")) or size == 0:
+        return [(0, size)]
+
+    with open(path, "rb") as file:
+        starts = sorted({next_game_offset(file, size * i // shards) for i in range(shards)})
+    starts = [start for start in starts if start < size] or [0]
+    return list(zip(starts, starts[1:] + [size]))
+
+def read_range(path:str, start:int, end:int) -> Iterator[str]:
+    """Lignes (décodées) du fichier entre les octets `start` et `end`"""
+    if path.endswith((".gz", ".bz2", ".zst")):
+        from app.bot.learning.pgn_parser import open_pgn
+        with open_pgn(path) as lines:
+            yield from lines
+        return
+
+    with open(path, "rb") as file:
+        file.seek(start)
+        position = start
+        for line in file:
+            if position >= end:
+                break
+            position += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+# ------------------------ Côté processus ------------------------
+_counter = None # Parties lues par tous les processus (`multiprocessing.Value`)
+
+def _init_worker(counter):
+    global _counter
+    _counter = counter
+    logging.disable(logging.INFO)
+
+def game_elo(game:PgnGame) -> tuple[int, int]:
+    try:
+        return int(game.WhiteElo), int(game.BlackElo)
+    except (TypeError, ValueError):
+        return 0, 0
+
+def replay_game(game:PgnGame, stats:OpeningStats, max_plies:int = MAX_PLIES) -> bool:
+    """
+    Rejoue les premiers coups d'une partie et les ajoute aux statistiques
+
+    Returns
+    -------
+    bool : False si un coup n'a pas pu être lu (la partie est alors ignorée entièrement)
+    """
+    result = RESULTS.get(game.Result)
+    if result is None:
+        return False
+    elos = game_elo(game)
+    board = ChessBoard()
+    entries = []
+    try:
+        for ply, string_move in enumerate(game.Moves[:max_plies]):
+            move = parse_san(board.bitboards(), string_move.move) # Coup légal : joué sans nouvelle vérification
+            entries.append((board.hash, move, elos[ply % 2]))
+            board.make_move(decode_move(board.board, move))
+    except SanError:
+        return False
+
+    for key, move, elo in entries:
+        stats.add(key, move, result, elo)
+    return True
+
+def ingest_range(path:str, start:int, end:int, max_plies:int = MAX_PLIES) -> tuple[int, int, OpeningStats]:
+    """
+    Lit et rejoue les parties d'une plage du fichier
+
+    Returns
+    -------
+    tuple : (parties rejouées, parties ignorées, statistiques partielles)
+    """
+    stats = OpeningStats()
+    games = skipped = pending = 0
+    for game in iter_games(read_range(path, start, end)):
+        if replay_game(game, stats, max_plies):
+            games += 1
+        else:
+            skipped += 1
+        pending += 1
+        if pending >= PROGRESS_EVERY and _counter is not None:
+            with _counter.get_lock():
+                _counter.value += pending
+            pending = 0
+
+    if pending and _counter is not None:
+        with _counter.get_lock():
+            _counter.value += pending
+    return games, skipped, stats
+
+def _ingest_task(task:tuple) -> tuple[int, int, OpeningStats]:
+    return ingest_range(*task)
+
+# ------------------------ Côté principal ------------------------
+def ingest(path:str = PGN_FILE, workers:Optional[int] = None, max_plies:int = MAX_PLIES,
+           on_progress:Optional[Callable[[Progress], None]] = None, interval:float = 1.0) -> IngestResult:
+    """
+    Lit toutes les parties du fichier et fusionne les statistiques des ouvertures
+
+    Parameters
+    ----------
+    workers:int
+        Nombre de processus, par défaut le nombre de coeurs (1 : lecture dans le processus courant)
+    on_progress:Callable
+        Appelée toutes les `interval` secondes avec le nombre de parties lues et le temps écoulé
+    """
+    global _counter
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    stats = OpeningStats()
+    games = skipped = 0
+
+    if workers == 1:
+        _counter = None
+        last = start
+        for game in iter_games(read_range(path, 0, os.path.getsize(path))):
+            if replay_game(game, stats, max_plies):
+                games += 1
+            else:
+                skipped += 1
+            if on_progress is not None and time.perf_counter() - last >= interval:
+                last = time.perf_counter()
+                on_progress(Progress(games + skipped, last - start))
+        return IngestResult(games, skipped, time.perf_counter() - start, stats)
+
+    tasks = [(path, first, last, max_plies) for first, last in shard_ranges(path, workers * SHARDS_PER_WORKER)]
+    context = multiprocessing.get_context("spawn")
+    counter = context.Value("q", 0)
+    with context.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(counter,)) as pool:
+        results = pool.imap_unordered(_ingest_task, tasks)
+        remaining = len(tasks)
+        while remaining:
+            try:
+                shard_games, shard_skipped, shard_stats = results.next(timeout=interval)
+            except multiprocessing.TimeoutError:
+                if on_progress is not None:
+                    on_progress(Progress(counter.value, time.perf_counter() - start))
+                continue
+            remaining -= 1
+            games += shard_games
+            skipped += shard_skipped
+            stats.merge(shard_stats)
+
+    return IngestResult(games, skipped, time.perf_counter() - start, stats)
+
+def print_progress(progress:Progress):
+    print(f"\r{progress.games} parties ({progress.games_per_second:.0f} parties/s)", end="", flush=True)
+
+def main(argv:Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Statistiques des ouvertures d'un fichier PGN, lues en parallèle")
+    parser.add_argument("path", nargs="?", default=PGN_FILE)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Nombre de processus (par défaut : nombre de coeurs)")
+    parser.add_argument("-p", "--plies", type=int, default=MAX_PLIES, help="Demi-coups gardés par partie")
+    args = parser.parse_args(argv)
+
+    result = ingest(args.path, args.workers, args.plies, on_progress=print_progress)
+    print(f"\r{result.games} parties rejouées, {result.skipped} ignorées en {result.elapsed:.1f}s ({result.games_per_second:.0f} parties/s)")
+    print(f"{result.stats.positions()} positions, {len(result.stats)} coups différents")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
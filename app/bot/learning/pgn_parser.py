@@ -1,11 +1,27 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, Optional, TextIO
+import bz2
+import gzip
+import io
 import re
 
 PGN_FILE = "datas/lichess_elite_2025-05.pgn" # Lancement du programme depuis la racine du projet
+CHUNK_SIZE = 1 << 20 # Octets lus à la fois dans le fichier
 
 pattern = r'^(1/2|1|0)-(1/2|1|0)$'
 
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Un seul passage sur le texte des coups : chaque alternative correspond à un type d'élément
+TOKEN = re.compile(r"""
+    (?P<comment>\{[^}]*\}|;[^\n]*)      # Commentaires
+  | (?P<nag>\$\d+)                       # Annotations numériques ($1, $14...)
+  | (?P<open>\()                         # Début de variante
+  | (?P<close>\))                        # Fin de variante
+  | (?P<result>1-0|0-1|1/2-1/2|\*)
+  | (?P<number>\d+\.+)                    # Numéros de coups (12. et 12...)
+  | (?P<move>[^\s{}();$]+)
+""", re.VERBOSE)
+
 @dataclass(frozen=True) # Immutable
 class StringMove():
     move:str = None
@@ -28,75 +44,142 @@ class PgnGame():
     def is_complete(self) -> bool:
         return all([self.WhiteElo, self.BlackElo, self.Moves, self.Result])
 
+def string_move(token:str) -> StringMove:
+    """Crée le StringMove d'un coup en notation SAN"""
+    special = None
+    piece = None
+
+    # Roque
+    if token == "O-O":
+        special = "castle_kingside"
+        piece = "k"
+    elif token == "O-O-O":
+        special = "castle_queenside"
+        piece = "k"
+    
+    # Promotion
+    elif "=" in token:
+        special = "promotion"
+        piece = token.split("=")[1][0].lower()
+    
+    # Sinon détection de pièce (majuscule sauf pion)
+    else:
+        if token[0].isupper() and token[0] in "KQRBN":
+            piece = token[0].lower()
+        else:
+            piece = "p"  # pion
+            
+    return StringMove(move=token, piece=piece, special=special)
+
+def tokenize_movetext(movetext:str) -> tuple[list[StringMove], Optional[str]]:
+    """
+    Lit le texte des coups d'une partie en un seul passage.
+    Les commentaires, annotations ($n, !, ?) et variantes (même imbriquées) sont ignorés.
+
+    Returns
+    -------
+    tuple : (coups de la partie principale, résultat ou None)
+    """
+    moves = []
+    result = None
+    depth = 0 # Profondeur de variante
+
+    for token in TOKEN.finditer(movetext):
+        kind = token.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif depth > 0:
+            continue
+        elif kind == "move":
+            move = token.group().rstrip("!?")
+            if move.startswith("0-0"): # Roque écrit avec des zéros
+                move = move.replace("0", "O")
+            if move:
+                moves.append(string_move(move))
+        elif kind == "result":
+            result = token.group()
+
+    return moves, result
+
 def get_moves(pgn_moves: str) -> list[StringMove]:
     """
     Prend en entrée les coups récupérés en PGN
     Ex : "1. Nf3 Nf6 2. d4 g6 3. c4 Bg7 4. Nc3 O-O 5. Bf4 d5"
     Retourne une liste de StringMove
     """
-    moves = []
-    # On enlève les numéros de coups et résultats (1-0, 0-1, 1/2-1/2)
-    tokens = re.sub(r"\d+\.", "", pgn_moves)
-    tokens = re.sub(r"(1-0|0-1|1/2-1/2)", "", tokens)
-    tokens = tokens.split()
-
-    for token in tokens:
-        special = None
-        piece = None
-
-        # Roque
-        if token == "O-O":
-            special = "castle_kingside"
-            piece = "k"
-        elif token == "O-O-O":
-            special = "castle_queenside"
-            piece = "k"
-        
-        # Promotion
-        elif "=" in token:
-            special = "promotion"
-            piece = token.split("=")[1].lower()
-        
-        # Sinon détection de pièce (majuscule sauf pion)
+    return tokenize_movetext(pgn_moves)[0]
+
+def open_pgn(path:str) -> TextIO:
+    """
+    Ouvre un fichier PGN en texte, lu par blocs de `CHUNK_SIZE` octets.
+    Les fichiers compressés (.gz, .bz2, .zst) sont décompressés à la lecture.
+    """
+    if path.endswith(".gz"):
+        raw = gzip.open(path, "rb")
+    elif path.endswith(".bz2"):
+        raw = bz2.open(path, "rb")
+    elif path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError("Lecture des fichiers .zst : pip install zstandard") from error
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_size=CHUNK_SIZE, closefd=True)
+    else:
+        raw = open(path, "rb", buffering=CHUNK_SIZE)
+    if not isinstance(raw, io.BufferedReader):
+        raw = io.BufferedReader(raw, CHUNK_SIZE)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+
+def iter_games(lines:Iterator[str], complete_only:bool = True) -> Iterator[PgnGame]:
+    """
+    Regroupe les lignes d'un PGN en parties. Le texte des coups d'une partie est assemblé une seule fois
+    puis découpé par `tokenize_movetext`.
+
+    Parameters
+    ----------
+    complete_only:bool
+        Si True, seules les parties ayant les deux Elo, des coups et un résultat sont retournées
+    """
+    game = PgnGame()
+    movetext:list[str] = []
+
+    def finish() -> Optional[PgnGame]:
+        moves, result = tokenize_movetext("\n".join(movetext)) # Retours à la ligne gardés : fin des commentaires ";"
+        game.Moves = moves or None
+        if result is not None:
+            game.Result = game.Result or result
+        return game if game.is_complete() or not complete_only else None
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("%"): # Ligne vide ou d'échappement
+            continue
+        if line.startswith("["):
+            if movetext: # Nouvelle partie
+                finished = finish()
+                if finished is not None:
+                    yield finished
+                game, movetext = PgnGame(), []
+            tag = TAG.match(line)
+            if tag is not None and hasattr(game, tag.group(1)):
+                setattr(game, tag.group(1), tag.group(2))
         else:
-            if token[0].isupper() and token[0] in "KQRBN":
-                piece = token[0].lower()
-            else:
-                piece = "p"  # pion
-                
-        moves.append(StringMove(move=token, piece=piece, special=special))
-    
-    return moves
+            movetext.append(line)
+
+    if movetext:
+        finished = finish()
+        if finished is not None:
+            yield finished
+
+def read_games(path:str = PGN_FILE, complete_only:bool = True) -> Iterator[PgnGame]:
+    """Lit les parties d'un fichier PGN (éventuellement compressé) au fur et à mesure"""
+    with open_pgn(path) as pgn_content:
+        yield from iter_games(pgn_content, complete_only)
 
-def get_games():
+def get_games(path:str = PGN_FILE):
     """
     Fonction generator (seulement lisible une fois) qui renvoie les parties sous forme d'objet `PgnGame`
     """
-    current_game = PgnGame()
-    current_string = ""
-
-    with open(PGN_FILE, "r") as pgn_content:
-        while True:
-            line = pgn_content.readline()
-            if line == "":
-                break
-            if line == "\n":
-                if current_game.is_complete():
-                    yield current_game
-                    current_game = PgnGame()
-                    current_string = ""
-                continue
-            line = line[:-1] # Enlever Newline
-
-            if line.startswith("[") and line.endswith("]"):
-                content = line[1:-1].split('"')[:-1]
-
-                if hasattr(current_game, content[0].strip()):  
-                    setattr(current_game, content[0].strip(), content[1])
-            else:
-                line = line.split(" ")
-                if re.match(pattern, line[-1]):
-                    current_game.Result = line[-1]
-                    line = line[:-1]
-                current_string += " " + " ".join(line)
-                current_game.Moves = get_moves(current_string)
\ No newline at end of file
+    return read_games(path)
\ No newline at end of file
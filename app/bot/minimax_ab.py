@@ -4,15 +4,18 @@
 
 from typing import NamedTuple, Optional
 from collections import defaultdict
-from copy import deepcopy
 from random import randint
+import time
 
 from app.utils.logging import Logger, DEBUG
 
 from app.engine.board import ChessBoard
-from app.engine.utils import Move, Win, Stalemate, WHITE, BLACK, SpecialMove
+from app.engine.compact import encode_move, decode_move, EN_PASSANT
+from app.engine.utils import Move, Promotion, Win, Stalemate, WHITE, BLACK
 
-from app.bot.evaluation import Coefficients, final_evaluation
+from app.bot.evaluation import Coefficients, EvaluationCache, final_evaluation, pawn_value
+from app.bot.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from app.bot.ordering import MoveOrdering
 
 class BestMove(NamedTuple):
     move:Move
@@ -20,22 +23,82 @@ class BestMove(NamedTuple):
 
 logger = Logger()
 
+MAX_QUIESCENCE_DEPTH = 8 # Nombre maximal de prises enchaînées après l'horizon
+DELTA_MARGIN = 2 # Marge (en pions) de l'élagage delta
+
+class SearchTimeout(Exception):
+    """Levée par un noeud quand le temps alloué à la recherche est écoulé ou que la recherche est annulée"""
+
+class SearchContext:
+    """Etat partagé par tous les noeuds d'une même recherche"""
+    CHECK_INTERVAL = 64 # Nombre de noeuds entre deux lectures de l'horloge
+
+    def __init__(self, table:Optional[TranspositionTable] = None, deadline:Optional[float] = None, quiescence:bool = True, stop = None, evaluations:Optional[EvaluationCache] = None):
+        """
+        Parameters
+        ----------
+        table:TranspositionTable
+            Table de transposition, si non spécifiée aucune position n'est mémorisée
+        deadline:float
+            Instant (`time.perf_counter()`) à partir duquel la recherche est interrompue par `SearchTimeout`
+        quiescence:bool
+            Si True, les feuilles sont prolongées par une recherche des prises (`Node.quiescence`)
+        stop:Event
+            Si spécifié, la recherche est interrompue par `SearchTimeout` dès que l'évènement est levé (annulation)
+        evaluations:EvaluationCache
+            Si spécifié, les feuilles déjà évaluées (transpositions, itérations précédentes) ne sont pas recalculées
+        """
+        self.table = table
+        self.deadline = deadline
+        self.quiescence = quiescence
+        self.stop = stop
+        self.evaluations = evaluations
+        self.nodes = 0
+        self.qnodes = 0 # Noeuds de la recherche de quiescence
+        self.ordering = MoveOrdering()
+
+    def visit(self):
+        """Compte un noeud et interrompt la recherche si le temps est écoulé"""
+        self.nodes += 1
+        if self.nodes % self.CHECK_INTERVAL == 0:
+            self.check_time()
+
+    def visit_quiescence(self):
+        """Compte un noeud de quiescence et interrompt la recherche si le temps est écoulé"""
+        self.qnodes += 1
+        if self.qnodes % self.CHECK_INTERVAL == 0:
+            self.check_time()
+
+    def check_time(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+
 class Node():
     # Contient un coups et l'échiquier
     LOG_DEPTH = defaultdict(lambda : 0) # Dictionnaire contenant pour chaques profondeur, le nombre de noeuds 
 
-    def __init__(self, board:ChessBoard, move:Move, depth:int):
+    def __init__(self, board:ChessBoard, move:Move, depth:int, context:Optional[SearchContext] = None, ply:int = 0):
         """
         Parameters
         ----------
         board:Chessboard
-            Echiquier avec le move joué
+            Echiquier avec le move joué, partagé par tous les noeuds de la recherche (coups joués et annulés sur place)
         move:Move
             Dernier coups joué
+        context:SearchContext
+            Etat partagé par tous les noeuds de la recherche (table de transposition, ordre des coups, temps limite)
+        ply:int
+            Distance à la racine de la recherche
         """
         self.board = board
         self.move = move
         self.depth = depth
+        self.ply = ply
+        self.context = context if context is not None else SearchContext()
+        self.table = self.context.table
+        self.context.visit()
         self.LOG_DEPTH[depth] += 1
         self.player = board.turn
 
@@ -43,6 +106,8 @@ class Node():
         """Retourne le coups réduisant le plus les risques"""
         # Vérifier que la profondeur maximale n'a pas été atteinte
         if self.depth <= 0:
+            if self.context.quiescence:
+                return BestMove(self.move, self.quiescence(coeffs, alpha, beta))
             return BestMove(self.move, self.eval(coeffs))
 
         # Stoppe ici si la partie est finie
@@ -57,15 +122,38 @@ class Node():
         logger.debug("Fin de la vérification")
         
         best_move = None
-        logger.warning(f"Itération sur {len(self.board.get_all_actions())}")
-        for move in self.board.get_all_actions():
-            if isinstance(move, SpecialMove):
-                move = move.king_move
-            new_board = deepcopy(self.board)
-            new_board.move(move)
+        actions = self.board.get_all_actions()
+
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        if self.table is not None:
+            key = self.board.hash
+            entry = self.table.probe(key)
+            if entry is not None and entry.move:
+                tt_move = next((action for action in actions if encode_move(action) == entry.move), None)
+            if tt_move is not None:
+                if entry.depth >= self.depth:
+                    if entry.bound == EXACT:
+                        return BestMove(tt_move, entry.value)
+                    elif entry.bound == LOWER:
+                        alpha = max(alpha, entry.value)
+                    else:
+                        beta = min(beta, entry.value)
+                    if beta <= alpha:
+                        return BestMove(tt_move, entry.value)
 
-            value = Node(new_board, move, self.depth - 1).get_best_move(coeffs, alpha, beta)
-            best_move = self.best_between_two(best_move, value)
+        # Coup de la table de transposition, prises, coups "killer" puis historique
+        ordering = self.context.ordering
+        actions = ordering.sort(self.board, actions, self.ply, tt_move)
+
+        logger.warning(f"Itération sur {len(actions)}")
+        for index, move in enumerate(actions):
+            undo = self.board.make_move(move)
+            try:
+                value = Node(self.board, move, self.depth - 1, self.context, self.ply + 1).get_best_move(coeffs, alpha, beta)
+            finally:
+                self.board.unmake_move(undo) # L'échiquier est restauré même si la recherche est interrompue
+            best_move = self.best_between_two(best_move, BestMove(move, value.value))
 
             if self.player == WHITE:
                 alpha = max(alpha, best_move.value)
@@ -73,14 +161,91 @@ class Node():
                 beta = min(beta, best_move.value)
 
             if beta <= alpha:
+                ordering.cutoff(self.board, move, self.ply, self.depth, index)
                 break
 
+        if self.table is not None:
+            if best_move.value <= alpha_orig:
+                bound = UPPER
+            elif best_move.value >= beta_orig:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.table.store(key, self.depth, best_move.value, bound, encode_move(best_move.move))
+
         return best_move
 
+    def quiescence(self, coeffs:Coefficients, alpha:float, beta:float, qdepth:int = 0) -> float:
+        """
+        Prolonge la recherche par les prises (et toutes les parades en cas d'échec) pour ne pas
+        évaluer une position au milieu d'un échange
+
+        Parameters
+        ----------
+        qdepth:int
+            Nombre de coups joués depuis l'horizon
+        """
+        self.context.visit_quiescence()
+        board = self.board
+        maximizing = board.turn == WHITE
+        bitboards = board.bitboards()
+        in_check = bitboards.in_check(board.turn)
+        moves = bitboards.legal_moves()
+
+        if in_check:
+            if not moves:
+                return self.eval(coeffs) # Echec et mat
+            best = float("-inf") if maximizing else float("inf")
+        else:
+            # "Stand pat" : le joueur peut refuser toutes les prises
+            best = stand_pat = self.eval(coeffs)
+            if qdepth >= MAX_QUIESCENCE_DEPTH:
+                return stand_pat
+            if maximizing:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            occupied = bitboards.occupancy[0] | bitboards.occupancy[1]
+            moves = [move for move in moves if occupied >> ((move >> 6) & 63) & 1 or (move >> 12) & 7 or move >> 15 == EN_PASSANT]
+            pawn = pawn_value(coeffs)
+
+        actions = self.context.ordering.sort(board, [decode_move(board.board, move) for move in moves], self.ply)
+        for move in actions:
+            if not in_check and not isinstance(move, Promotion):
+                # Elagage delta : même en gagnant la pièce prise (et une marge), alpha / beta ne serait pas atteint
+                victim = board.board[move.pos.y][move.pos.x]
+                gain = (victim.value if victim is not None else 1) + DELTA_MARGIN
+                if (maximizing and stand_pat + gain * pawn <= alpha) or (not maximizing and stand_pat - gain * pawn >= beta):
+                    continue
+
+            undo = board.make_move(move)
+            try:
+                value = self.quiescence(coeffs, alpha, beta, qdepth + 1)
+            finally:
+                board.unmake_move(undo)
+
+            if maximizing:
+                best = max(best, value)
+                alpha = max(alpha, value)
+            else:
+                best = min(best, value)
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+
+        return best
+
     def eval(self, coeffs:Coefficients):
         """Retourne un float entre -1 et 1"""
         logger.error("Début de l'évaluation de la partie", time_counter=True)
-        score = final_evaluation(self.board, coeffs)
+        if self.context.evaluations is not None:
+            score = self.context.evaluations.evaluate(self.board, coeffs)
+        else:
+            score = final_evaluation(self.board, coeffs)
         logger.error(f"Fin de l'évaluation : {score}")
 
         return score
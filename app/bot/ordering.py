@@ -0,0 +1,105 @@
+# ---------------------------------------------------------------------
+# Ordre des coups dans la recherche alpha-bêta
+#----------------------------------------------------------------------
+
+from typing import Optional
+
+from app.engine.board import ChessBoard
+from app.engine.compact import encode_move, PIECE_VALUES
+from app.engine.utils import Move, Roque, Promotion, EnPassant, WHITE
+
+CAPTURE_SCORE = 1_000_000 # Prises et promotions
+KILLER_SCORE = 900_000 # Coups calmes ayant provoqué une coupure au même ply
+HISTORY_MAX = 100_000 # Au-delà, les scores d'historique sont divisés par deux
+KILLERS_PER_PLY = 2
+
+class MoveOrdering:
+    """
+    Trie les coups pour que les coupures alpha-bêta arrivent le plus tôt possible :
+    coup de la table de transposition, prises (MVV-LVA), coups "killer" du ply, puis coups calmes par historique.
+    Conservé pendant toute une recherche (et entre les itérations de l'approfondissement itératif).
+    """
+    def __init__(self):
+        self.killers:list[list[int]] = [] # killers[ply] : coups encodés
+        self.history = [0] * (2 * 64 * 64) # Indexé par couleur, case de départ et case d'arrivée
+        self.cutoffs = 0 # Noeuds ayant provoqué une coupure
+        self.first_move_cutoffs = 0 # Dont coupure sur le premier coup essayé
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Proportion des coupures obtenues dès le premier coup (proche de 1 si l'ordre est bon)"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def score(self, board:ChessBoard, move:Move, killers:list[int]) -> int:
+        """Score de tri d'un coup, le plus grand est essayé en premier"""
+        if isinstance(move, Roque):
+            move = move.king_move
+        piece = board.board[move.start_pos.y][move.start_pos.x]
+        if isinstance(move, EnPassant):
+            victim = board.board[move.captured_pawn.y][move.captured_pawn.x]
+        else:
+            victim = board.board[move.end_pos.y][move.end_pos.x]
+
+        if victim is not None or isinstance(move, Promotion):
+            # MVV-LVA : la plus grosse victime d'abord, avec le plus petit attaquant
+            score = CAPTURE_SCORE + (victim.value * 100 if victim is not None else 0) - piece.value
+            if isinstance(move, Promotion):
+                score += PIECE_VALUES[move.new_piece.CODE] * 100 # Valeur lue par le type de la pièce, sans la créer
+            return score
+
+        encoded = encode_move(move)
+        if encoded in killers:
+            return KILLER_SCORE - killers.index(encoded)
+        return self.history[self.history_index(piece.color, encoded)]
+
+    def sort(self, board:ChessBoard, moves:list[Move], ply:int, first:Optional[Move] = None) -> list[Move]:
+        """
+        Retourne les coups triés
+
+        Parameters
+        ----------
+        ply:int
+            Distance à la racine de la recherche
+        first:Move
+            Coup essayé avant tous les autres (coup de la table de transposition)
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        ordered = sorted((move for move in moves if move is not first), key=lambda move: self.score(board, move, killers), reverse=True)
+        if first is not None:
+            ordered.insert(0, first)
+        return ordered
+
+    def cutoff(self, board:ChessBoard, move:Move, ply:int, depth:int, index:int):
+        """
+        Enregistre un coup ayant provoqué une coupure
+
+        Parameters
+        ----------
+        index:int
+            Rang du coup dans la liste triée
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        start = move.king_move.start_pos if isinstance(move, Roque) else move.start_pos
+        piece = board.board[start.y][start.x]
+        if isinstance(move, (Promotion, EnPassant)) or board.board[move.pos.y][move.pos.x] is not None:
+            return # Les prises sont déjà bien classées par MVV-LVA
+
+        encoded = encode_move(move)
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if encoded not in killers:
+            killers.insert(0, encoded)
+            del killers[KILLERS_PER_PLY:]
+
+        i = self.history_index(piece.color, encoded)
+        self.history[i] += depth * depth
+        if self.history[i] > HISTORY_MAX:
+            self.history = [value // 2 for value in self.history]
+
+    @staticmethod
+    def history_index(color:str, encoded:int) -> int:
+        return (0 if color == WHITE else 4096) + (encoded & 4095)
@@ -0,0 +1,217 @@
+"""
+Recherche parallèle par partage des coups de la racine entre plusieurs processus.
+
+Chaque processus cherche un coup de la racine avec une fenêtre alpha-bêta dont la borne
+est partagée (`multiprocessing.Value`) : dès qu'un processus trouve un meilleur coup,
+les autres coupent plus tôt.
+
+Utilisation :
+    python -m app.bot.parallel --depth 3 --workers 4   # compare avec la recherche sur un seul coeur
+"""
+
+from typing import NamedTuple, Optional
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+
+from app.engine.board import ChessBoard
+from app.engine.compact import encode_move, move_to_uci
+from app.engine.utils import WHITE
+from app.bot import minimax_ab
+from app.bot.evaluation import Coefficients
+from app.bot.minimax_ab import Node, SearchContext, SearchTimeout
+from app.bot.ordering import MoveOrdering
+from app.bot.transposition import TranspositionTable
+
+TABLE_SIZE_MB = 16 # Table de transposition de chaque processus
+STOP_POLL = 0.05 # Secondes entre deux vérifications de la demande d'arrêt pendant une recherche
+
+class ParallelResult(NamedTuple):
+    move:Optional[str] # Coup en notation UCI
+    value:float
+    nodes:int # Noeuds de tous les processus (quiescence comprise)
+    searched:int # Coups de la racine terminés avant la fin du temps
+    elapsed:float
+
+class Benchmark(NamedTuple):
+    workers:int
+    single:float # Secondes sur un seul coeur
+    parallel:float
+    single_nodes:int
+    parallel_nodes:int
+
+    @property
+    def speedup(self) -> float:
+        return self.single / self.parallel if self.parallel else 0.0
+
+# ------------------------ Côté processus ------------------------
+_bound = None # Meilleure valeur trouvée à la racine, partagée par tous les processus
+_stopped = None # `Event` partagé : levé pour arrêter les coups en cours de recherche (annulation)
+_table:Optional[TranspositionTable] = None
+
+def quiet():
+    """Désactive l'affichage des noeuds de la recherche (fausse les mesures de temps)"""
+    logging.disable(logging.INFO)
+    minimax_ab.logger.min_level = len(minimax_ab.logger.LEVELS)
+
+def _init_worker(bound, stopped, table_size_mb:float):
+    global _bound, _stopped, _table
+    _bound = bound
+    _stopped = stopped
+    _table = TranspositionTable(table_size_mb)
+    quiet()
+
+def _search_root_move(fen:str, uci:str, depth:int, coeffs:Coefficients, deadline:Optional[float]) -> tuple[str, Optional[float], int]:
+    """Cherche un coup de la racine, retourne (coup, valeur ou None si le temps est écoulé ou la recherche arrêtée, noeuds)"""
+    if _stopped.is_set():
+        return uci, None, 0
+    board = ChessBoard.from_fen(fen)
+    maximizing = board.turn == WHITE
+    move = board.move_from_uci(uci)
+    board.make_move(move)
+
+    # La borne partagée sert de alpha (blancs) ou de beta (noirs) : seuls les coups meilleurs sont cherchés exactement
+    alpha, beta = (_bound.value, 1.0) if maximizing else (-1.0, _bound.value)
+    context = SearchContext(_table, deadline, stop=_stopped)
+    try:
+        value = Node(board, move, depth - 1, context, 1).get_best_move(coeffs, alpha, beta).value
+    except SearchTimeout:
+        return uci, None, context.nodes + context.qnodes
+
+    with _bound.get_lock():
+        if (maximizing and value > _bound.value) or (not maximizing and value < _bound.value):
+            _bound.value = value
+    return uci, value, context.nodes + context.qnodes
+
+# ------------------------ Côté serveur ------------------------
+class RootSplitSearch:
+    """Pool de processus conservé d'une recherche à l'autre (le démarrage des processus est coûteux)"""
+    def __init__(self, workers:Optional[int] = None, table_size_mb:float = TABLE_SIZE_MB):
+        """
+        Parameters
+        ----------
+        workers:int
+            Nombre de processus, par défaut le nombre de coeurs
+        """
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context("spawn")
+        self.bound = context.Value("d", 0.0)
+        self.stopped = context.Event()
+        self.pool = context.Pool(self.workers, initializer=_init_worker, initargs=(self.bound, self.stopped, table_size_mb))
+
+    def search(self, board:ChessBoard, depth:int, coeffs:Coefficients = Coefficients(), time_limit:Optional[float] = None, stop=None) -> ParallelResult:
+        """
+        Cherche le meilleur coup à la profondeur donnée
+
+        Parameters
+        ----------
+        time_limit:float
+            Si spécifié, les coups de la racine non terminés à temps sont ignorés
+        stop:Event
+            Si spécifié et levé pendant la recherche, les processus arrêtent les coups en cours (ignorés comme ceux hors du temps)
+        """
+        start = time.perf_counter()
+        maximizing = board.turn == WHITE
+        # Les coups les plus prometteurs (prises) partent en premier pour resserrer la borne au plus tôt
+        actions = MoveOrdering().sort(board, board.get_all_actions(), 0)
+        if not actions:
+            return ParallelResult(None, 0.0, 0, 0, 0.0)
+
+        self.bound.value = -1.0 if maximizing else 1.0
+        deadline = start + time_limit if time_limit is not None else None
+        fen = board.to_fen()
+        tasks = [(fen, move_to_uci(encode_move(move)), depth, coeffs, deadline) for move in actions]
+
+        self.stopped.clear()
+        pending = self.pool.starmap_async(_search_root_move, tasks, chunksize=1)
+        while not pending.ready():
+            pending.wait(STOP_POLL)
+            if stop is not None and stop.is_set():
+                self.stopped.set() # Relayé aux processus : arrêt au prochain contrôle du temps de chaque coup
+
+        best, best_value, nodes, searched = None, None, 0, 0
+        for uci, value, move_nodes in pending.get():
+            nodes += move_nodes
+            if value is None:
+                continue
+            searched += 1
+            if best is None or (maximizing and value > best_value) or (not maximizing and value < best_value):
+                best, best_value = uci, value
+
+        if best is None: # Aucun coup terminé à temps : premier coup de l'ordre
+            best, best_value = tasks[0][1], 0.0
+        return ParallelResult(best, best_value, nodes, searched, time.perf_counter() - start)
+
+    def iterative(self, board:ChessBoard, time_limit:float, coeffs:Coefficients = Coefficients(), max_depth:int = 64, stop=None) -> ParallelResult:
+        """
+        Approfondissement itératif parallèle : résultat de la dernière profondeur cherchée à temps.
+        Une profondeur non terminée est gardée si son meilleur coup est au moins aussi bon que celui de la précédente.
+
+        Parameters
+        ----------
+        stop:Event
+            Si spécifié, la recherche s'arrête dès qu'il est levé (coups en cours compris)
+        """
+        start = time.perf_counter()
+        maximizing = board.turn == WHITE
+        result = self.search(board, 1, coeffs, stop=stop)
+        for depth in range(2, max_depth + 1):
+            remaining = time_limit - (time.perf_counter() - start)
+            if result.move is None or remaining < time_limit / 2 or (stop is not None and stop.is_set()):
+                break
+            deeper = self.search(board, depth, coeffs, remaining, stop)
+            if stop is not None and stop.is_set():
+                break
+            if deeper.searched < len(board.get_all_actions()):
+                # Profondeur non terminée : le meilleur coup trouvé vaut au moins sa valeur à cette profondeur
+                if deeper.searched and (deeper.value >= result.value if maximizing else deeper.value <= result.value):
+                    result = deeper
+                break
+            result = deeper
+        return result._replace(elapsed=time.perf_counter() - start)
+
+    def warm_up(self):
+        """Attend que tous les processus soient démarrés"""
+        self.pool.starmap(os.getpid, [()] * self.workers * 2)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def benchmark(fen:str, depth:int, workers:Optional[int] = None, coeffs:Coefficients = Coefficients()) -> Benchmark:
+    """Compare la recherche sur un seul coeur et la recherche parallèle (sans compter le démarrage des processus)"""
+    board = ChessBoard.from_fen(fen)
+    start = time.perf_counter()
+    context = SearchContext(TranspositionTable(TABLE_SIZE_MB))
+    Node(board, None, depth, context).get_best_move(coeffs)
+    single = time.perf_counter() - start
+
+    with RootSplitSearch(workers) as search:
+        search.warm_up()
+        result = search.search(board, depth, coeffs)
+    return Benchmark(search.workers, single, result.elapsed, context.nodes + context.qnodes, result.nodes)
+
+def main(argv:Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recherche parallèle : accélération par rapport à un seul coeur")
+    parser.add_argument("--fen", default="r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Nombre de processus (par défaut : nombre de coeurs)")
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.fen, args.depth, args.workers)
+    print(f"1 coeur      : {result.single:.2f}s ({result.single_nodes} noeuds)")
+    print(f"{result.workers} processus : {result.parallel:.2f}s ({result.parallel_nodes} noeuds)")
+    print(f"Accélération : x{result.speedup:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    quiet()
+    raise SystemExit(main())
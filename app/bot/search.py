@@ -0,0 +1,96 @@
+# ---------------------------------------------------------------------
+# Approfondissement itératif : profondeurs 1, 2, 3... dans le temps alloué
+#----------------------------------------------------------------------
+
+from typing import NamedTuple, Optional
+import time
+
+from app.engine.board import ChessBoard
+from app.engine.utils import Move
+from app.utils.logging import Logger
+
+from app.bot.evaluation import Coefficients, EvaluationCache
+from app.bot.minimax_ab import Node, SearchContext, SearchTimeout
+from app.bot.transposition import TranspositionTable
+
+MAX_DEPTH = 64
+MOVES_TO_GO = 30 # Nombre de coups restants supposé quand la cadence n'en donne pas
+SAFETY_MARGIN = 0.05 # Secondes gardées en réserve (réponse HTTP, copie de l'échiquier...)
+MIN_TIME = 0.05
+SEARCH_CACHE_SIZE = 50_000 # Evaluations gardées pendant une recherche
+
+logger = Logger()
+
+class SearchResult(NamedTuple):
+    move:Optional[Move]
+    value:float
+    depth:int # Dernière profondeur terminée
+    nodes:int
+    qnodes:int # Noeuds de la recherche de quiescence
+    elapsed:float
+
+def allocate_time(remaining:float, increment:float = 0.0, moves_to_go:Optional[int] = None) -> float:
+    """
+    Temps (en secondes) à consacrer au prochain coup
+
+    Parameters
+    ----------
+    remaining:float
+        Temps restant à la pendule du joueur
+    increment:float
+        Temps ajouté après chaque coup
+    moves_to_go:int
+        Nombre de coups avant le prochain contrôle de temps, si connu
+    """
+    moves_to_go = moves_to_go or MOVES_TO_GO
+    budget = remaining / moves_to_go + increment * 0.8
+    # Ne jamais utiliser plus de la moitié du temps restant sur un seul coup
+    budget = min(budget, remaining / 2 - SAFETY_MARGIN)
+    return max(budget, MIN_TIME)
+
+def iterative_deepening(board:ChessBoard, time_limit:float, coeffs:Coefficients = Coefficients(), table:Optional[TranspositionTable] = None, max_depth:int = MAX_DEPTH, stop = None, evaluations:Optional[EvaluationCache] = None) -> SearchResult:
+    """
+    Cherche à des profondeurs croissantes jusqu'à épuisement du temps et retourne le résultat
+    de la dernière profondeur terminée. La profondeur 1 est toujours terminée.
+
+    Parameters
+    ----------
+    board:ChessBoard
+        Echiquier sur lequel les coups sont joués et annulés (non modifié à la fin de la recherche)
+    time_limit:float
+        Temps alloué en secondes
+    table:TranspositionTable
+        Partagée entre les itérations : le meilleur coup d'une itération est cherché en premier à la suivante
+    stop:Event
+        Annulation de la recherche : le résultat de la dernière profondeur terminée est retourné
+    evaluations:EvaluationCache
+        Cache des évaluations, par défaut un cache propre à la recherche (les feuilles d'une itération sont revues à la suivante)
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit
+    if table is not None:
+        table.new_search()
+
+    if evaluations is None:
+        evaluations = EvaluationCache(SEARCH_CACHE_SIZE)
+    context = SearchContext(table, stop=stop, evaluations=evaluations)
+    result = SearchResult(None, 0.0, 0, 0, 0, 0.0)
+    for depth in range(1, max_depth + 1):
+        context.deadline = deadline if depth > 1 else None
+        try:
+            best_move = Node(board, None, depth, context).get_best_move(coeffs)
+        except SearchTimeout:
+            logger.info(f"Temps écoulé pendant la profondeur {depth}")
+            break
+
+        elapsed = time.perf_counter() - start
+        result = SearchResult(best_move.move, best_move.value, depth, context.nodes, context.qnodes, elapsed)
+        logger.info(f"Profondeur {depth} : {best_move.move} ({best_move.value:.3f}), {context.nodes} noeuds (+ {context.qnodes} de quiescence) en {elapsed:.2f}s, coupures au premier coup : {context.ordering.first_move_cutoff_rate:.0%}")
+
+        if best_move.move is None:
+            break # Partie finie : aucun coup à chercher
+        # L'itération suivante prend en général plusieurs fois plus de temps que la précédente
+        if elapsed > time_limit / 2:
+            break
+
+    return result
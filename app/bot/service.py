@@ -0,0 +1,280 @@
+# ---------------------------------------------------------------------
+# Service d'exécution du bot : recherches dans un pool de processus
+#----------------------------------------------------------------------
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from typing import NamedTuple, Optional
+import multiprocessing
+import queue
+import threading
+import os
+
+from app.bot.transposition import TranspositionTable, DEFAULT_SIZE_MB
+from app.utils.logging import Logger
+
+logger = Logger()
+
+class BotStats(NamedTuple):
+    workers:int
+    queued:int # Recherches en attente d'un processus libre
+    running:int
+    submitted:int
+    completed:int
+    cancelled:int
+    failed:int
+
+class BotJob(NamedTuple):
+    future:Future
+    stop:object # `Event` partagé avec le processus, demande l'arrêt de la recherche
+    ply:int # Nombre de coups joués dans la partie au moment de la demande
+
+# ------------------------ Côté processus de recherche ------------------------
+_table:Optional[TranspositionTable] = None # Une table par processus, conservée d'une recherche à l'autre
+_evaluations = None # Cache des évaluations du processus (`EvaluationCache`), conservé lui aussi
+_book = None # Livre d'ouvertures du processus (`OpeningBook`), projeté en mémoire une seule fois
+
+def _init_worker():
+    """Pas d'affichage des noeuds dans les processus de recherche (plusieurs milliers de lignes par recherche)"""
+    from app.bot.parallel import quiet
+    quiet()
+
+def search_position(fen:str, time_limit:float, stop=None, table_size_mb:float = DEFAULT_SIZE_MB, book_path:Optional[str] = None) -> Optional[str]:
+    """
+    Cherche le meilleur coup d'une position (exécutée dans un processus du pool)
+
+    Parameters
+    ----------
+    book_path:str
+        Si spécifié, le coup est d'abord cherché dans ce livre d'ouvertures (voir app.bot.learning.book)
+
+    Returns
+    -------
+    str : coup en notation UCI ('e2e4'), None si aucun coup n'est possible ou si la recherche a été annulée
+    """
+    # Imports ici : le module reste léger pour le processus principal
+    from app.engine.board import ChessBoard
+    from app.engine.compact import encode_move, move_to_uci
+    from app.bot.search import iterative_deepening
+    from app.bot.evaluation import EvaluationCache
+    global _table, _evaluations
+
+    if stop is not None and stop.is_set():
+        return None
+    if _table is None:
+        _table = TranspositionTable(table_size_mb)
+        _evaluations = EvaluationCache()
+
+    board = ChessBoard.from_fen(fen)
+    move = book_move(board, book_path)
+    if move is not None:
+        return move
+
+    result = iterative_deepening(board, time_limit, table=_table, stop=stop, evaluations=_evaluations)
+    if result.move is None or (stop is not None and stop.is_set()):
+        return None
+    return move_to_uci(encode_move(result.move))
+
+def book_move(board, book_path:Optional[str]) -> Optional[str]:
+    """Coup du livre d'ouvertures pour la position (notation UCI), None si aucun livre ou position absente du livre"""
+    from app.engine.compact import encode_move, move_to_uci
+    global _book
+
+    if book_path is None:
+        return None
+    if _book is None or _book.path != book_path:
+        from app.bot.learning.book import OpeningBook
+        _book = OpeningBook(book_path)
+    move = _book.choose(board)
+    return move_to_uci(encode_move(move)) if move is not None else None
+
+def split_search_position(search, fen:str, time_limit:float, stop=None, book_path:Optional[str] = None) -> Optional[str]:
+    """
+    Même chose que `search_position`, les coups de la racine étant partagés entre les processus de `search`
+    (`RootSplitSearch`, exécutée dans un thread du serveur)
+    """
+    from app.engine.board import ChessBoard
+
+    if stop is not None and stop.is_set():
+        return None
+    board = ChessBoard.from_fen(fen)
+    move = book_move(board, book_path)
+    if move is not None:
+        return move
+
+    result = search.iterative(board, time_limit, stop=stop)
+    if stop is not None and stop.is_set():
+        return None
+    return result.move
+
+# ------------------------ Côté serveur ------------------------
+class BotService:
+    """
+    Reçoit une position et un temps alloué, renvoie le coup de manière asynchrone.
+    Les recherches (limitées par le GIL) tournent dans des processus séparés : plusieurs parties
+    contre le bot peuvent réfléchir en même temps et les requêtes HTTP ne sont jamais bloquées.
+    """
+    def __init__(self, workers:Optional[int] = None, table_size_mb:float = DEFAULT_SIZE_MB, book_path:Optional[str] = None, split_workers:int = 0):
+        """
+        Parameters
+        ----------
+        workers:int
+            Nombre de recherches simultanées (une par processus), par défaut le nombre de coeurs
+        table_size_mb:float
+            Taille de la table de transposition de chaque processus
+        book_path:str
+            Livre d'ouvertures consulté avant chaque recherche (fichier partagé par les processus)
+        split_workers:int
+            Si non nul, chaque recherche partage les coups de la racine entre ce nombre de processus (`RootSplitSearch`).
+            `workers` recherches tournent toujours en même temps (par défaut : nombre de coeurs / `split_workers`).
+        """
+        self.split_workers = split_workers
+        cores = os.cpu_count() or 1
+        self.workers = workers or (max(1, cores // split_workers) if split_workers else cores)
+        self.table_size_mb = table_size_mb
+        self.book_path = book_path
+        self.jobs:dict[str, BotJob] = {} # Sous forme {"id partie": BotJob}
+        self.lock = threading.RLock() # Réentrant : `Future.cancel` appelle `_count` immédiatement
+        self._executor = None
+        self._manager = None
+        self._splits:Optional[queue.SimpleQueue] = None # `RootSplitSearch` libres si `split_workers` est non nul
+        self._split_searches = [] # Toutes les `RootSplitSearch` créées (arrêtées par `shutdown`)
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self._stopped = set() # Futures annulées pendant leur exécution, à ne pas compter comme terminées
+
+    def _start(self):
+        if self.split_workers:
+            # Un thread par recherche simultanée, chacun avec sa `RootSplitSearch` (créée à sa première recherche) :
+            # la borne partagée par les processus d'une `RootSplitSearch` ne sert qu'à une recherche à la fois
+            self._splits = queue.SimpleQueue()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bot")
+            return
+        # "spawn" : le serveur peut avoir des threads, un fork les copierait dans un état incohérent
+        context = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker)
+        self._manager = context.Manager()
+
+    def submit(self, game_id:str, fen:str, time_limit:float, ply:int = 0) -> Future:
+        """
+        Lance la recherche pour une partie (une seule recherche par partie à la fois)
+
+        Parameters
+        ----------
+        fen:str
+            Position à chercher
+        time_limit:float
+            Temps alloué en secondes
+        ply:int
+            Nombre de coups joués dans la partie, permet d'ignorer un résultat devenu obsolète
+        """
+        with self.lock:
+            job = self.jobs.get(game_id)
+            if job is not None and not job.future.done():
+                return job.future
+            if self._executor is None:
+                self._start()
+
+            if self._splits is not None:
+                stop = threading.Event()
+                future = self._executor.submit(self._split_search, fen, time_limit, stop)
+            else:
+                stop = self._manager.Event()
+                future = self._executor.submit(search_position, fen, time_limit, stop, self.table_size_mb, self.book_path)
+            future.add_done_callback(self._count)
+            self.jobs[game_id] = BotJob(future, stop, ply)
+            self.submitted += 1
+            return future
+
+    def _split_search(self, fen:str, time_limit:float, stop) -> Optional[str]:
+        """Exécutée dans un thread de l'exécuteur : recherche sur une `RootSplitSearch` libre"""
+        try:
+            search = self._splits.get_nowait()
+        except queue.Empty: # Au plus une par thread
+            from app.bot.parallel import RootSplitSearch
+            search = RootSplitSearch(self.split_workers, self.table_size_mb)
+            with self.lock:
+                self._split_searches.append(search)
+        try:
+            return split_search_position(search, fen, time_limit, stop, self.book_path)
+        finally:
+            self._splits.put(search)
+
+    def _count(self, future:Future):
+        with self.lock:
+            if future.cancelled() or future in self._stopped:
+                self._stopped.discard(future)
+                return # Déjà compté par `cancel`
+            if future.exception() is not None:
+                self.failed += 1
+                logger.error(f"Erreur pendant la recherche du bot : {future.exception()}")
+            else:
+                self.completed += 1
+
+    def pending(self, game_id:str) -> bool:
+        """True si une recherche est en cours ou en attente pour la partie"""
+        job = self.jobs.get(game_id)
+        return job is not None and not job.future.done()
+
+    def result(self, game_id:str, ply:Optional[int] = None) -> Optional[str]:
+        """
+        Retourne le coup trouvé (notation UCI) si la recherche de la partie est terminée, et l'oublie
+
+        Parameters
+        ----------
+        ply:int
+            Si spécifié, le résultat d'une recherche lancée à un autre nombre de coups est ignoré
+        """
+        with self.lock:
+            job = self.jobs.get(game_id)
+            if job is None or not job.future.done():
+                return None
+            del self.jobs[game_id]
+        if job.future.cancelled() or job.future.exception() is not None:
+            return None
+        if ply is not None and job.ply != ply:
+            return None
+        return job.future.result()
+
+    def cancel(self, game_id:str) -> bool:
+        """Annule la recherche d'une partie (terminée ou abandonnée), retourne True si une recherche était en cours"""
+        with self.lock:
+            job = self.jobs.pop(game_id, None)
+            if job is None or job.future.done():
+                return False
+            self.cancelled += 1
+            if not job.future.cancel(): # Déjà commencée : demande d'arrêt au processus
+                self._stopped.add(job.future)
+                try:
+                    job.stop.set()
+                except (OSError, EOFError):
+                    pass
+            return True
+
+    def stats(self) -> BotStats:
+        with self.lock:
+            futures = [job.future for job in self.jobs.values()]
+        running = sum(1 for future in futures if future.running())
+        queued = sum(1 for future in futures if not future.running() and not future.done())
+        return BotStats(self.workers, queued, running, self.submitted, self.completed, self.cancelled, self.failed)
+
+    def shutdown(self, wait:bool = True):
+        """Arrête les processus (les recherches en cours sont annulées)"""
+        with self.lock:
+            game_ids = list(self.jobs)
+        for game_id in game_ids:
+            self.cancel(game_id)
+        if self._executor is not None:
+            if self._splits is not None:
+                # Recherches annulées ci-dessus : les threads s'arrêtent au prochain contrôle du temps, avant l'arrêt des processus
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                for search in self._split_searches:
+                    search.close()
+                self._split_searches = []
+            else:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._manager.shutdown()
+            self._executor = None
+            self._manager = None
+            self._splits = None
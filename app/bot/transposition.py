@@ -0,0 +1,137 @@
+# ---------------------------------------------------------------------
+# Table de transposition : résultats de recherche indexés par la clé de Zobrist
+#----------------------------------------------------------------------
+
+from array import array
+from typing import NamedTuple, Optional
+
+# Type de borne de la valeur stockée
+EXACT = 0 # Valeur exacte
+LOWER = 1 # La valeur réelle est supérieure ou égale (coupure beta)
+UPPER = 2 # La valeur réelle est inférieure ou égale (aucun coup n'a dépassé alpha)
+
+DEFAULT_SIZE_MB = 16
+# Octets par entrée : clé (8) + valeur (8) + coup (4) + profondeur, borne et âge (3)
+ENTRY_SIZE = 23
+EMPTY = -1 # Profondeur d'une entrée vide
+
+class TTEntry(NamedTuple):
+    key:int
+    depth:int
+    value:float
+    bound:int
+    move:int # Meilleur coup encodé (`compact.encode_move`), 0 si aucun
+
+class TTStats(NamedTuple):
+    hits:int # Clé trouvée
+    misses:int # Clé absente
+    collisions:int # Clé absente et case occupée par une autre position
+    stores:int
+    replacements:int # Entrée d'une autre position écrasée
+    rejected:int # Ecriture refusée car l'entrée présente est plus profonde
+    used:int # Nombre de cases occupées
+    size:int # Nombre de cases
+
+    @property
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    @property
+    def fill_rate(self) -> float:
+        return self.used / self.size if self.size else 0.0
+
+class TranspositionTable:
+    """
+    Table de taille fixe (puissance de 2), une entrée par case, stockée dans des `array` pour
+    que la mémoire utilisée corresponde à la taille demandée.
+
+    Remplacement : une entrée est écrasée si elle est vide, de la même position, d'une recherche
+    précédente, ou moins profonde que la nouvelle.
+    """
+    def __init__(self, size_mb:float = DEFAULT_SIZE_MB):
+        """
+        Parameters
+        ----------
+        size_mb:float
+            Mémoire maximale de la table en Mo
+        """
+        slots = max(1, int(size_mb * 1024 * 1024) // ENTRY_SIZE)
+        self.size = 1 << (slots.bit_length() - 1) # Plus grande puissance de 2 qui tient dans la mémoire donnée
+        self.mask = self.size - 1
+        self.keys = array("Q", [0]) * self.size
+        self.values = array("d", [0.0]) * self.size
+        self.moves = array("I", [0]) * self.size
+        self.depths = array("b", [EMPTY]) * self.size
+        self.bounds = array("b", [EXACT]) * self.size
+        self.ages = array("B", [0]) * self.size
+        self.age = 0
+        self.reset_stats()
+        self.used = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejected = 0
+
+    def new_search(self):
+        """A appeler avant chaque nouvelle recherche : les entrées plus anciennes deviennent remplaçables"""
+        self.age = (self.age + 1) % 256
+
+    def clear(self):
+        """Vide la table"""
+        self.depths = array("b", [EMPTY]) * self.size
+        self.used = 0
+        self.reset_stats()
+
+    def probe(self, key:int) -> Optional[TTEntry]:
+        """Retourne l'entrée de la position si elle est dans la table"""
+        i = key & self.mask
+        depth = self.depths[i]
+        if depth != EMPTY and self.keys[i] == key:
+            self.hits += 1
+            return TTEntry(key, depth, self.values[i], self.bounds[i], self.moves[i])
+
+        self.misses += 1
+        if depth != EMPTY:
+            self.collisions += 1
+        return None
+
+    def store(self, key:int, depth:int, value:float, bound:int, move:int = 0):
+        """
+        Enregistre le résultat de la recherche d'une position
+
+        Parameters
+        ----------
+        depth:int
+            Profondeur restante de la recherche qui a donné `value`
+        bound:int
+            `EXACT`, `LOWER` ou `UPPER`
+        move:int
+            Meilleur coup encodé
+        """
+        i = key & self.mask
+        old_depth = self.depths[i]
+        if old_depth == EMPTY:
+            self.used += 1
+        elif self.keys[i] != key:
+            if self.ages[i] == self.age and old_depth > depth:
+                self.rejected += 1
+                return
+            self.replacements += 1
+        elif not move:
+            move = self.moves[i] # Garde le meilleur coup connu de la position
+
+        self.keys[i] = key
+        self.depths[i] = min(depth, 127)
+        self.values[i] = value
+        self.bounds[i] = bound
+        self.moves[i] = move
+        self.ages[i] = self.age
+        self.stores += 1
+
+    def stats(self) -> TTStats:
+        return TTStats(self.hits, self.misses, self.collisions, self.stores, self.replacements, self.rejected, self.used, self.size)
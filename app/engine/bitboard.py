@@ -0,0 +1,424 @@
+# ---------------------------------------------------------------------
+# Générateur de coups par bitboards : un entier de 64 bits par type de
+# pièce et par couleur, tables d'attaques précalculées
+#----------------------------------------------------------------------
+
+from typing import NamedTuple, Optional
+
+from app.engine.utils import WHITE, BLACK
+from app.engine.utils import CheckMate, Pat, Normal, Check
+from app.engine.compact import CompactBoard, encode, castling_rights, square, opponent, PIECE_VALUES
+from app.engine.compact import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, EN_PASSANT, CASTLE, CASTLING_MASK
+from app.engine.compact import WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, START_FEN
+
+# Le bit `y * 8 + x` correspond à la case `Position(x, y)` (bit 0 -> a8, bit 63 -> h1)
+FULL = (1 << 64) - 1
+BB_SQUARES = [1 << sq for sq in range(64)]
+RANKS = [0xFF << (8 * y) for y in range(8)] # RANKS[y] : ligne y du repère `Position`
+
+COLOR_INDEX = {WHITE: 0, BLACK: 1}
+
+class AttackSummary(NamedTuple):
+    """Termes d'évaluation tirés des coups légaux des deux couleurs (indice 0 : blancs, 1 : noirs)"""
+    mobility:tuple[int, int] # Coups vers une case vide
+    threats:tuple[int, int] # Valeur des pièces de la couleur attaquées par l'adversaire
+    state:str # Même résultat que `get_state`
+
+def _leaper_attacks(sq:int, deltas:list[tuple[int, int]]) -> int:
+    """Cases atteintes en un saut depuis `sq`"""
+    x, y = sq % 8, sq // 8
+    attacks = 0
+    for dx, dy in deltas:
+        if 0 <= x + dx < 8 and 0 <= y + dy < 8:
+            attacks |= BB_SQUARES[(y + dy) * 8 + x + dx]
+    return attacks
+
+KNIGHT_ATTACKS = [_leaper_attacks(sq, [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]) for sq in range(64)]
+KING_ATTACKS = [_leaper_attacks(sq, [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]) for sq in range(64)]
+PAWN_ATTACKS = [
+    [_leaper_attacks(sq, [(-1, -1), (1, -1)]) for sq in range(64)], # Pions blancs (montent vers y = 0)
+    [_leaper_attacks(sq, [(-1, 1), (1, 1)]) for sq in range(64)],   # Pions noirs
+]
+
+# Rayons des pièces glissantes, sans la case de départ
+NORTH, SOUTH, EAST, WEST, NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = range(8)
+DIRECTIONS = [(0, -1), (0, 1), (1, 0), (-1, 0), (1, -1), (-1, -1), (1, 1), (-1, 1)]
+POSITIVE = [dy * 8 + dx > 0 for dx, dy in DIRECTIONS] # Le rayon va vers les bits de poids fort
+ROOK_DIRECTIONS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+def _ray(sq:int, dx:int, dy:int) -> int:
+    x, y = sq % 8 + dx, sq // 8 + dy
+    ray = 0
+    while 0 <= x < 8 and 0 <= y < 8:
+        ray |= BB_SQUARES[y * 8 + x]
+        x += dx
+        y += dy
+    return ray
+
+RAYS = [[_ray(sq, dx, dy) for sq in range(64)] for dx, dy in DIRECTIONS]
+
+def _slider_attacks(sq:int, occupied:int, directions:tuple[int, ...]) -> int:
+    """Attaques d'une pièce glissante : chaque rayon est coupé après le premier bloqueur"""
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE[direction]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+def rook_attacks(sq:int, occupied:int) -> int:
+    return _slider_attacks(sq, occupied, ROOK_DIRECTIONS)
+
+def bishop_attacks(sq:int, occupied:int) -> int:
+    return _slider_attacks(sq, occupied, BISHOP_DIRECTIONS)
+
+# Attaques sur échiquier vide, utilisées pour trouver les pièces qui clouent
+EMPTY_ROOK_ATTACKS = [rook_attacks(sq, 0) for sq in range(64)]
+EMPTY_BISHOP_ATTACKS = [bishop_attacks(sq, 0) for sq in range(64)]
+
+# BETWEEN[a][b] : cases strictement entre a et b si elles sont alignées, sinon 0
+BETWEEN = [[0] * 64 for _ in range(64)]
+for _sq in range(64):
+    for _direction in range(8):
+        _ray_bb = RAYS[_direction][_sq]
+        _bb = _ray_bb
+        while _bb:
+            _low = _bb & -_bb
+            _target = _low.bit_length() - 1
+            BETWEEN[_sq][_target] = _ray_bb & ~RAYS[_direction][_target] & ~_low
+            _bb ^= _low
+
+def squares_of(bb:int):
+    """Itère sur les indices des bits à 1"""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+class Bitboards:
+    """
+    Position sous forme de bitboards.
+    `pieces[color * 6 + code - 1]` contient les cases des pièces de type `code` (voir app.engine.compact)
+    """
+    __slots__ = ("pieces", "occupancy", "turn", "castling", "en_passant")
+
+    def __init__(self, pieces:Optional[list[int]] = None, turn:str = WHITE, castling:int = 0, en_passant:int = -1):
+        self.pieces = pieces if pieces is not None else [0] * 12
+        self.occupancy = [
+            self.pieces[0] | self.pieces[1] | self.pieces[2] | self.pieces[3] | self.pieces[4] | self.pieces[5],
+            self.pieces[6] | self.pieces[7] | self.pieces[8] | self.pieces[9] | self.pieces[10] | self.pieces[11],
+        ]
+        self.turn = turn
+        self.castling = castling
+        self.en_passant = en_passant
+
+    @classmethod
+    def from_compact(cls, compact:CompactBoard) -> 'Bitboards':
+        pieces = [0] * 12
+        for sq, code in enumerate(compact.squares):
+            if code > 0:
+                pieces[code - 1] |= BB_SQUARES[sq]
+            elif code < 0:
+                pieces[5 - code] |= BB_SQUARES[sq]
+        return cls(pieces, compact.turn, compact.castling, compact.en_passant)
+
+    @classmethod
+    def from_fen(cls, fen:str = START_FEN) -> 'Bitboards':
+        return cls.from_compact(CompactBoard.from_fen(fen))
+
+    @classmethod
+    def from_board(cls, board:list[list], turn:str = WHITE, castling:Optional[int] = None, en_passant:int = -1) -> 'Bitboards':
+        """Construit les bitboards depuis une matrice 8x8 d'objets `Piece`"""
+        pieces = [0] * 12
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    pieces[(0 if piece.color == WHITE else 6) + piece.CODE - 1] |= BB_SQUARES[y * 8 + x]
+        if castling is None:
+            castling = castling_rights(board)
+        return cls(pieces, turn, castling, en_passant)
+
+    @classmethod
+    def from_chessboard(cls, chessboard, board:Optional[list[list]] = None) -> 'Bitboards':
+        """Construit les bitboards depuis un `ChessBoard` (trait, roques et prise en passant compris)"""
+        if board is None:
+            board = chessboard.board
+        en_passant = chessboard.en_passant
+        return cls.from_board(board, chessboard.turn, None, square(en_passant) if en_passant is not None else -1)
+
+    def copy(self) -> 'Bitboards':
+        return Bitboards(self.pieces[:], self.turn, self.castling, self.en_passant)
+
+    def piece_at(self, sq:int) -> int:
+        """Retourne le code signé de la pièce sur la case (0 si vide)"""
+        bit = BB_SQUARES[sq]
+        for index, bb in enumerate(self.pieces):
+            if bb & bit:
+                return index + 1 if index < 6 else 5 - index
+        return 0
+
+    # -----------------------------------------------------------------------
+    # Attaques
+    # -----------------------------------------------------------------------
+
+    def attackers_to(self, sq:int, by_color:str, occupied:Optional[int] = None) -> int:
+        """Retourne le bitboard des pièces de `by_color` qui attaquent la case"""
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        by = COLOR_INDEX[by_color]
+        p = self.pieces
+        o = by * 6
+        queens = p[o + QUEEN - 1]
+        return (PAWN_ATTACKS[1 - by][sq] & p[o + PAWN - 1]) \
+            | (KNIGHT_ATTACKS[sq] & p[o + KNIGHT - 1]) \
+            | (KING_ATTACKS[sq] & p[o + KING - 1]) \
+            | (bishop_attacks(sq, occupied) & (p[o + BISHOP - 1] | queens)) \
+            | (rook_attacks(sq, occupied) & (p[o + ROOK - 1] | queens))
+
+    def is_attacked(self, sq:int, by_color:str) -> bool:
+        return self.attackers_to(sq, by_color) != 0
+
+    def in_check(self, color:Optional[str] = None) -> bool:
+        """Regarde si un roi de la couleur donnée (ou des deux couleurs) est attaqué"""
+        colors = [WHITE, BLACK] if color is None else [color]
+        for c in colors:
+            for sq in squares_of(self.pieces[COLOR_INDEX[c] * 6 + KING - 1]):
+                if self.attackers_to(sq, opponent(c)):
+                    return True
+        return False
+
+    # -----------------------------------------------------------------------
+    # Génération de coups
+    # -----------------------------------------------------------------------
+
+    def pseudo_moves(self, color:Optional[str] = None) -> list[int]:
+        """Coups des pièces de la couleur donnée sans vérifier si le roi reste en échec (même encodage que app.engine.compact)"""
+        return self.generate(color, legal=False)
+
+    def legal_moves(self, color:Optional[str] = None, from_mask:int = FULL) -> list[int]:
+        """
+        Retourne les coups légaux de la couleur donnée
+
+        Parameters
+        ----------
+        from_mask:int
+            Bitboard des cases de départ à considérer (toutes par défaut)
+        """
+        return self.generate(color, True, from_mask)
+
+    def generate(self, color:Optional[str] = None, legal:bool = True, from_mask:int = FULL) -> list[int]:
+        """
+        Génère les coups de la couleur donnée.
+        En mode légal, les pièces qui font échec et les pièces clouées sont calculées une seule fois :
+        - en échec double seul le roi bouge
+        - en échec simple les autres pièces doivent prendre la pièce qui fait échec ou s'interposer
+        - une pièce clouée reste sur le rayon entre le roi et la pièce qui la cloue
+        - le roi ne va que sur des cases non attaquées
+        """
+        if color is None:
+            color = self.turn
+        enemy_color = opponent(color)
+        us = COLOR_INDEX[color]
+        p = self.pieces
+        o = us * 6
+        own = self.occupancy[us]
+        enemy = self.occupancy[1 - us]
+        occupied = own | enemy
+        not_own = ~own & FULL
+        kings = p[o + KING - 1]
+        moves = []
+
+        target_mask = FULL
+        pinned = 0
+        pin_rays = {}
+        checkers = 0
+        if legal:
+            if kings == 0 or kings & (kings - 1):
+                # Aucun roi ou plusieurs rois : chaque coup est joué puis vérifié
+                return [move for move in self.generate(color, False, from_mask) if not self.play(move).in_check(color)]
+
+            king_sq = kings.bit_length() - 1
+            checkers = self.attackers_to(king_sq, enemy_color, occupied)
+            if kings & from_mask:
+                without_king = occupied ^ kings # Le roi ne doit pas masquer les cases derrière lui
+                for target in squares_of(KING_ATTACKS[king_sq] & not_own):
+                    if not self.attackers_to(target, enemy_color, without_king):
+                        moves.append(king_sq | (target << 6))
+            if checkers & (checkers - 1):
+                return moves
+            if checkers:
+                target_mask = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+            pinned, pin_rays = self._pins(king_sq, us, occupied)
+        else:
+            for sq in squares_of(kings & from_mask):
+                for target in squares_of(KING_ATTACKS[sq] & not_own):
+                    moves.append(sq | (target << 6))
+
+        targets = not_own & target_mask
+        for sq in squares_of(p[o + KNIGHT - 1] & from_mask & ~pinned):
+            for target in squares_of(KNIGHT_ATTACKS[sq] & targets):
+                moves.append(sq | (target << 6))
+        queens = p[o + QUEEN - 1]
+        for pieces, attacks in ((p[o + BISHOP - 1] | queens, bishop_attacks), (p[o + ROOK - 1] | queens, rook_attacks)):
+            for sq in squares_of(pieces & from_mask):
+                allowed = targets & pin_rays[sq] if pinned & BB_SQUARES[sq] else targets
+                for target in squares_of(attacks(sq, occupied) & allowed):
+                    moves.append(sq | (target << 6))
+
+        self._pawn_moves(color, occupied, enemy, from_mask, target_mask, pinned, pin_rays, moves)
+        if self.en_passant != -1 and color == self.turn:
+            # Prise en passant : deux pièces quittent la rangée, le coup est vérifié en le jouant
+            for sq in squares_of(PAWN_ATTACKS[1 - us][self.en_passant] & p[o + PAWN - 1] & from_mask):
+                move = encode(sq, self.en_passant, flag=EN_PASSANT)
+                if not legal or not self.play(move).in_check(color):
+                    moves.append(move)
+        if not checkers and kings & from_mask:
+            self._castling_moves(color, occupied, moves)
+        return moves
+
+    def _pins(self, king_sq:int, us:int, occupied:int) -> tuple[int, dict[int, int]]:
+        """Retourne le bitboard des pièces clouées et pour chacune les cases où elle peut aller"""
+        p = self.pieces
+        t = (1 - us) * 6
+        queens = p[t + QUEEN - 1]
+        snipers = (EMPTY_ROOK_ATTACKS[king_sq] & (p[t + ROOK - 1] | queens)) \
+            | (EMPTY_BISHOP_ATTACKS[king_sq] & (p[t + BISHOP - 1] | queens))
+        own = self.occupancy[us]
+        pinned = 0
+        pin_rays = {}
+        for sniper in squares_of(snipers):
+            between = BETWEEN[king_sq][sniper]
+            blockers = between & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+                pin_rays[blockers.bit_length() - 1] = between | BB_SQUARES[sniper]
+        return pinned, pin_rays
+
+    def _pawn_moves(self, color:str, occupied:int, enemy:int, from_mask:int, target_mask:int, pinned:int, pin_rays:dict[int, int], moves:list[int]) -> None:
+        us = COLOR_INDEX[color]
+        pawns = self.pieces[us * 6 + PAWN - 1] & from_mask
+        if us == 0:
+            step, start_rank, last_rank = -8, RANKS[6], RANKS[0]
+        else:
+            step, start_rank, last_rank = 8, RANKS[1], RANKS[7]
+        attacks = PAWN_ATTACKS[us]
+
+        for sq in squares_of(pawns):
+            bit = BB_SQUARES[sq]
+            allowed = target_mask & pin_rays[sq] if pinned & bit else target_mask
+            targets = attacks[sq] & enemy
+            front = sq + step
+            if 0 <= front < 64 and not occupied & BB_SQUARES[front]:
+                targets |= BB_SQUARES[front]
+                if bit & start_rank and not occupied & BB_SQUARES[front + step]:
+                    targets |= BB_SQUARES[front + step]
+            targets &= allowed
+
+            for target in squares_of(targets):
+                if BB_SQUARES[target] & last_rank:
+                    for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                        moves.append(encode(sq, target, promotion))
+                else:
+                    moves.append(sq | (target << 6))
+
+    def _castling_moves(self, color:str, occupied:int, moves:list[int]) -> None:
+        if color == WHITE:
+            king_sq, kingside, queenside, o = 60, WHITE_KINGSIDE, WHITE_QUEENSIDE, 0
+        else:
+            king_sq, kingside, queenside, o = 4, BLACK_KINGSIDE, BLACK_QUEENSIDE, 6
+        if not self.castling & (kingside | queenside) or not self.pieces[o + KING - 1] & BB_SQUARES[king_sq]:
+            return
+        rooks = self.pieces[o + ROOK - 1]
+        enemy = opponent(color)
+
+        if self.castling & kingside and rooks & BB_SQUARES[king_sq + 3] \
+                and not occupied & (BB_SQUARES[king_sq + 1] | BB_SQUARES[king_sq + 2]) \
+                and not any(self.attackers_to(s, enemy, occupied) for s in (king_sq, king_sq + 1, king_sq + 2)):
+            moves.append(encode(king_sq, king_sq + 2, flag=CASTLE))
+        if self.castling & queenside and rooks & BB_SQUARES[king_sq - 4] \
+                and not occupied & (BB_SQUARES[king_sq - 1] | BB_SQUARES[king_sq - 2] | BB_SQUARES[king_sq - 3]) \
+                and not any(self.attackers_to(s, enemy, occupied) for s in (king_sq, king_sq - 1, king_sq - 2)):
+            moves.append(encode(king_sq, king_sq - 2, flag=CASTLE))
+
+    def get_state(self) -> str:
+        """Retourne le status de la partie (même résultat que `ChessBoard.get_state`)"""
+        for color in [WHITE, BLACK]:
+            other_color = opponent(color)
+            if self.in_check(color):
+                if not self.legal_moves(color):
+                    return CheckMate(other_color)
+                return Check(other_color)
+            elif not self.legal_moves(color):
+                return Pat(other_color)
+        return Normal()
+
+    def summary(self) -> AttackSummary:
+        """Mobilité, menaces et état de la partie avec une seule génération des coups de chaque couleur"""
+        occupied = self.occupancy[0] | self.occupancy[1]
+        moves = (self.legal_moves(WHITE), self.legal_moves(BLACK))
+        mobility = tuple(sum(1 for move in color_moves if not occupied >> ((move >> 6) & 63) & 1) for color_moves in moves)
+
+        threats = [0, 0]
+        for attacker in (0, 1):
+            victims = self.occupancy[1 - attacker]
+            for move in moves[attacker]:
+                end = (move >> 6) & 63
+                if victims >> end & 1:
+                    threats[1 - attacker] += PIECE_VALUES[abs(self.piece_at(end))]
+
+        state = Normal()
+        for color, color_moves in zip((WHITE, BLACK), moves):
+            other_color = opponent(color)
+            if self.in_check(color):
+                state = Check(other_color) if color_moves else CheckMate(other_color)
+                break
+            elif not color_moves:
+                state = Pat(other_color)
+                break
+        return AttackSummary(mobility, tuple(threats), state)
+
+    def play(self, move:int) -> 'Bitboards':
+        """Retourne une nouvelle position avec le coup joué, sans vérification préalable"""
+        start = move & 63
+        end = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flag = move >> 15
+
+        child = self.copy()
+        p = child.pieces
+        start_bit = BB_SQUARES[start]
+        end_bit = BB_SQUARES[end]
+        mover = next(index for index in range(12) if p[index] & start_bit)
+        o = 0 if mover < 6 else 6
+
+        for index in range(6 - o, 12 - o):
+            p[index] &= ~end_bit
+        p[mover] ^= start_bit | end_bit
+
+        if flag == EN_PASSANT:
+            p[6 - o + PAWN - 1] &= ~BB_SQUARES[end + (8 if o == 0 else -8)]
+        elif flag == CASTLE:
+            rook_start, rook_end = (start + 3, end - 1) if end > start else (start - 4, end + 1)
+            p[o + ROOK - 1] ^= BB_SQUARES[rook_start] | BB_SQUARES[rook_end]
+        if promotion:
+            p[mover] ^= end_bit
+            p[o + promotion - 1] |= end_bit
+
+        child.occupancy = [
+            p[0] | p[1] | p[2] | p[3] | p[4] | p[5],
+            p[6] | p[7] | p[8] | p[9] | p[10] | p[11],
+        ]
+        child.castling &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        if mover - o == PAWN - 1 and abs(end - start) == 16:
+            child.en_passant = (start + end) // 2
+        else:
+            child.en_passant = -1
+        child.turn = opponent(self.turn)
+        return child
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Union, NamedTuple
 import copy
 import logging
 
@@ -6,6 +6,9 @@ import app.utils.logger_config
 from app.engine.pieces import *
 from app.engine.utils import Position, Piece, WHITE, BLACK, Move, SpecialMove
 from app.engine.utils import CheckMate, Pat, Normal, Check
+from app.engine.compact import CompactBoard, castling_rights, decode_move, move_to_uci, square, SQUARE_POSITIONS, START_FEN
+from app.engine.bitboard import Bitboards, AttackSummary, BB_SQUARES
+from app.engine import zobrist, psqt
 from app.utils.constants import CHECKMATE, CHECK, NONE, PAT
 
 logger = logging.getLogger(app.utils.logger_config.APP_NAME)
@@ -50,8 +53,10 @@ def start_board() -> list[list]:
 
     return board
 
-def board_to_fen(board:list[list[Optional[Piece]]]) -> str:
-    """Retourne la notation fen de l'échiquier"""
+def board_to_fen(board:Union[list[list[Optional[Piece]]], CompactBoard]) -> str:
+    """Retourne la notation fen de l'échiquier (placement des pièces)"""
+    if isinstance(board, CompactBoard):
+        return board.placement()
     fen = ""
 
     for y, row in enumerate(board):
@@ -70,17 +75,116 @@ def board_to_fen(board:list[list[Optional[Piece]]]) -> str:
         fen += fen_row
     return fen
 
+class UndoInfo(NamedTuple):
+    """Informations nécessaires à `ChessBoard.unmake_move` pour annuler un coup"""
+    move:Move
+    captured:Optional[Piece] # Pièce capturée
+    captured_pos:Optional[Position] # Position de la pièce capturée (différente de l'arrivée en cas de prise en passant)
+    moved:tuple # Couples (pièce déplacée, valeur de `has_moved` avant le coup)
+    promoted:Optional[Piece] # Pion remplacé lors d'une promotion
+    halfmove_clock:int
+    fullmove_number:int
+    hash:Optional[int] = None # Clé de Zobrist avant le coup
+    terms:Optional[tuple] = None # Termes d'évaluation incrémentaux avant le coup
+
 class ChessBoard:
     """Contient les positions des pièces"""
     PIECES = [cls for cls in Piece.__subclasses__()]
 
     def __init__(self, board:Optional[list] = None):
+        self._hash = None
+        self._terms = None
+        self._summary = None
         if board is None:
             self.board = start_board()
         else:
             self.board = board
         self.moves = [] # Liste de coups joués
-        self.turn = WHITE
+        self.history = [] # Liste de `UndoInfo`, un par coup joué avec `make_move`
+        self._first_turn = WHITE # Trait avant le premier coup de `self.moves`
+        self._start_en_passant = None # Case de prise en passant avant le premier coup (position chargée depuis un FEN)
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+    @property
+    def turn(self) -> str:
+        """Couleur qui doit jouer"""
+        if len(self.moves) % 2 == 0:
+            return self._first_turn
+        return WHITE if self._first_turn == BLACK else BLACK
+
+    @turn.setter
+    def turn(self, color:str):
+        if len(self.moves) % 2 == 0:
+            self._first_turn = color
+        else:
+            self._first_turn = WHITE if color == BLACK else BLACK
+        self._hash = None
+
+    @property
+    def board(self) -> list[list[Optional[Piece]]]:
+        return self._board
+
+    @board.setter
+    def board(self, board:list[list[Optional[Piece]]]):
+        self._board = board
+        self._hash = None
+        self._terms = None
+        self._summary = None
+
+    @property
+    def hash(self) -> int:
+        """
+        Clé de Zobrist (64 bits) de la position : pièces, trait, droits de roque et colonne de prise en passant.
+        Calculée au premier accès puis mise à jour par `make_move` / `unmake_move`.
+        Les modifications directes des cases de `self.board` ne sont pas suivies.
+        """
+        if self._hash is None or self._hash_moves != len(self.moves):
+            self._hash = zobrist.hash_board(self.board, self.turn, castling_rights(self.board), self.en_passant)
+            self._hash_moves = len(self.moves)
+        return self._hash
+
+    @property
+    def en_passant(self) -> Optional[Position]:
+        """Case sur laquelle une prise en passant est possible, sinon None"""
+        if not self.moves:
+            return self._start_en_passant
+        last_move = self.moves[-1]
+        if not isinstance(last_move, Move) or not isinstance(last_move.piece, Pawn):
+            return None
+        if abs(last_move.start_pos.y - last_move.end_pos.y) != 2:
+            return None
+        return Position(last_move.end_pos.x, (last_move.start_pos.y + last_move.end_pos.y) // 2)
+
+    @classmethod
+    def from_compact(cls, compact:CompactBoard) -> 'ChessBoard':
+        """Construit un échiquier depuis une position compacte"""
+        chessboard = cls(compact.to_board())
+        chessboard._first_turn = compact.turn
+        if compact.en_passant != -1:
+            chessboard._start_en_passant = SQUARE_POSITIONS[compact.en_passant]
+        chessboard.halfmove_clock = compact.halfmove
+        chessboard.fullmove_number = compact.fullmove
+        return chessboard
+
+    @classmethod
+    def from_fen(cls, fen:str = START_FEN) -> 'ChessBoard':
+        """Construit un échiquier depuis une notation FEN"""
+        return cls.from_compact(CompactBoard.from_fen(fen))
+
+    def to_compact(self, board:Optional[list[list[Optional[Piece]]]] = None) -> CompactBoard:
+        """Retourne la position sous forme compacte (64 codes de pièces + trait, roques et prise en passant)"""
+        if board is None:
+            board = self.board
+        en_passant = self.en_passant
+        compact = CompactBoard.from_board(board, self.turn, castling_rights(board), square(en_passant) if en_passant is not None else -1)
+        compact.halfmove = self.halfmove_clock
+        compact.fullmove = self.fullmove_number
+        return compact
+
+    def to_fen(self) -> str:
+        """Retourne la notation FEN complète de la position"""
+        return self.to_compact().to_fen()
 
     def move(self, move:Move, board:Optional[list[list]] = None) -> Optional[list[list]]:
         """
@@ -99,22 +203,161 @@ class ChessBoard:
         logger.debug(f"Coups trouvé : {move}")
         if isinstance(move, Move):
             logger.debug(f"{move} est une instance de Move")
-            board = self.get_board(move, board)
             if is_self_board:
-                logger.debug("Ajout du coups à self.moves")
-                self.moves.append(move)
-                self.turn = WHITE if len(self.moves) % 2 == 0 else BLACK
-        else:
-            return 1
+                logger.debug("Coup joué sur self.board")
+                self.make_move(move)
+                return self.board
+            return self.get_board(move, board)
+        
+        return 1
 
-        if is_self_board:
-            logger.debug("Echiquier de la classe remplacé")
-            self.board = board
+    def eval_terms(self) -> list[int]:
+        """
+        Termes d'évaluation de `self.board` : [matériel blanc, matériel noir, bonus pièce-case blanc, bonus pièce-case noir].
+        Calculés au premier accès puis mis à jour par `make_move` / `unmake_move`.
+        """
+        if self._terms is None or self._terms_moves != len(self.moves):
+            terms = [0, 0, 0, 0]
+            for y, row in enumerate(self.board):
+                for x, piece in enumerate(row):
+                    if piece is not None:
+                        black = piece.color != WHITE
+                        terms[black] += piece.value
+                        terms[2 + black] += psqt.square_value(piece.CODE, not black, y * 8 + x)
+            self._terms = terms
+            self._terms_moves = len(self.moves)
+        return self._terms
+
+    def make_move(self, move:Move) -> UndoInfo:
+        """
+        Joue le coup sur `self.board` sans vérification et sans copie de l'échiquier
+
+        Parameters
+        ----------
+        move:Move
+            Coup valide (ou coup spécial) retourné par `get_moves`
+
+        Returns
+        -------
+        UndoInfo : à donner à `unmake_move` pour annuler le coup
+        """
+        board = self.board
+        halfmove_clock, fullmove_number = self.halfmove_clock, self.fullmove_number
+        captured = None
+        captured_pos = None
+        promoted = None
+
+        previous_hash = self.hash if self._hash is not None else None
+        if previous_hash is not None:
+            key = previous_hash ^ zobrist.CASTLING_KEYS[castling_rights(board)] ^ zobrist.en_passant_key(board, self.en_passant, self.turn)
+        terms = self.eval_terms() if self._terms is not None else None
+        previous_terms = tuple(terms) if terms is not None else None
+        changes = [] # (pièce, position, +1 si posée / -1 si retirée) pour la mise à jour de la clé et des termes
+
+        if isinstance(move, Roque):
+            moved = []
+            for piece_move in (move.king_move, move.rook_move):
+                start, end = piece_move.start_pos, piece_move.end_pos
+                piece = board[start.y][start.x]
+                moved.append((piece, piece.has_moved))
+                board[start.y][start.x] = None
+                board[end.y][end.x] = piece
+                piece.has_moved = True
+                changes.append((piece, start, -1))
+                changes.append((piece, end, 1))
+            moved = tuple(moved)
+            self.halfmove_clock += 1
+        else:
+            start, end = move.start_pos, move.end_pos
+            piece = board[start.y][start.x]
+            captured_pos = move.captured_pawn if isinstance(move, EnPassant) else end
+            captured = board[captured_pos.y][captured_pos.x]
+            board[captured_pos.y][captured_pos.x] = None
+            board[start.y][start.x] = None
+            board[end.y][end.x] = piece
+            moved = ((piece, piece.has_moved),)
+            piece.has_moved = True
+
+            if isinstance(move, Promotion):
+                promoted = piece
+                new_piece = move.new_piece(piece.color, Position(end.x, end.y))
+                new_piece.has_moved = True
+                board[end.y][end.x] = new_piece
+
+            changes.append((piece, start, -1))
+            changes.append((board[end.y][end.x], end, 1))
+            if captured is not None:
+                changes.append((captured, captured_pos, -1))
+
+            if isinstance(piece, Pawn) or captured is not None:
+                self.halfmove_clock = 0
+            else:
+                self.halfmove_clock += 1
+
+        for piece, pos, sign in changes:
+            if previous_hash is not None:
+                key ^= zobrist.piece_key(piece, pos)
+            if terms is not None:
+                black = piece.color != WHITE
+                terms[black] += sign * piece.value
+                terms[2 + black] += sign * psqt.piece_value(piece, pos)
+
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.moves.append(move)
+        if terms is not None:
+            self._terms_moves = len(self.moves)
+
+        if previous_hash is not None:
+            key ^= zobrist.SIDE_KEY ^ zobrist.CASTLING_KEYS[castling_rights(board)] ^ zobrist.en_passant_key(board, self.en_passant, self.turn)
+            self._hash = key
+            self._hash_moves = len(self.moves)
+
+        undo = UndoInfo(move, captured, captured_pos, moved, promoted, halfmove_clock, fullmove_number, previous_hash, previous_terms)
+        self.history.append(undo)
+        return undo
+
+    def unmake_move(self, undo:Optional[UndoInfo] = None) -> None:
+        """
+        Annule un coup joué avec `make_move` : pièces capturées, promotions, roques et `has_moved` sont restaurés
 
-        return board
+        Parameters
+        ----------
+        undo:UndoInfo
+            Retour de `make_move` pour le dernier coup joué, si non spécifié le dernier coup de `self.history`
+        """
+        if undo is None:
+            undo = self.history[-1]
+        self.history.pop()
+        self.moves.pop()
+        board = self.board
+        move = undo.move
+
+        if isinstance(move, Roque):
+            for piece_move in (move.king_move, move.rook_move):
+                start, end = piece_move.start_pos, piece_move.end_pos
+                board[start.y][start.x] = board[end.y][end.x]
+                board[end.y][end.x] = None
+        else:
+            start, end = move.start_pos, move.end_pos
+            board[start.y][start.x] = undo.promoted if undo.promoted is not None else board[end.y][end.x]
+            board[end.y][end.x] = None
+            if undo.captured is not None:
+                board[undo.captured_pos.y][undo.captured_pos.x] = undo.captured
+
+        for piece, has_moved in undo.moved:
+            piece.has_moved = has_moved
+        self.halfmove_clock = undo.halfmove_clock
+        self.fullmove_number = undo.fullmove_number
+        self._hash = undo.hash
+        self._hash_moves = len(self.moves)
+        self._terms = list(undo.terms) if undo.terms is not None else None
+        self._terms_moves = len(self.moves)
 
     def valid_move(self, move:Move, board:Optional[list]=None, turn=True):
         """Vérifie si un coup peut être joué à partir des règles de mouvements dans les classes des pièces"""
+        if isinstance(move, Roque): # Roque déjà construit (coup du bot, journal) : cherché comme un coup du roi
+            move = Move(move.king_move.piece, move.king_move.start_pos, move.pos)
         if not (8 > move.start_pos.x >= 0):
             return False
         if not (8 > move.start_pos.y >= 0):
@@ -144,26 +387,23 @@ class ChessBoard:
                 return False
         
         if turn:
-            turn = WHITE if len(self.moves) % 2 == 0 else BLACK
-            if board[move.start_pos.y][move.start_pos.x].color != turn:
+            if board[move.start_pos.y][move.start_pos.x].color != self.turn:
                 logger.info("Mauvais tours")
                 return False
         
-        moves = start_piece.get_moves(move.start_pos, board) + start_piece.special_moves(move.start_pos, self)
+        # Seuls les coups légaux sont générés : pas besoin de jouer le coup pour vérifier l'échec
+        moves = self.get_moves(move.start_pos, board, turn=False)
         for piece_move in moves:
-            if piece_move.pos == move.pos:
-                 move = piece_move
-                 break
-        else:
-            logger.info(f"Coups non trouvé dans {moves}")
-            return False
-        
-        new_board = self.get_board(move, board)
-        if self.is_check(color=start_piece.color, board=new_board):
-            logger.info("Echecs trouvé")
-            return False
+            if piece_move.pos != move.pos:
+                continue
+            if isinstance(piece_move, Promotion):
+                new_piece = move.new_piece if isinstance(move, Promotion) else Pawn.NEW_PIECE_TYPE
+                if piece_move.new_piece is not new_piece:
+                    continue
+            return piece_move
 
-        return move
+        logger.info(f"Coups non trouvé dans {moves}")
+        return False
     
     def get_attackers(self, pos:Position, board:Optional[list] = None) -> list[Piece]:
         """Retourne les pièces qui attaquent la pièce à la position donnée"""
@@ -203,12 +443,7 @@ class ChessBoard:
         if board is None:
             board = self.board # Passage par référence
 
-        kings = self.find_pieces(King, color, board)
-
-        for pos_king in kings:
-            if len(self.get_attackers(pos_king, board)) > 0:
-                return True
-        return False
+        return Bitboards.from_board(board, castling=0).in_check(color)
 
     def find_pieces(self, piece_type: Piece, color: Optional[str] = None, board: Optional[list[list]] = None) -> list[Position]:
         """Retourne une liste des positions des pièces qui remplissent les conditions données"""  
@@ -226,36 +461,15 @@ class ChessBoard:
     
     def is_checkmate(self, color:str = None, board: Optional[list[list]] = None) -> bool:
         """Vérifie si le roi de la couleur donnée est échec et mat"""
-        if board is None:
-            board = copy.deepcopy(self.board)
+        bitboards = self.bitboards(board)
+        colors = [WHITE, BLACK] if color is None else [color]
 
-        if not self.is_check(color, board):
-            return False
+        # Le roi est en échec et aucun coup légal (déplacement du roi, prise ou interposition) n'existe
+        return any(bitboards.in_check(c) and not bitboards.legal_moves(c) for c in colors)
 
-        # Vérifie que le roi ne peut plus bouger
-        for king_pos in self.find_pieces(King, color, board):
-            if len(self.get_moves(king_pos, board)) != 0:
-                return False
-                
-        # Vérifie qu'une pièce ne peut pas s'interposer
-        for king_pos in self.find_pieces(King, color, board):
-            for distance in range(1, 9): # Regarde toutes les pièces en commençant par les plus proches du roi
-                for incr_y in range(-distance, distance+1):
-                    for incr_x in range(-distance, distance+1):
-                        if abs(incr_x) + abs(incr_y) == distance:
-                            x, y = king_pos.x + incr_x, king_pos.y + incr_y
-                            if not(0 <= x < 8) or not(0 <= y < 8):
-                                continue
-
-                            piece = board[y][x]
-                            if piece is None:
-                                continue
-                            elif piece.color != board[king_pos.y][king_pos.x].color:
-                                continue
-                            if len(self.get_moves(Position(x, y), board)) > 0:
-                                return False
-                                    
-        return True # Si le roi est en échec, qu'il ne peut pas bouger, qu'aucune pièce ne peut se mettre au travers : echec et mats
+    def bitboards(self, board:Optional[list[list[Optional[Piece]]]] = None) -> Bitboards:
+        """Retourne la position sous forme de bitboards (trait, roques et prise en passant compris)"""
+        return Bitboards.from_chessboard(self, board)
     
     def undo(self, n = 1):
         """
@@ -264,12 +478,18 @@ class ChessBoard:
         n:int Nombre de derniers coups à enlever
         """
         for _ in range(n):
-            if len(self.moves) > 0:
-                move = self.moves.pop()
-                self.board[move.end_pos.y][move.end_pos.x], self.board[move.start_pos.y][move.start_pos.x] = None, self.board[move.end_pos.y][move.end_pos.x]
+            if len(self.history) > 0:
+                self.unmake_move()
 
     def get_moves(self, start_pos:Position, board:Optional[list[list[Optional[Piece]]]] = None, turn=True) -> list[Move]:
-        """Retourne les coups possibles d'une pièce en vérifiant qu'il n'y ait pas d'échecs ou pas le bon tour"""
+        """
+        Retourne les coups légaux d'une pièce (coups spéciaux à la fin de la liste)
+
+        Parameters
+        ----------
+        turn:bool
+            Si True, ne retourne aucun coup si la pièce n'est pas de la couleur qui a le trait
+        """
         if board is None:
             board = self.board
         
@@ -277,29 +497,27 @@ class ChessBoard:
             return []
         
         piece = board[start_pos.y][start_pos.x]
-        moves = []
-        for move in piece.get_moves(start_pos, board):
-            logger.debug(f"Vérification du move {move} pour {piece} en {start_pos}")
-            if isinstance(self.valid_move(move, board, turn), Move):
-                moves.append(move)
-        moves.extend(piece.special_moves(start_pos, self))
+        if turn and piece.color != self.turn:
+            return []
+
+        bitboards = self.bitboards(board)
+        moves = [decode_move(board, move) for move in bitboards.legal_moves(piece.color, BB_SQUARES[square(start_pos)])]
+        moves.sort(key=lambda move: isinstance(move, SpecialMove))
         logger.debug(f"Coups possibles pour {piece} en {start_pos} : {moves}")
         return moves
     
     def get_all_actions(self, board_:Optional[list] = None) -> list[Move]:
-        """Retourne tous les coups possibles"""
-        if board_ is None:
-            board = self.board
-        else:
-            board = board_
-        actions = []
-
-        for piece_type in self.PIECES:
-            for piece_pos in self.find_pieces(piece_type, self.turn if board_ is None else None, board):
-                actions.extend(self.get_moves(piece_pos, board))
-
-        return actions
+        """Retourne tous les coups légaux de la couleur qui a le trait"""
+        board = self.board if board_ is None else board_
+        return [decode_move(board, move) for move in self.bitboards(board).legal_moves()]
     
+    def move_from_uci(self, uci:str) -> Optional[Move]:
+        """Retourne le coup légal correspondant à la notation UCI ('e2e4', 'e7e8q'), None s'il n'existe pas"""
+        for move in self.bitboards().legal_moves():
+            if move_to_uci(move) == uci:
+                return decode_move(self.board, move)
+        return None
+
     def get_start_position(self, end_position:Position, piece:Piece = None, column:int = None, row:int = None, board:list[list[Optional[Piece]]] = None) -> Position:
         """
         Cherche la position de départ avec la position d'arrivée et la pièce
@@ -365,36 +583,33 @@ class ChessBoard:
             return board
         
     def is_pat(self, board:Optional[list[list[Optional[Piece]]]] = None, color = None) -> bool:
-        """Renvoie True si l'échiquier renvoyé correspond à une situation de pat"""
-        if board is None:
-            board = self.board
-        
-        for piece_type in self.PIECES:
-            for piece_pos in self.find_pieces(piece_type, color, board):
-                if len(self.get_moves(piece_pos, turn=False)) > 0:
-                    return False
-        
-        return True
+        """Renvoie True si la couleur donnée (ou les deux couleurs) n'a aucun coup légal"""
+        bitboards = self.bitboards(board)
+        colors = [WHITE, BLACK] if color is None else [color]
+
+        return not any(bitboards.legal_moves(c) for c in colors)
     
     def get_state(self, board:Optional[list] = None) -> str:
         """Retourne le status de la partie"""
-        if board is None:
-            board = self.board
+        return self.attack_summary(board).state
 
-        for color in [WHITE, BLACK]:
-            other_color = WHITE if color == BLACK else WHITE
-            if self.is_check(color):
-                if self.is_checkmate(color):
-                    return CheckMate(other_color)
-                return Check(other_color)
-            elif self.is_pat(color=color):
-                return Pat(other_color)
-        return Normal()
+    def attack_summary(self, board:Optional[list[list[Optional[Piece]]]] = None) -> AttackSummary:
+        """
+        Mobilité, menaces et état de la partie calculés en une seule génération des coups des deux couleurs.
+        Le résultat de la position courante est gardé jusqu'au prochain coup.
+        """
+        if board is not None and board is not self.board:
+            return self.bitboards(board).summary()
+        key = self.hash
+        if self._summary is None or self._summary[0] != key:
+            self._summary = (key, self.bitboards().summary())
+        return self._summary[1]
     
     def get_material_value(self, color:Optional[str] = None, board:Optional[list[list[Optional[Piece]]]] = None) -> int:
         """Retourne la valeur des pièces de la couleur spécifiée ou des deux couleurs"""
-        if board is None:
-            board = self.board # Passage par référence
+        if board is None or board is self.board:
+            terms = self.eval_terms() # Tenu à jour coup par coup
+            return terms[0] + terms[1] if color is None else terms[color != WHITE]
         total = 0
 
         for row in board:
@@ -405,51 +620,44 @@ class ChessBoard:
                     total += piece.value
         
         return total
+
+    def get_position_value(self, color:Optional[str] = None, board:Optional[list[list[Optional[Piece]]]] = None) -> int:
+        """Retourne la somme des bonus pièce-case (`psqt`) de la couleur spécifiée ou des deux couleurs"""
+        if board is None or board is self.board:
+            terms = self.eval_terms()
+            return terms[2] + terms[3] if color is None else terms[2 + (color != WHITE)]
+        total = 0
+
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece is not None and (piece.color == color or color is None):
+                    total += psqt.square_value(piece.CODE, piece.color == WHITE, y * 8 + x)
+        return total
     
     def get_total_moves_score(self, color:str, board:Optional[list[list[Optional[Piece]]]] = None) -> int:
         """
         Retourne un score correspondant au contrôle exercé sur l'échiquier
         """
-        if board is None:
-            board = self.board
-        score = 0
-        
-        for piece_type in self.PIECES:
-            pieces = self.find_pieces(piece_type, color, board)
-            for piece_pos in pieces:
-                moves = self.get_moves(piece_pos, board, False)
-                for move in moves:
-                    target = board[move.pos.y][move.pos.x]
-                    if target is None:
-                        score += 1
-        
-        return score
+        return self.attack_summary(board).mobility[color != WHITE]
     
     def threat_score(self, color:str, board:Optional[list] = None) -> int:
         """Valeurs des pièces attaquées par la couleur adverse"""
-        if board is None:
-            board = self.board
-
-        score = 0
-        attacker_color = WHITE if color == BLACK else BLACK
-        
-        for piece_type in self.PIECES:
-            pieces = self.find_pieces(piece_type, attacker_color, board)
-            for piece_pos in pieces:
-                moves = self.get_moves(piece_pos, board, False)
-                for move in moves:
-                    target = board[move.pos.y][move.pos.x]
-                    if target is None:
-                        continue
-                    elif target.color == color:
-                        score += target.value
-        return score
+        return self.attack_summary(board).threats[color != WHITE]
     
     def clone(self) -> 'ChessBoard':
         """Retourne une copie de l'échiquier"""
-        new_chessboard = ChessBoard(copy.deepcopy(self.board))
-        new_chessboard.moves = copy.deepcopy(self.moves)
-        new_chessboard.turn = self.turn
+        board, moves, history = copy.deepcopy((self.board, self.moves, self.history)) # Une seule copie pour garder les mêmes pièces
+        new_chessboard = ChessBoard(board)
+        new_chessboard.moves = moves
+        new_chessboard.history = history
+        new_chessboard._first_turn = self._first_turn
+        new_chessboard._start_en_passant = self._start_en_passant
+        new_chessboard.halfmove_clock = self.halfmove_clock
+        new_chessboard.fullmove_number = self.fullmove_number
+        if self._hash is not None:
+            new_chessboard._hash, new_chessboard._hash_moves = self._hash, self._hash_moves
+        if self._terms is not None:
+            new_chessboard._terms, new_chessboard._terms_moves = self._terms[:], self._terms_moves
         return new_chessboard
 
 # ------------------------ Partie dans la console ------------------------
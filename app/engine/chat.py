@@ -0,0 +1,102 @@
+# ---------------------------------------------------------------------
+# Chat d'une partie : derniers messages en mémoire, lecture par curseur
+#----------------------------------------------------------------------
+
+from collections import deque
+from typing import Callable, Iterator, NamedTuple, Optional
+
+CHAT_CAPACITY = 200 # Messages gardés en mémoire par partie
+PAGE_SIZE = 50 # Messages retournés au plus par lecture
+
+class Message(NamedTuple):
+    sender:str
+    content:str
+    id:int = 0 # Croissant dans une partie, sert de curseur aux clients
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "sender": self.sender, "content": self.content}
+
+# loader(after_id, before_id, limit, oldest) : messages d'id dans ]after_id, before_id[, les plus récents
+# (les plus anciens si `oldest`), dans l'ordre des ids
+Loader = Callable[[int, int, int, bool], list[Message]]
+
+class ChatLog:
+    """
+    Tampon circulaire des `capacity` derniers messages. Les clients lisent à partir du dernier id reçu (`since`) :
+    le serveur ne garde aucun index de lecture par utilisateur. Les messages sortis du tampon sont lus dans
+    le stockage (`loader`) s'il y en a un.
+    """
+    def __init__(self, capacity:int = CHAT_CAPACITY, loader:Optional[Loader] = None):
+        """
+        Parameters
+        ----------
+        capacity:int
+            Nombre de messages gardés en mémoire
+        loader:Loader
+            Lecture des messages plus anciens que le tampon
+        """
+        self.buffer:deque[Message] = deque(maxlen=capacity)
+        self.loader = loader
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self.buffer)
+
+    def append(self, sender:str, content:str, id:Optional[int] = None) -> Message:
+        """Ajoute un message (l'id est imposé quand le message est rejoué depuis le stockage)"""
+        message = Message(sender, content, self.last_id + 1 if id is None else id)
+        self.last_id = message.id
+        self.buffer.append(message)
+        return message
+
+    @property
+    def first_id(self) -> int:
+        """Id du plus ancien message en mémoire (`last_id + 1` si le tampon est vide)"""
+        return self.buffer[0].id if self.buffer else self.last_id + 1
+
+    def since(self, since_id:int = 0, limit:int = PAGE_SIZE) -> list[Message]:
+        """
+        Messages d'id supérieur à `since_id`, au plus les `limit` plus anciens : un client en retard
+        reçoit la suite par pages en relisant à partir du dernier id reçu, sans perdre de message
+        """
+        if limit <= 0:
+            return []
+        first_id = self.first_id
+        messages = []
+        if since_id + 1 < first_id and self.loader is not None:
+            messages = self.loader(since_id, first_id, limit, True)
+        start = max(since_id + 1, first_id)
+        stop = min(self.last_id + 1, start + limit - len(messages))
+        return messages + [self.buffer[i - first_id] for i in range(start, stop)]
+
+    def before(self, before_id:int, limit:int = PAGE_SIZE) -> list[Message]:
+        """Page de l'historique : les `limit` messages précédant `before_id`"""
+        return self.between(0, before_id, limit)
+
+    def between(self, after_id:int, before_id:int, limit:int = PAGE_SIZE) -> list[Message]:
+        """Les `limit` messages les plus récents d'id dans ]after_id, before_id[, dans l'ordre des ids"""
+        if limit <= 0:
+            return []
+        first_id = self.first_id
+        # Les ids sont consécutifs : les indices du tampon se déduisent des ids
+        start = max(after_id + 1, first_id, before_id - limit)
+        stop = min(before_id, self.last_id + 1)
+        messages = [self.buffer[i - first_id] for i in range(start, stop)]
+
+        missing = limit - len(messages)
+        if missing > 0 and after_id + 1 < first_id and self.loader is not None:
+            older = self.loader(after_id, min(first_id, before_id), missing, False)
+            messages = older + messages
+        return messages
+
+    def dump(self) -> dict:
+        return {"last_id": self.last_id, "messages": [list(message) for message in self.buffer]}
+
+    def restore(self, state:dict):
+        self.buffer.clear()
+        for sender, content, id in state["messages"]:
+            self.buffer.append(Message(sender, content, id))
+        self.last_id = state["last_id"]
@@ -0,0 +1,522 @@
+# ---------------------------------------------------------------------
+# Représentation compacte de l'échiquier : 64 codes de pièces dans un
+# tableau `array('b')` + trait, droits de roque et prise en passant
+#----------------------------------------------------------------------
+
+from array import array
+from typing import Optional
+
+from app.engine.pieces import King, Queen, Rook, Bishop, Knight, Pawn
+from app.engine.utils import Position, Piece, WHITE, BLACK, Move, Roque, Promotion, EnPassant
+from app.engine.utils import CheckMate, Pat, Normal, Check
+from app.engine.psqt import square_value
+
+# Codes des pièces : positifs pour les blancs, négatifs pour les noirs
+EMPTY = 0
+PAWN = Pawn.CODE
+KNIGHT = Knight.CODE
+BISHOP = Bishop.CODE
+ROOK = Rook.CODE
+QUEEN = Queen.CODE
+KING = King.CODE
+
+PIECE_TYPES = {cls.CODE: cls for cls in (Pawn, Knight, Bishop, Rook, Queen, King)}
+PIECE_VALUES = [0] + [PIECE_TYPES[code](WHITE, None).value for code in range(1, 7)]
+LETTERS = " pnbrqk"
+
+# Droits de roque
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_LETTERS = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"), (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Une case est un entier `y * 8 + x` : 0 -> a8, 63 -> h1 (même repère que `Position`)
+SQUARE_POSITIONS = [Position(sq % 8, sq // 8) for sq in range(64)]
+
+# Grille 10x12 : les déplacements qui sortent de l'échiquier tombent sur -1
+MAILBOX = array("b", [-1] * 120)
+MAILBOX64 = array("b", [0] * 64)
+for _sq in range(64):
+    MAILBOX64[_sq] = 21 + (_sq // 8) * 10 + _sq % 8
+    MAILBOX[MAILBOX64[_sq]] = _sq
+
+# Droits de roque conservés quand une pièce part de la case ou y arrive
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[60] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE) # e1
+CASTLING_MASK[63] = 15 & ~WHITE_KINGSIDE # h1
+CASTLING_MASK[56] = 15 & ~WHITE_QUEENSIDE # a1
+CASTLING_MASK[4] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE) # e8
+CASTLING_MASK[7] = 15 & ~BLACK_KINGSIDE # h8
+CASTLING_MASK[0] = 15 & ~BLACK_QUEENSIDE # a8
+
+# ---------------------------------------------------------------------------
+# Coups sous forme d'entiers : départ | arrivée << 6 | promotion << 12 | type << 15
+# ---------------------------------------------------------------------------
+
+NORMAL = 0
+EN_PASSANT = 1
+CASTLE = 2
+
+def square(pos:Position) -> int:
+    """Retourne l'indice de la case correspondant à la position"""
+    return pos.y * 8 + pos.x
+
+def encode(start:int, end:int, promotion:int = 0, flag:int = NORMAL) -> int:
+    """Encode un coup dans un entier"""
+    return start | (end << 6) | (promotion << 12) | (flag << 15)
+
+def encode_move(move:Move) -> int:
+    """Encode un objet `Move` (ou un coup spécial) dans un entier"""
+    if isinstance(move, Roque):
+        return encode(square(move.king_move.start_pos), square(move.king_move.end_pos), flag=CASTLE)
+    if isinstance(move, Promotion):
+        return encode(square(move.start_pos), square(move.end_pos), promotion=move.new_piece.CODE)
+    if isinstance(move, EnPassant):
+        return encode(square(move.start_pos), square(move.end_pos), flag=EN_PASSANT)
+    return encode(square(move.start_pos), square(move.end_pos))
+
+def decode_move(board:list[list[Optional[Piece]]], move:int) -> Move:
+    """Retourne l'objet `Move` (ou le coup spécial) correspondant au coup encodé, avec les pièces de `board`"""
+    start = SQUARE_POSITIONS[move & 63]
+    end = SQUARE_POSITIONS[(move >> 6) & 63]
+    promotion = (move >> 12) & 7
+    flag = move >> 15
+    piece = board[start.y][start.x]
+
+    if flag == CASTLE:
+        direction = 1 if end.x > start.x else -1
+        rook_start = Position(7 if direction > 0 else 0, start.y)
+        rook_end = Position(end.x - direction, start.y)
+        return Roque(Move(piece, start, end), Move(board[rook_start.y][rook_start.x], rook_start, rook_end), direction)
+    if flag == EN_PASSANT:
+        return EnPassant(piece, start, end, Position(end.x, start.y))
+    if promotion:
+        return Promotion(piece, start, end, PIECE_TYPES[promotion])
+    return Move(piece, start, end)
+
+def square_name(sq:int) -> str:
+    """Retourne le nom de la case (0 -> 'a8', 63 -> 'h1')"""
+    return "abcdefgh"[sq % 8] + str(8 - sq // 8)
+
+def move_to_uci(move:int) -> str:
+    """Retourne le coup encodé en notation UCI (ex : 'e2e4', 'a7a8q')"""
+    promotion = (move >> 12) & 7
+    return square_name(move & 63) + square_name((move >> 6) & 63) + (LETTERS[promotion] if promotion else "")
+
+def opponent(color:str) -> str:
+    return BLACK if color == WHITE else WHITE
+
+class CompactBoard:
+    """
+    Echiquier sous forme de 64 codes de pièces.
+    Copier une position revient à copier un tampon de 64 octets.
+    """
+    __slots__ = ("squares", "turn", "castling", "en_passant", "halfmove", "fullmove")
+
+    def __init__(self, squares:Optional[array] = None, turn:str = WHITE, castling:int = 0, en_passant:int = -1, halfmove:int = 0, fullmove:int = 1):
+        """
+        Parameters
+        ----------
+        squares:array
+            Tableau `array('b')` de 64 codes de pièces
+        turn:str
+            Couleur qui doit jouer
+        castling:int
+            Masque des droits de roque (`WHITE_KINGSIDE | ...`)
+        en_passant:int
+            Case de prise en passant ou -1
+        """
+        self.squares = squares if squares is not None else array("b", bytes(64))
+        self.turn = turn
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove = halfmove
+        self.fullmove = fullmove
+
+    def copy(self) -> 'CompactBoard':
+        """Retourne une copie indépendante de la position"""
+        return CompactBoard(self.squares[:], self.turn, self.castling, self.en_passant, self.halfmove, self.fullmove)
+
+    def __repr__(self):
+        return f"CompactBoard('{self.to_fen()}')"
+
+    # -----------------------------------------------------------------------
+    # Conversions
+    # -----------------------------------------------------------------------
+
+    @classmethod
+    def from_fen(cls, fen:str = START_FEN) -> 'CompactBoard':
+        """Construit la position depuis une notation FEN complète ou réduite au placement des pièces"""
+        fields = fen.split()
+        if not fields:
+            raise ValueError("FEN vide")
+        rows = fields[0].split("/")
+        if len(rows) != 8:
+            raise ValueError(f"FEN invalide : {fen}")
+
+        squares = array("b", bytes(64))
+        for y, row in enumerate(rows):
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                code = LETTERS.find(char.lower())
+                if code <= 0 or x >= 8:
+                    raise ValueError(f"FEN invalide : {fen}")
+                squares[y * 8 + x] = code if char.isupper() else -code
+                x += 1
+            if x != 8:
+                raise ValueError(f"FEN invalide : {fen}")
+
+        turn = BLACK if len(fields) > 1 and fields[1] == "b" else WHITE
+        castling = 0
+        if len(fields) > 2:
+            for flag, letter in CASTLING_LETTERS:
+                if letter in fields[2]:
+                    castling |= flag
+        en_passant = -1
+        if len(fields) > 3 and fields[3] != "-":
+            x = ord(fields[3][0]) - ord("a")
+            y = 8 - int(fields[3][1])
+            en_passant = y * 8 + x
+        halfmove = int(fields[4]) if len(fields) > 4 else 0
+        fullmove = int(fields[5]) if len(fields) > 5 else 1
+
+        return cls(squares, turn, castling, en_passant, halfmove, fullmove)
+
+    def placement(self) -> str:
+        """Retourne le premier champ de la notation FEN (placement des pièces)"""
+        fen = ""
+        for y in range(8):
+            if y != 0:
+                fen += "/"
+            blank_count = 0
+            for code in self.squares[y * 8:y * 8 + 8]:
+                if code == EMPTY:
+                    blank_count += 1
+                    continue
+                if blank_count != 0:
+                    fen += str(blank_count)
+                    blank_count = 0
+                fen += LETTERS[code].upper() if code > 0 else LETTERS[-code]
+            if blank_count != 0:
+                fen += str(blank_count)
+        return fen
+
+    def to_fen(self) -> str:
+        """Retourne la notation FEN complète"""
+        castling = "".join(letter for flag, letter in CASTLING_LETTERS if self.castling & flag) or "-"
+        en_passant = "-"
+        if self.en_passant != -1:
+            pos = SQUARE_POSITIONS[self.en_passant]
+            en_passant = chr(pos.x + ord("a")) + str(8 - pos.y)
+        turn = "w" if self.turn == WHITE else "b"
+        return f"{self.placement()} {turn} {castling} {en_passant} {self.halfmove} {self.fullmove}"
+
+    @classmethod
+    def from_board(cls, board:list[list[Optional[Piece]]], turn:str = WHITE, castling:Optional[int] = None, en_passant:int = -1) -> 'CompactBoard':
+        """
+        Construit la position depuis une matrice 8x8 d'objets `Piece`
+
+        Parameters
+        ----------
+        castling:int
+            Si non spécifié, les droits sont déduits des pièces (`initial_position`, `has_moved`)
+        """
+        squares = array("b", bytes(64))
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    squares[y * 8 + x] = piece.CODE if piece.color == WHITE else -piece.CODE
+        if castling is None:
+            castling = castling_rights(board)
+        return cls(squares, turn, castling, en_passant)
+
+    def to_board(self) -> list[list[Optional[Piece]]]:
+        """Retourne la matrice 8x8 d'objets `Piece` correspondant à la position"""
+        board = [[None for _ in range(8)] for _ in range(8)]
+        for sq, code in enumerate(self.squares):
+            if code == EMPTY:
+                continue
+            pos = SQUARE_POSITIONS[sq]
+            color = WHITE if code > 0 else BLACK
+            row = 7 if color == WHITE else 0
+            piece_type = PIECE_TYPES[abs(code)]
+
+            if piece_type is Pawn:
+                piece = Pawn(color, Position(pos.x, 6 if color == WHITE else 1))
+            elif piece_type is King:
+                piece = King(color, Position(4, row))
+                kingside, queenside = (WHITE_KINGSIDE, WHITE_QUEENSIDE) if color == WHITE else (BLACK_KINGSIDE, BLACK_QUEENSIDE)
+                piece.has_moved = pos != piece.initial_position or not self.castling & (kingside | queenside)
+            elif piece_type is Rook:
+                piece = Rook(color, pos)
+                flag = ROOK_CASTLING.get((color, pos))
+                piece.has_moved = flag is None or not self.castling & flag
+            else:
+                piece = piece_type(color, pos)
+            board[pos.y][pos.x] = piece
+        return board
+
+    # -----------------------------------------------------------------------
+    # Attaques et génération de coups
+    # -----------------------------------------------------------------------
+
+    def king_squares(self, color:str) -> list[int]:
+        """Retourne les cases des rois de la couleur donnée"""
+        code = KING if color == WHITE else -KING
+        return [sq for sq, piece in enumerate(self.squares) if piece == code]
+
+    def is_attacked(self, sq:int, by_color:str) -> bool:
+        """Regarde si la case est attaquée par une pièce de la couleur `by_color`"""
+        squares = self.squares
+        sign = 1 if by_color == WHITE else -1
+        origin = MAILBOX64[sq]
+
+        # Un pion blanc attaque vers le haut : il se trouve donc une rangée plus bas
+        for offset in Pawn.OFFSETS:
+            target = MAILBOX[origin - offset * sign]
+            if target != -1 and squares[target] == PAWN * sign:
+                return True
+        for offset in Knight.OFFSETS:
+            target = MAILBOX[origin + offset]
+            if target != -1 and squares[target] == KNIGHT * sign:
+                return True
+        for offset in King.OFFSETS:
+            target = MAILBOX[origin + offset]
+            if target != -1 and squares[target] == KING * sign:
+                return True
+
+        for offsets, sliders in ((Rook.OFFSETS, (ROOK * sign, QUEEN * sign)), (Bishop.OFFSETS, (BISHOP * sign, QUEEN * sign))):
+            for offset in offsets:
+                index = origin + offset
+                target = MAILBOX[index]
+                while target != -1:
+                    piece = squares[target]
+                    if piece != EMPTY:
+                        if piece in sliders:
+                            return True
+                        break
+                    index += offset
+                    target = MAILBOX[index]
+        return False
+
+    def in_check(self, color:Optional[str] = None) -> bool:
+        """Regarde si un roi de la couleur donnée (ou des deux couleurs) est attaqué"""
+        colors = [WHITE, BLACK] if color is None else [color]
+        for c in colors:
+            for sq in self.king_squares(c):
+                if self.is_attacked(sq, opponent(c)):
+                    return True
+        return False
+
+    def pseudo_moves(self, color:Optional[str] = None) -> list[int]:
+        """
+        Retourne les coups des pièces de la couleur donnée sans vérifier si le roi reste en échec
+        La prise en passant n'est proposée qu'à la couleur qui a le trait
+        """
+        if color is None:
+            color = self.turn
+        squares = self.squares
+        sign = 1 if color == WHITE else -1
+        moves = []
+
+        for sq in range(64):
+            code = squares[sq] * sign
+            if code <= 0:
+                continue
+            if code == PAWN:
+                self._pawn_moves(sq, sign, color == self.turn, moves)
+                continue
+
+            piece_type = PIECE_TYPES[code]
+            origin = MAILBOX64[sq]
+            for offset in piece_type.OFFSETS:
+                index = origin + offset
+                target = MAILBOX[index]
+                while target != -1:
+                    other = squares[target] * sign
+                    if other > 0:
+                        break
+                    moves.append(sq | (target << 6))
+                    if other < 0 or not piece_type.SLIDING:
+                        break
+                    index += offset
+                    target = MAILBOX[index]
+
+        self._castling_moves(color, moves)
+        return moves
+
+    def _pawn_moves(self, sq:int, sign:int, en_passant:bool, moves:list[int]) -> None:
+        """Ajoute les coups du pion sur la case `sq`"""
+        squares = self.squares
+        step = -8 * sign
+        last_row = 0 if sign > 0 else 7
+        start_row = 6 if sign > 0 else 1
+        origin = MAILBOX64[sq]
+
+        targets = []
+        front = sq + step
+        if 0 <= front < 64 and squares[front] == EMPTY:
+            targets.append(front)
+            if sq // 8 == start_row and squares[front + step] == EMPTY:
+                moves.append(sq | ((front + step) << 6))
+        for offset in Pawn.OFFSETS:
+            target = MAILBOX[origin + offset * sign]
+            if target == -1:
+                continue
+            if squares[target] * sign < 0:
+                targets.append(target)
+            elif en_passant and target == self.en_passant:
+                moves.append(encode(sq, target, flag=EN_PASSANT))
+
+        for target in targets:
+            if target // 8 == last_row:
+                for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                    moves.append(encode(sq, target, promotion))
+            else:
+                moves.append(sq | (target << 6))
+
+    def _castling_moves(self, color:str, moves:list[int]) -> None:
+        """Ajoute les roques autorisés : cases vides entre le roi et la tour, roi jamais attaqué sur son trajet"""
+        if color == WHITE:
+            king_sq, kingside, queenside, sign = 60, WHITE_KINGSIDE, WHITE_QUEENSIDE, 1
+        else:
+            king_sq, kingside, queenside, sign = 4, BLACK_KINGSIDE, BLACK_QUEENSIDE, -1
+        if not self.castling & (kingside | queenside):
+            return
+        squares = self.squares
+        if squares[king_sq] != KING * sign:
+            return
+        enemy = opponent(color)
+
+        if self.castling & kingside and squares[king_sq + 3] == ROOK * sign \
+                and squares[king_sq + 1] == EMPTY and squares[king_sq + 2] == EMPTY \
+                and not any(self.is_attacked(s, enemy) for s in (king_sq, king_sq + 1, king_sq + 2)):
+            moves.append(encode(king_sq, king_sq + 2, flag=CASTLE))
+        if self.castling & queenside and squares[king_sq - 4] == ROOK * sign \
+                and squares[king_sq - 1] == EMPTY and squares[king_sq - 2] == EMPTY and squares[king_sq - 3] == EMPTY \
+                and not any(self.is_attacked(s, enemy) for s in (king_sq, king_sq - 1, king_sq - 2)):
+            moves.append(encode(king_sq, king_sq - 2, flag=CASTLE))
+
+    def legal_moves(self, color:Optional[str] = None) -> list[int]:
+        """Retourne les coups qui ne laissent pas le roi de la couleur donnée en échec"""
+        if color is None:
+            color = self.turn
+        legal = []
+        for move in self.pseudo_moves(color):
+            board = self.copy()
+            board.apply(move)
+            if not board.in_check(color):
+                legal.append(move)
+        return legal
+
+    def apply(self, move:int) -> None:
+        """Joue le coup sur la position sans vérification préalable"""
+        squares = self.squares
+        start = move & 63
+        end = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flag = move >> 15
+
+        piece = squares[start]
+        captured = squares[end]
+        squares[end] = piece
+        squares[start] = EMPTY
+
+        if flag == EN_PASSANT:
+            squares[end + (8 if piece > 0 else -8)] = EMPTY
+            captured = PAWN
+        elif flag == CASTLE:
+            if end > start:
+                squares[end - 1], squares[start + 3] = squares[start + 3], EMPTY
+            else:
+                squares[end + 1], squares[start - 4] = squares[start - 4], EMPTY
+        if promotion:
+            squares[end] = promotion if piece > 0 else -promotion
+
+        self.castling &= CASTLING_MASK[start] & CASTLING_MASK[end]
+        if abs(piece) == PAWN and abs(end - start) == 16:
+            self.en_passant = (start + end) // 2
+        else:
+            self.en_passant = -1
+        self.halfmove = 0 if abs(piece) == PAWN or captured != EMPTY else self.halfmove + 1
+        if self.turn == BLACK:
+            self.fullmove += 1
+        self.turn = opponent(self.turn)
+
+    # -----------------------------------------------------------------------
+    # Interface utilisée par les fonctions d'évaluation (voir app.bot.evaluation)
+    # -----------------------------------------------------------------------
+
+    def get_material_value(self, color:Optional[str] = None) -> int:
+        """Retourne la valeur des pièces de la couleur spécifiée ou des deux couleurs"""
+        total = 0
+        for code in self.squares:
+            if code == EMPTY:
+                continue
+            if color is None or (code > 0) == (color == WHITE):
+                total += PIECE_VALUES[abs(code)]
+        return total
+
+    def get_position_value(self, color:Optional[str] = None) -> int:
+        """Retourne la somme des bonus pièce-case de la couleur spécifiée ou des deux couleurs"""
+        total = 0
+        for sq, code in enumerate(self.squares):
+            if code == EMPTY:
+                continue
+            if color is None or (code > 0) == (color == WHITE):
+                total += square_value(abs(code), code > 0, sq)
+        return total
+
+    def get_total_moves_score(self, color:str) -> int:
+        """Nombre de coups de la couleur donnée vers une case vide"""
+        squares = self.squares
+        return sum(1 for move in self.legal_moves(color) if squares[(move >> 6) & 63] == EMPTY)
+
+    def threat_score(self, color:str) -> int:
+        """Valeurs des pièces de la couleur donnée attaquées par la couleur adverse"""
+        squares = self.squares
+        sign = 1 if color == WHITE else -1
+        score = 0
+        for move in self.legal_moves(opponent(color)):
+            target = squares[(move >> 6) & 63] * sign
+            if target > 0:
+                score += PIECE_VALUES[target]
+        return score
+
+    def get_state(self) -> str:
+        """Retourne le status de la partie"""
+        for color in [WHITE, BLACK]:
+            other_color = opponent(color)
+            if self.in_check(color):
+                if not self.legal_moves(color):
+                    return CheckMate(other_color)
+                return Check(other_color)
+            elif not self.legal_moves(color):
+                return Pat(other_color)
+        return Normal()
+
+# Case de départ des tours -> droit de roque associé
+ROOK_CASTLING = {
+    (WHITE, Position(7, 7)): WHITE_KINGSIDE,
+    (WHITE, Position(0, 7)): WHITE_QUEENSIDE,
+    (BLACK, Position(7, 0)): BLACK_KINGSIDE,
+    (BLACK, Position(0, 0)): BLACK_QUEENSIDE,
+}
+
+def castling_rights(board:list[list[Optional[Piece]]]) -> int:
+    """Déduit les droits de roque des pièces : roi et tour à leur place et jamais déplacés"""
+    rights = 0
+    for (color, rook_pos), flag in ROOK_CASTLING.items():
+        king = board[rook_pos.y][4]
+        rook = board[rook_pos.y][rook_pos.x]
+        if not isinstance(king, King) or king.color != color or king.has_moved or king.initial_position != Position(4, rook_pos.y):
+            continue
+        if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+            rights |= flag
+    return rights
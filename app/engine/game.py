@@ -2,24 +2,55 @@
 # Logique de jeu                               |
 # ----------------------------------------------
 
-from typing import Optional, NamedTuple
+from contextlib import contextmanager
+from typing import Callable, Optional, NamedTuple
 import time
+import threading
+import uuid
 from collections import defaultdict
 
 from app.utils.constants import CHECKMATE, PAT, STALEMATE
 from app.engine.board import ChessBoard, board_to_fen, ConsoleChessboard
 from app.engine.utils import WHITE, BLACK
-from app.engine.utils import Move, Position, string_to_position, position_to_string
-
-from app.bot.evaluation import evaluation_materielle, control_evaluation, threat_evaluation, final_evaluation, Coefficients
-from app.bot.minimax_ab import Node
-
-class Message(NamedTuple):
-    sender:str
-    content:str
-
-    def to_dict(self) -> dict:
-        return {"sender": self.sender, "content": self.content}
+from app.engine.utils import Move, Position, Roque, SpecialMove, string_to_position, position_to_string
+from app.engine.compact import encode_move, move_to_uci
+from app.engine.chat import ChatLog, Message, PAGE_SIZE
+
+from app.bot.evaluation import evaluation_materielle, control_evaluation, threat_evaluation, final_evaluation, Coefficients, EvaluationCache
+from app.bot.search import iterative_deepening, allocate_time
+from app.bot.transposition import TranspositionTable
+from app.bot.service import BotService
+from app.utils.logging import Logger
+
+logger = Logger()
+
+# Partagé par toutes les parties : une position déjà affichée n'est pas réévaluée à chaque requête
+evaluation_cache = EvaluationCache()
+
+# Recherches du bot faites dans le processus du serveur (parties sans `BotService`) : une seule table
+# pour toutes les parties, créée à la première recherche et utilisée par une recherche à la fois
+_transposition_table:Optional[TranspositionTable] = None
+_search_lock = threading.Lock()
+
+def shared_transposition_table() -> TranspositionTable:
+    """Table de transposition des recherches sans `BotService` (à utiliser avec `_search_lock`)"""
+    global _transposition_table
+    if _transposition_table is None:
+        _transposition_table = TranspositionTable()
+    return _transposition_table
+
+class GameSnapshot(NamedTuple):
+    """Etat de la partie calculé une seule fois par coup joué, les requêtes de suivi de la partie sont servies depuis cet état"""
+    ply:int # Nombre de coups joués
+    board:str # Notation FEN de l'échiquier
+    board_state:str # Résultat de `ChessBoard.get_state`
+    turn:str
+    moves:dict[str, list[str]] # Coups légaux de la couleur qui a le trait, sous forme {"case de départ": ["case d'arrivée", ...]}
+    evaluation:float
+
+    @property
+    def finished(self) -> bool:
+        return any(state in Game.END_STATES for state in self.board_state.split(" "))
 
 class Player(str):
     def __new__(cls, username: str):
@@ -51,23 +82,43 @@ class Bot(Player):
 class Game:
     """Logiques de jeu -> Gestion des coups, tours, échec et mats"""
     END_STATES = set([CHECKMATE, PAT, STALEMATE])
+    TICK = 0.25 # Secondes entre deux vérifications (bot, pendules) pendant `wait_for_change`
+    INITIAL_TIME = 600 # Secondes à la pendule de chaque joueur
 
-    def __init__(self):
+    def __init__(self, bot_service:Optional[BotService] = None):
+        """
+        Parameters
+        ----------
+        bot_service:BotService
+            Si spécifié, les coups du bot sont cherchés dans un autre processus sans bloquer `get_current_state`
+        """
+        self.id = uuid.uuid4().hex
         self.turn = WHITE
         self.players = {WHITE: None, BLACK: None}
 
         # Temps en secondes
-        self.black_time = 600
-        self.white_time = 600
+        self.black_time = self.INITIAL_TIME
+        self.white_time = self.INITIAL_TIME
         self.start_timer()
 
         self.chessboard = ChessBoard()
 
-        self.messages = []
-        self.messages_received = defaultdict(lambda : 0) # Sous forme {`username`: index}
+        self.chat = ChatLog()
 
         self.end = False
         self.processing = False
+        self.bot_service = bot_service
+        self.lock = threading.RLock() # Les requêtes d'une même partie peuvent arriver sur plusieurs threads
+        self.changed = threading.Condition(self.lock) # Réveille les requêtes en attente d'un changement (`wait_for_change`)
+        self._version = 0 # Incrémenté à chaque coup, message, arrivée ou départ de joueur et fin de partie
+        self.watchers:list[Callable[[], None]] = [] # Appelées à chaque changement (`notify`), depuis le thread qui modifie la partie
+        self.evaluations = evaluation_cache
+        self._snapshot:Optional[GameSnapshot] = None
+
+        # Stockage persistant (`GameStore`), optionnel
+        self.store = None
+        self.key:Optional[str] = None # Id de la partie dans le stockage
+        self.seq = 0 # Numéro du dernier évènement du journal appliqué
 
     def join(self, player_username:str, color:str = None, bot:bool = False) -> bool:
         """
@@ -79,22 +130,28 @@ class Game:
         """
         cs = Bot if bot else Player
 
-        if any([player_username == player for player in self.players.values()]):
-            return True
-        if all(self.players.values()): # Vérifie qu'il reste des couleurs libres
-            return False
-
-        if color is not None and color in self.players:
-            if self.players[color] is None:
-                self.players[color] = cs(player_username)
-                return True
-        
-        for color in self.players:
-            if self.players[color] is None:
-                self.players[color] = cs(player_username)
+        with self.transaction():
+            if any([player_username == player for player in self.players.values()]):
                 return True
+            if all(self.players.values()): # Vérifie qu'il reste des couleurs libres
+                return False
+
+            if color is not None and color in self.players:
+                if self.players[color] is None:
+                    self.seat(color, cs(player_username))
+                    return True
+            
+            for color in self.players:
+                if self.players[color] is None:
+                    self.seat(color, cs(player_username))
+                    return True
             
         return False
+
+    def seat(self, color:str, player:Player):
+        """Place un joueur sur une couleur libre"""
+        self.commit("join", username=player.username, color=color, bot=type(player) is Bot)
+        self.notify()
         
     def leave(self, player_username:str) -> bool:
         """
@@ -104,10 +161,13 @@ class Game:
         -------
         bool : True si le joueur a quitté la partie, False sinon.
         """
-        for color in self.players:
-            if self.players[color] == player_username:
-                self.players[color] = None
-                return True
+        with self.transaction():
+            for color in self.players:
+                if self.players[color] == player_username:
+                    self.commit("leave", color=color)
+                    self.cancel_bot()
+                    self.notify()
+                    return True
         return False
     
     def move(self, player_username:str, source:Optional[str] = None, target:Optional[str] = None, move:Optional[Move] = None) -> bool:
@@ -120,20 +180,56 @@ class Game:
         """
         if all([source is None, target is None]) and move is None:
             return False
-        if self.end:
-            return False
-
-        if self.players[self.turn] != player_username:
-            return False
-        if move is None:
-            move = Move(None, string_to_position(source), string_to_position(target))
 
-        if self.chessboard.move(move) == 1:
-            return False
-        self.end_timer()
-        self.turn = WHITE if self.turn == BLACK else BLACK
-        self.start_timer()
+        with self.transaction():
+            if self.end:
+                return False
+
+            if self.players[self.turn] != player_username:
+                return False
+            if move is None:
+                move = Move(None, string_to_position(source), string_to_position(target))
+
+            move = self.chessboard.valid_move(move)
+            if not move:
+                return False
+
+            # Pendule du joueur arrêtée, celle de l'adversaire démarre avec le coup
+            remaining = self.get_current_time(self.turn)
+            white_time, black_time = (remaining, self.black_time) if self.turn == WHITE else (self.white_time, remaining)
+            previous_key = self.chessboard.hash
+            self.commit("move", uci=move_to_uci(encode_move(move)), white_time=white_time, black_time=black_time, start_time=time.time())
+            self.evaluations.invalidate(key=previous_key) # La position précédente ne sera plus affichée
+            self.update_snapshot()
+            self.notify()
         return True
+
+    def update_snapshot(self) -> GameSnapshot:
+        """Calcule l'état de la position actuelle : FEN, état, coups légaux par case et évaluation"""
+        chessboard = self.chessboard
+        moves = defaultdict(list)
+        # Même ordre que `ChessBoard.get_moves` : coups spéciaux à la fin
+        for move in sorted(chessboard.get_all_actions(), key=lambda move: isinstance(move, SpecialMove)):
+            start = move.king_move.start_pos if isinstance(move, Roque) else move.start_pos
+            moves[position_to_string(start)].append(position_to_string(move.pos))
+
+        self._snapshot = GameSnapshot(
+            len(chessboard.moves),
+            board_to_fen(chessboard.board),
+            chessboard.get_state(),
+            self.turn,
+            dict(moves),
+            self.evaluations.evaluate(chessboard, Coefficients()),
+        )
+        return self._snapshot
+
+    def snapshot(self) -> GameSnapshot:
+        """Etat de la position actuelle, recalculé seulement si un coup a été joué depuis le dernier calcul"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.ply != len(self.chessboard.moves) or snapshot.turn != self.turn:
+            with self.lock:
+                snapshot = self.update_snapshot()
+        return snapshot
     
     def get_moves(self, source:str, player_username:str) -> list[str]:
         """
@@ -148,14 +244,8 @@ class Game:
 
         if self.players[self.turn] != player_username:
             return []
-        
-        try:
-            moves = self.chessboard.get_moves(string_to_position(source))
-        except Exception as e:
-            print(e)
-            return []
 
-        return [position_to_string(move.pos) for move in moves]
+        return list(self.snapshot().moves.get(source, []))
     
     def get_current_state(self) -> dict:
         """
@@ -165,23 +255,199 @@ class Game:
         -------
         dict : {"board": notation fen, "board_state": échecs, pat, ..., "players": liste des joueurs}
         """
-        board_state = self.chessboard.get_state()
-        if any([state in self.END_STATES for state in board_state.split(" ")]) or self.no_time_left():
-            self.end = True
-        elif type(self.players[self.turn]) is Bot:
-            if not self.processing:
-                self.play_bot()
+        return self.state_of(self.update())
 
+    def state_of(self, snapshot:GameSnapshot) -> dict:
+        """Etat de la partie (voir `get_current_state`) à partir d'un état de la position, sans faire jouer le bot"""
+        # Seules les pendules sont calculées à chaque requête
         return {
-            "board": board_to_fen(self.chessboard.board), 
-            "board_state": board_state,
+            "board": snapshot.board,
+            "board_state": snapshot.board_state,
             "end": self.end,
             "players": [self.players[WHITE], self.players[BLACK]],
             "black_time": self.get_current_time(BLACK),
             "white_time": self.get_current_time(WHITE),
-            "evaluation": self.get_evaluation()
+            "evaluation": snapshot.evaluation
             } 
     
+    def update(self) -> GameSnapshot:
+        """Détecte la fin de la partie (position ou pendule) et fait jouer le bot si c'est son tour"""
+        with self.lock:
+            was_over = self.end
+            snapshot = self.snapshot()
+            if snapshot.finished or self.no_time_left():
+                self.end = True
+                self.cancel_bot()
+                if not was_over:
+                    self.notify()
+            elif type(self.players[self.turn]) is Bot:
+                if not self.processing:
+                    self.play_bot()
+                    snapshot = self.snapshot()
+        return snapshot
+
+    @property
+    def version(self) -> int:
+        """
+        Version de la partie, renvoyée par les clients pour savoir si elle a changé.
+        Avec un stockage, elle est déduite du numéro du dernier évènement du journal et a donc la même valeur dans tous
+        les processus : `2 * seq`, plus 1 une fois la partie terminée (la fin est détectée par chaque processus).
+        """
+        if self.store is not None:
+            return 2 * self.seq + int(self.end)
+        return self._version
+
+    def notify(self):
+        """Signale un changement de la partie aux requêtes en attente et aux observateurs (`watchers`)"""
+        with self.changed:
+            self._version += 1
+            self.changed.notify_all()
+            for watcher in tuple(self.watchers): # Copie : la liste peut changer depuis un autre thread
+                watcher()
+
+    def next_update_in(self, tick:float = TICK) -> Optional[float]:
+        """
+        Secondes avant que `update` puisse changer la partie sans action des joueurs : `tick` si le bot a le trait
+        (recherche à suivre), sinon temps restant à la pendule du joueur qui a le trait. None si la partie est terminée.
+        """
+        with self.lock:
+            if self.end:
+                return None
+            if type(self.players[self.turn]) is Bot:
+                return tick
+            return self.get_current_time(self.turn)
+
+    def wait_for_change(self, version:int, timeout:float) -> int:
+        """
+        Attend que la version de la partie soit différente de `version`, au plus `timeout` secondes
+
+        Returns
+        -------
+        int : version actuelle (égale à `version` si rien n'a changé pendant l'attente)
+        """
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while True:
+                self.sync() # Evènements écrits par les autres processus (coups joués sur un autre serveur)
+                self.update() # Le coup du bot et la fin au temps ne sont pas déclenchés par une requête
+                remaining = deadline - time.monotonic()
+                if self.version != version or remaining <= 0:
+                    return self.version
+                self.changed.wait(min(remaining, self.TICK))
+
+    def get_update(self, since_id:int = 0) -> dict:
+        """
+        Etat complet de la partie, avec sa version et la page suivante des messages d'id supérieur à `since_id`
+
+        Returns
+        -------
+        dict : `get_current_state` + {"version": int, "turn": str, "messages": liste de messages, "last_message_id": id du dernier message envoyé, curseur de la prochaine lecture}
+        """
+        with self.lock:
+            state = self.get_current_state()
+            messages = self.chat.since(since_id)
+            state.update({
+                "version": self.version,
+                "turn": self.turn,
+                "messages": [message.to_dict() for message in messages],
+                "last_message_id": messages[-1].id if messages else since_id,
+            })
+        return state
+
+    # ------------------------ Stockage persistant ------------------------
+    def attach(self, store, key:str):
+        """Rattache la partie à un `GameStore` : chaque modification est ajoutée à son journal"""
+        self.store = store
+        self.key = key
+        self.chat.loader = lambda after_id, before_id, limit, oldest: store.messages(key, after_id, before_id, limit, oldest)
+
+    @contextmanager
+    def transaction(self):
+        """Modification de la partie, dans une transaction du stockage s'il y en a un"""
+        with self.lock:
+            if self.store is None:
+                yield
+            else:
+                with self.store.transaction(self):
+                    yield
+
+    def commit(self, kind:str, **payload):
+        """
+        Ajoute un évènement au journal du stockage puis l'applique à la partie :
+        la partie n'est modifiée que si l'écriture a réussi
+        """
+        if self.store is not None:
+            self.store.append(self, kind, payload)
+        self.apply_event(kind, payload)
+
+    def sync(self) -> int:
+        """Applique les évènements écrits par d'autres processus, retourne leur nombre"""
+        if self.store is None:
+            return 0
+        with self.lock:
+            return self.store.sync(self)
+
+    def apply_event(self, kind:str, payload:dict):
+        """Rejoue un évènement du journal (sans l'enregistrer à nouveau)"""
+        if kind == "join":
+            self.players[payload["color"]] = (Bot if payload["bot"] else Player)(payload["username"])
+        elif kind == "leave":
+            self.players[payload["color"]] = None
+        elif kind == "move":
+            move = self.chessboard.move_from_uci(payload["uci"])
+            if move is None:
+                logger.error(f"Coup impossible dans le journal de la partie {self.key} : {payload['uci']}, ignoré")
+                return
+            self.chessboard.make_move(move)
+            self.turn = WHITE if self.turn == BLACK else BLACK
+            self.white_time, self.black_time, self.start_time = payload["white_time"], payload["black_time"], payload["start_time"]
+        elif kind == "message":
+            self.chat.append(payload["sender"], payload["content"], payload["id"])
+
+    def dump(self) -> dict:
+        """Etat de la partie pour un instantané du stockage"""
+        return {
+            "fen": self.chessboard.to_fen(),
+            "turn": self.turn,
+            "players": {color: None if player is None else [player.username, type(player) is Bot] for color, player in self.players.items()},
+            "white_time": self.white_time,
+            "black_time": self.black_time,
+            "start_time": self.start_time,
+            "chat": self.chat.dump(),
+        }
+
+    def reset(self):
+        """Remet la partie dans l'état d'une nouvelle partie (avant de rejouer tout son journal)"""
+        self.chessboard = ChessBoard()
+        self.turn = WHITE
+        self.players = {WHITE: None, BLACK: None}
+        self.white_time = self.black_time = self.INITIAL_TIME
+        self.start_timer()
+        self.chat.restore({"last_id": 0, "messages": []})
+        self.end = False
+        self._snapshot = None
+
+    def restore(self, state:dict):
+        """Remplace l'état de la partie par celui d'un instantané (`dump`)"""
+        self.chessboard = ChessBoard.from_fen(state["fen"])
+        self.turn = state["turn"]
+        self.players = {color: None if entry is None else (Bot if entry[1] else Player)(entry[0]) for color, entry in state["players"].items()}
+        self.white_time, self.black_time, self.start_time = state["white_time"], state["black_time"], state["start_time"]
+        self.chat.restore(state["chat"])
+        self._snapshot = None
+
+    def get_state_since(self, version:int) -> Optional[dict]:
+        """
+        Etat de la partie (`get_current_state`) avec sa version et le trait, None si la partie n'a pas changé depuis `version`.
+        Lecture seule : ni détection de la fin de partie ni coup du bot (faits par `update`).
+        """
+        with self.lock:
+            if self.version == version:
+                return None
+            state = self.state_of(self.snapshot())
+            state.update({"version": self.version, "turn": self.turn})
+        return state
+
     def get_orientation(self, username:str) -> Optional[str]:
         """Retourne la couleur de l'utilisateur s'il est dans la partie sinon None"""
         for col in self.players:
@@ -210,21 +476,25 @@ class Game:
             self.black_time = time
 
     def add_message(self, message, username):
-        """Ajoute un NamedTuple dans self.messages"""
-        message = Message(sender=username, content=message)
-
-        self.messages.append(message)
+        """Ajoute un message au chat de la partie"""
+        with self.transaction():
+            self.commit("message", sender=username, content=message, id=self.chat.last_id + 1)
+            self.notify()
 
         return True
     
-    def get_messages(self, username:str, reset:bool=False) -> list[dict]:
-        """Renvoie les messages que l'utilisateur n'a pas actuellement"""
-        messages_size = len(self.messages)
-        n_message = self.messages_received[username]
-        self.messages_received[username] = messages_size
-        if reset:
-            return [message.to_dict() for message in self.messages]
-        return [message.to_dict() for message in self.messages[n_message:messages_size]]
+    def get_messages(self, since_id:int = 0, before_id:Optional[int] = None, limit:int = PAGE_SIZE) -> list[dict]:
+        """
+        Renvoie les messages d'id supérieur à `since_id` (dernier message reçu par le client)
+
+        Parameters
+        ----------
+        before_id:int
+            Si spécifié, page de l'historique : les `limit` messages précédant cet id
+        """
+        with self.lock:
+            messages = self.chat.since(since_id, limit) if before_id is None else self.chat.before(before_id, limit)
+        return [message.to_dict() for message in messages]
     
     def no_time_left(self):
         """ Retourne True si un des deux joueurs n'a plus de temps """
@@ -241,23 +511,53 @@ class Game:
     
     def get_evaluation(self):
         """Retourne un nombre entre -1 et 1 correspondant à l'évaluation de la partie"""
-        result = final_evaluation(self.chessboard, Coefficients())
-
-        return result
+        return self.snapshot().evaluation
     
     def play_bot(self):
         """Joue un coups si le tours correspond à un bot"""
         if not type(self.players[self.turn]) is Bot:
             return None
+        if self.bot_service is not None:
+            return self.play_bot_async()
 
         self.processing = True
-        root = Node(self.chessboard, None, 1)
-        best_move = root.get_best_move()
-        print(root.LOG_DEPTH)
-        
-        a = self.move(self.players[self.turn], move = best_move.move)
-        self.processing = False
-        return a
+        try:
+            # Temps alloué déduit de la pendule du bot, la recherche joue et annule les coups sur sa propre copie
+            time_limit = allocate_time(self.get_current_time(self.turn))
+            with _search_lock:
+                table = shared_transposition_table()
+                best_move = iterative_deepening(self.chessboard.clone(), time_limit, table=table)
+                logger.debug(f"Recherche du bot : profondeur {best_move.depth}, {best_move.nodes} noeuds, table {table.stats()}")
+            return self.move(self.players[self.turn], move = best_move.move)
+        finally:
+            self.processing = False # Même si la recherche échoue : le bot rejouera à la prochaine mise à jour
+
+    def play_bot_async(self) -> Optional[bool]:
+        """
+        Joue le coup du bot si sa recherche est terminée, sinon la lance dans `self.bot_service`
+
+        Returns
+        -------
+        bool : résultat de `move` si un coup a été joué, None si la recherche est en cours
+        """
+        with self.lock:
+            ply = len(self.chessboard.moves)
+            uci = self.bot_service.result(self.id, ply)
+            if uci is not None:
+                move = self.chessboard.move_from_uci(uci)
+                if move is not None:
+                    return self.move(self.players[self.turn], move=move)
+
+            if not self.bot_service.pending(self.id):
+                time_limit = allocate_time(self.get_current_time(self.turn))
+                self.bot_service.submit(self.id, self.chessboard.to_fen(), time_limit, ply)
+            return None
+
+    def cancel_bot(self) -> bool:
+        """Annule la recherche du bot en cours (partie terminée ou joueur parti)"""
+        if self.bot_service is None:
+            return False
+        return self.bot_service.cancel(self.id)
 
 class ConsoleGame(Game):
     def __init__(self):
@@ -0,0 +1,157 @@
+"""
+Perft : compte les positions atteignables à une profondeur donnée.
+
+Sert à vérifier la génération des coups (les totaux des positions de référence sont connus)
+et à mesurer sa vitesse en noeuds par seconde avant / après une optimisation.
+
+Utilisation :
+    python -m app.engine.perft                      # suite de référence
+    python -m app.engine.perft --fen "<FEN>" -d 3   # une position
+    python -m app.engine.perft --divide -d 2        # détail par coup à la racine
+"""
+
+import argparse
+import logging
+import time
+from typing import NamedTuple, Optional
+
+from app.engine.board import ChessBoard
+from app.engine.bitboard import Bitboards
+from app.engine.compact import START_FEN, encode_move, move_to_uci
+
+class PerftPosition(NamedTuple):
+    name: str
+    fen: str
+    nodes: tuple[int, ...] # Nombre de feuilles attendu pour les profondeurs 1, 2, 3...
+
+class PerftResult(NamedTuple):
+    name: str
+    depth: int
+    nodes: int
+    expected: Optional[int]
+    seconds: float
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.expected is None or self.nodes == self.expected
+
+# Positions de référence (https://www.chessprogramming.org/Perft_Results)
+PERFT_SUITE = [
+    PerftPosition("start", START_FEN, (20, 400, 8902, 197281, 4865609)),
+    PerftPosition("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", (48, 2039, 97862, 4085603)),
+    PerftPosition("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624)),
+    PerftPosition("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", (6, 264, 9467, 422333)),
+    PerftPosition("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487)),
+    PerftPosition("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", (46, 2079, 89890, 3894594)),
+]
+
+BACKENDS = ("chessboard", "bitboard")
+
+def perft(board:ChessBoard, depth:int) -> int:
+    """Nombre de feuilles à la profondeur `depth`, en jouant / annulant les coups sur `board`"""
+    if depth == 0:
+        return 1
+    actions = board.get_all_actions()
+    if depth == 1:
+        return len(actions)
+
+    total = 0
+    for move in actions:
+        undo = board.make_move(move)
+        total += perft(board, depth - 1)
+        board.unmake_move(undo)
+    return total
+
+def perft_bitboards(board:Bitboards, depth:int) -> int:
+    """Même calcul directement sur les bitboards (sans passer par les objets `Piece`)"""
+    moves = board.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    return sum(perft_bitboards(board.play(move), depth - 1) for move in moves)
+
+def divide(fen:str, depth:int, backend:str = "chessboard") -> dict[str, int]:
+    """Nombre de feuilles sous chaque coup de la racine, indexé par le coup en notation UCI"""
+    result = {}
+    if backend == "bitboard":
+        board = Bitboards.from_fen(fen)
+        for move in board.legal_moves():
+            result[move_to_uci(move)] = perft_bitboards(board.play(move), depth - 1)
+        return result
+
+    board = ChessBoard.from_fen(fen)
+    for move in board.get_all_actions():
+        undo = board.make_move(move)
+        result[move_to_uci(encode_move(move))] = perft(board, depth - 1)
+        board.unmake_move(undo)
+    return result
+
+def run(fen:str, depth:int, backend:str = "chessboard", name:str = "", expected:Optional[int] = None) -> PerftResult:
+    """Lance un perft chronométré"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+
+    start = time.perf_counter()
+    if backend == "bitboard":
+        nodes = perft_bitboards(Bitboards.from_fen(fen), depth)
+    else:
+        nodes = perft(ChessBoard.from_fen(fen), depth)
+    return PerftResult(name or fen, depth, nodes, expected, time.perf_counter() - start)
+
+def run_suite(max_nodes:int = 100_000, backend:str = "chessboard", positions:list[PerftPosition] = PERFT_SUITE) -> list[PerftResult]:
+    """
+    Lance la suite de référence en choisissant pour chaque position la plus grande profondeur
+    dont le nombre de feuilles attendu reste sous `max_nodes`
+
+    Parameters
+    ----------
+    max_nodes:int
+        Budget de noeuds par position (au moins la profondeur 1 est toujours jouée)
+    """
+    results = []
+    for position in positions:
+        depth = 1
+        while depth < len(position.nodes) and position.nodes[depth] <= max_nodes:
+            depth += 1
+        results.append(run(position.fen, depth, backend, position.name, position.nodes[depth - 1]))
+    return results
+
+def format_result(result:PerftResult) -> str:
+    status = "ok" if result.ok else f"ERREUR (attendu {result.expected})"
+    return f"{result.name:<12} d={result.depth} noeuds={result.nodes:>9} {result.seconds:8.2f}s {result.nps:>10.0f} n/s  {status}"
+
+def main(argv:Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perft : vérification et vitesse de la génération des coups")
+    parser.add_argument("--fen", help="Position à tester (par défaut : suite de référence)")
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument("--divide", action="store_true", help="Affiche le nombre de feuilles sous chaque coup de la racine")
+    parser.add_argument("--backend", choices=BACKENDS, default="chessboard")
+    parser.add_argument("--max-nodes", type=int, default=100_000, help="Budget de noeuds par position pour la suite")
+    args = parser.parse_args(argv)
+
+    if args.divide:
+        counts = divide(args.fen or START_FEN, args.depth, args.backend)
+        for move, nodes in sorted(counts.items()):
+            print(f"{move}: {nodes}")
+        print(f"\nCoups : {len(counts)}  Noeuds : {sum(counts.values())}")
+        return 0
+
+    if args.fen:
+        results = [run(args.fen, args.depth, args.backend)]
+    else:
+        results = run_suite(args.max_nodes, args.backend)
+
+    for result in results:
+        print(format_result(result))
+    nodes = sum(result.nodes for result in results)
+    seconds = sum(result.seconds for result in results)
+    print(f"Total : {nodes} noeuds en {seconds:.2f}s ({nodes / seconds if seconds else 0:.0f} n/s)")
+    return 0 if all(result.ok for result in results) else 1
+
+if __name__ == "__main__":
+    # Les logs de la génération des coups fausseraient la mesure
+    logging.disable(logging.INFO)
+    raise SystemExit(main())
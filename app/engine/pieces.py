@@ -7,6 +7,10 @@ import app.utils.logger_config
 logger = logging.getLogger(app.utils.logger_config.APP_NAME)
 
 class King(Piece):
+    CODE = 6
+    OFFSETS = (-11, -10, -9, -1, 1, 9, 10, 11) # Déplacements dans la grille 10x12 (voir app.engine.compact)
+    SLIDING = False
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2654' if color != WHITE else '\u265A'
@@ -100,6 +104,10 @@ class King(Piece):
         return moves
 
 class Queen(Piece):
+    CODE = 5
+    OFFSETS = (-11, -10, -9, -1, 1, 9, 10, 11)
+    SLIDING = True
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2655' if color != WHITE else '\u265B'
@@ -126,6 +134,10 @@ class Queen(Piece):
 
 class Rook(Piece):
     ROOK_DIRECTIONS = [Position(-1, 0), Position(1, 0), Position(0, -1), Position(0, 1)]
+    CODE = 4
+    OFFSETS = (-10, -1, 1, 10)
+    SLIDING = True
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2656' if color != WHITE else '\u265C'
@@ -152,6 +164,10 @@ class Rook(Piece):
 
 class Bishop(Piece):
     BISHOP_DIRECTIONS = [Position(1, 1), Position(1, -1), Position(-1, -1), Position(-1, 1)]
+    CODE = 3
+    OFFSETS = (-11, -9, 9, 11)
+    SLIDING = True
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2657' if color != WHITE else '\u265D'
@@ -177,6 +193,10 @@ class Bishop(Piece):
         return moves
 
 class Knight(Piece):
+    CODE = 2
+    OFFSETS = (-21, -19, -12, -8, 8, 12, 19, 21)
+    SLIDING = False
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2658' if color != WHITE else '\u265E'
@@ -207,6 +227,10 @@ class Knight(Piece):
 
 class Pawn(Piece):
     NEW_PIECE_TYPE = Queen
+    CODE = 1
+    OFFSETS = (-11, -9) # Prises du pion blanc, opposées pour le pion noir
+    SLIDING = False
+
     def __init__(self, color: str, initial_position: Position):
         super().__init__(color)
         self.symbol = '\u2659' if color != WHITE else '\u265F'
@@ -247,30 +271,26 @@ class Pawn(Piece):
     
     def get_en_passant(self, pos:Position, board) -> Optional[EnPassant]:
         """Regarde si une prise en passant est possible à une position donnée"""
-        moves = []
-        if not board.moves:
-            return None
-        
-        last_move = board.moves[-1]
-        if not isinstance(last_move.piece, Pawn):
+        new_pos = board.en_passant # Case derrière le pion qui vient d'avancer de deux cases
+        if new_pos is None:
             return None
         
-        if abs(last_move.start_pos.y - last_move.end_pos.y) != 2:
+        if new_pos.y != pos.y + self.direction:
             return None
         
-        if last_move.end_pos.y != pos.y:
+        if abs(new_pos.x - pos.x) != 1:
             return None
         
-        if abs(last_move.end_pos.x - pos.x) != 1:
+        captured = board.board[pos.y][new_pos.x]
+        if not isinstance(captured, Pawn) or captured.color == self.color:
             return None
         
-        new_pos = Position(last_move.end_pos.x, last_move.end_pos.y + self.direction)
         if self.is_valid_pos(pos, new_pos, board.board) == 0:
             return EnPassant(
                 self,
                 pos,
                 new_pos,
-                last_move.end_pos,
+                Position(new_pos.x, pos.y),
             )
         
         return None
@@ -0,0 +1,88 @@
+"""
+Tables pièce-case : bonus (en centièmes de pion) d'une pièce selon sa case.
+
+Les tables sont écrites du point de vue des blancs, rangée 8 en premier (même ordre que `ChessBoard.board`) :
+la case d'une pièce noire est retournée verticalement (`sq ^ 56`).
+"""
+
+from app.engine.utils import Piece, Position, WHITE
+from app.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+
+PAWN_TABLE = (
+     0,  0,  0,  0,  0,  0,  0,  0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+     5,  5, 10, 25, 25, 10,  5,  5,
+     0,  0,  0, 20, 20,  0,  0,  0,
+     5, -5,-10,  0,  0,-10, -5,  5,
+     5, 10, 10,-20,-20, 10, 10,  5,
+     0,  0,  0,  0,  0,  0,  0,  0,
+)
+
+KNIGHT_TABLE = (
+    -50,-40,-30,-30,-30,-30,-40,-50,
+    -40,-20,  0,  0,  0,  0,-20,-40,
+    -30,  0, 10, 15, 15, 10,  0,-30,
+    -30,  5, 15, 20, 20, 15,  5,-30,
+    -30,  0, 15, 20, 20, 15,  0,-30,
+    -30,  5, 10, 15, 15, 10,  5,-30,
+    -40,-20,  0,  5,  5,  0,-20,-40,
+    -50,-40,-30,-30,-30,-30,-40,-50,
+)
+
+BISHOP_TABLE = (
+    -20,-10,-10,-10,-10,-10,-10,-20,
+    -10,  0,  0,  0,  0,  0,  0,-10,
+    -10,  0,  5, 10, 10,  5,  0,-10,
+    -10,  5,  5, 10, 10,  5,  5,-10,
+    -10,  0, 10, 10, 10, 10,  0,-10,
+    -10, 10, 10, 10, 10, 10, 10,-10,
+    -10,  5,  0,  0,  0,  0,  5,-10,
+    -20,-10,-10,-10,-10,-10,-10,-20,
+)
+
+ROOK_TABLE = (
+     0,  0,  0,  0,  0,  0,  0,  0,
+     5, 10, 10, 10, 10, 10, 10,  5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+    -5,  0,  0,  0,  0,  0,  0, -5,
+     0,  0,  0,  5,  5,  0,  0,  0,
+)
+
+QUEEN_TABLE = (
+    -20,-10,-10, -5, -5,-10,-10,-20,
+    -10,  0,  0,  0,  0,  0,  0,-10,
+    -10,  0,  5,  5,  5,  5,  0,-10,
+     -5,  0,  5,  5,  5,  5,  0, -5,
+      0,  0,  5,  5,  5,  5,  0, -5,
+    -10,  5,  5,  5,  5,  5,  0,-10,
+    -10,  0,  5,  0,  0,  0,  0,-10,
+    -20,-10,-10, -5, -5,-10,-10,-20,
+)
+
+KING_TABLE = (
+    -30,-40,-40,-50,-50,-40,-40,-30,
+    -30,-40,-40,-50,-50,-40,-40,-30,
+    -30,-40,-40,-50,-50,-40,-40,-30,
+    -30,-40,-40,-50,-50,-40,-40,-30,
+    -20,-30,-30,-40,-40,-30,-30,-20,
+    -10,-20,-20,-20,-20,-20,-20,-10,
+     20, 20,  0,  0,  0,  0, 20, 20,
+     20, 30, 10,  0,  0, 10, 30, 20,
+)
+
+# PIECE_SQUARE[code de la pièce][case] (indice 0 inutilisé, les codes commencent à 1)
+PIECE_SQUARE = [(0,) * 64] * 7
+for _cls, _table in ((Pawn, PAWN_TABLE), (Knight, KNIGHT_TABLE), (Bishop, BISHOP_TABLE), (Rook, ROOK_TABLE), (Queen, QUEEN_TABLE), (King, KING_TABLE)):
+    PIECE_SQUARE[_cls.CODE] = _table
+
+def square_value(code:int, white:bool, sq:int) -> int:
+    """Bonus d'une pièce (code positif) de la couleur donnée sur la case `sq`"""
+    return PIECE_SQUARE[code][sq if white else sq ^ 56]
+
+def piece_value(piece:Piece, pos:Position) -> int:
+    """Bonus d'un objet `Piece` sur une position"""
+    return square_value(piece.CODE, piece.color == WHITE, pos.y * 8 + pos.x)
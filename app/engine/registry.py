@@ -0,0 +1,236 @@
+# ---------------------------------------------------------------------
+# Registre des parties : création explicite, éviction et mémoire utilisée
+#----------------------------------------------------------------------
+
+from collections import OrderedDict
+from typing import Callable, Iterator, NamedTuple, Optional
+import gc
+import sys
+import threading
+import time
+import types
+
+from app.engine.game import Game
+from app.engine.store import GameStore
+
+MAX_GAMES = 5000
+IDLE_TTL = 30 * 60 # Secondes sans requête avant qu'une partie soit considérée abandonnée
+FINISHED_TTL = 5 * 60 # Secondes sans requête avant qu'une partie terminée soit retirée
+SWEEP_INTERVAL = 30 # Secondes minimales entre deux recherches de parties à retirer
+SIZE_SAMPLE = 20 # Parties mesurées pour estimer la mémoire par partie
+
+class RegistryStats(NamedTuple):
+    games:int
+    finished:int
+    created:int
+    evicted:int
+    rejected:int # Créations refusées car le registre était plein
+    max_games:int
+    bytes_per_game:int # Estimation à partir d'un échantillon de parties
+    total_bytes:int
+
+def approximate_size(obj, exclude:set[int]) -> int:
+    """
+    Taille approximative (en octets) d'un objet et de tout ce qu'il référence, hors objets de `exclude`
+    (ids des objets partagés entre les parties), classes, modules et fonctions
+    """
+    seen = set(exclude)
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+    return total
+
+class GameRegistry:
+    """
+    Parties indexées par leur id. Une partie n'est créée que par `create` (jamais par une simple lecture) ;
+    les parties terminées ou abandonnées sont retirées après un délai sans requête.
+    """
+    def __init__(self, factory:Callable[[], Game] = Game, max_games:int = MAX_GAMES, idle_ttl:float = IDLE_TTL, finished_ttl:float = FINISHED_TTL, clock:Callable[[], float] = time.monotonic, store:Optional[GameStore] = None):
+        """
+        Parameters
+        ----------
+        factory:Callable
+            Crée une nouvelle partie
+        max_games:int
+            Nombre maximal de parties gardées en mémoire
+        idle_ttl:float
+            Secondes sans requête après lesquelles une partie en cours est retirée
+        finished_ttl:float
+            Secondes sans requête après lesquelles une partie terminée est retirée
+        store:GameStore
+            Si spécifié, les parties y sont enregistrées : une partie retirée de la mémoire (ou d'un autre processus)
+            est reconstruite à sa prochaine lecture
+        """
+        self.factory = factory
+        self.max_games = max_games
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.clock = clock
+        self.store = store
+        self.games:OrderedDict[str, Game] = OrderedDict() # Du moins récemment utilisé au plus récent
+        self.last_access:dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+        self._last_sweep = clock()
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def __contains__(self, game_id:str) -> bool:
+        return game_id in self.games
+
+    def __iter__(self) -> Iterator[str]:
+        with self.lock:
+            return iter(list(self.games))
+
+    def _touch(self, game_id:str, now:float):
+        self.games.move_to_end(game_id)
+        self.last_access[game_id] = now
+
+    def touch(self, game_id:str) -> bool:
+        """
+        Marque la partie comme utilisée sans la lire : appelée par les connexions persistantes (flux SSE, WebSocket)
+        pour qu'une partie seulement regardée ne soit pas retirée. Retourne False si la partie n'est plus dans le registre.
+        """
+        now = self.clock()
+        with self.lock:
+            if game_id not in self.games:
+                return False
+            self._touch(game_id, now)
+        return True
+
+    def get(self, game_id:str, default:Optional[Game] = None) -> Optional[Game]:
+        """Retourne la partie (et la marque comme utilisée), `default` si elle n'existe pas"""
+        now = self.clock()
+        with self.lock:
+            game = self.games.get(game_id)
+            if game is not None:
+                self._touch(game_id, now)
+        if game is None:
+            game = self._load(game_id, now)
+            if game is None:
+                return default
+        else:
+            game.sync() # Evènements écrits par les autres processus
+        self.maybe_sweep(now)
+        return game
+
+    def _load(self, game_id:str, now:float) -> Optional[Game]:
+        """Reconstruit une partie absente de la mémoire depuis le stockage"""
+        if self.store is None:
+            return None
+        game = self.store.load(game_id, self.factory)
+        if game is None:
+            return None
+        with self.lock:
+            if game_id in self.games: # Chargée entre temps par une autre requête
+                game = self.games[game_id]
+            elif len(self.games) >= self.max_games and not self._evict_finished():
+                self.rejected += 1
+                return None
+            else:
+                self.games[game_id] = game
+            self._touch(game_id, now)
+        return game
+
+    def create(self, game_id:str) -> Optional[Game]:
+        """
+        Retourne la partie si elle existe, sinon la crée
+
+        Returns
+        -------
+        Game : None si le registre est plein et qu'aucune partie terminée ne peut être retirée
+        """
+        now = self.clock()
+        with self.lock:
+            game = self.games.get(game_id)
+            if game is not None:
+                self._touch(game_id, now)
+                return game
+
+        game = self._load(game_id, now)
+        if game is not None:
+            return game
+
+        if len(self.games) >= self.max_games:
+            self.sweep(now)
+        with self.lock:
+            if len(self.games) >= self.max_games and not self._evict_finished():
+                self.rejected += 1
+                return None
+            game = self.games.get(game_id) # Créée entre temps par une autre requête
+            if game is None:
+                game = self.factory()
+                if self.store is not None:
+                    self.store.register(game_id, game)
+                self.games[game_id] = game
+                self.created += 1
+            self._touch(game_id, now)
+            return game
+
+    def remove(self, game_id:str) -> bool:
+        with self.lock:
+            game = self.games.pop(game_id, None)
+            self.last_access.pop(game_id, None)
+        if game is None:
+            return False
+        game.cancel_bot()
+        return True
+
+    def _evict_finished(self) -> bool:
+        """Retire la partie terminée la moins récemment utilisée (appelée avec `self.lock`)"""
+        for game_id, game in self.games.items():
+            if game.end:
+                del self.games[game_id]
+                del self.last_access[game_id]
+                self.evicted += 1
+                game.cancel_bot()
+                return True
+        return False
+
+    def expired(self, game_id:str, game:Game, now:float) -> bool:
+        idle = now - self.last_access[game_id]
+        return idle > (self.finished_ttl if game.end else self.idle_ttl)
+
+    def sweep(self, now:Optional[float] = None) -> int:
+        """Retire les parties terminées ou abandonnées, retourne leur nombre"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            self._last_sweep = now
+            expired = [(game_id, game) for game_id, game in self.games.items() if self.expired(game_id, game, now)]
+            for game_id, _ in expired:
+                del self.games[game_id]
+                del self.last_access[game_id]
+            self.evicted += len(expired)
+        for _, game in expired:
+            game.cancel_bot()
+        return len(expired)
+
+    def maybe_sweep(self, now:float):
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self.sweep(now)
+
+    def stats(self, sample:int = SIZE_SAMPLE) -> RegistryStats:
+        """Statistiques du registre, la mémoire par partie est mesurée sur les `sample` parties les plus récentes"""
+        with self.lock:
+            games = list(self.games.values())
+        finished = sum(1 for game in games if game.end)
+
+        measured = games[-sample:]
+        bytes_per_game = 0
+        if measured:
+            # Objets partagés par toutes les parties : comptés une seule fois, hors parties
+            shared = set()
+            for game in measured:
+                shared.update(id(obj) for obj in (game.bot_service, game.evaluations, game.store, game.lock, game.changed))
+            bytes_per_game = sum(approximate_size(game, shared) for game in measured) // len(measured)
+
+        return RegistryStats(len(games), finished, self.created, self.evicted, self.rejected, self.max_games, bytes_per_game, bytes_per_game * len(games))
@@ -0,0 +1,115 @@
+# ---------------------------------------------------------------------
+# Lecture des coups en notation algébrique standard (SAN : "Nbd7",
+# "exd6", "e8=Q+", "O-O") à partir des tables d'attaques des bitboards
+#----------------------------------------------------------------------
+
+from typing import Optional
+import re
+
+from app.engine.bitboard import Bitboards, BB_SQUARES, RANKS, COLOR_INDEX, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, squares_of, rook_attacks, bishop_attacks
+from app.engine.compact import encode, decode_move, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, EN_PASSANT, CASTLE
+from app.engine.utils import Move, WHITE
+
+SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$")
+CASTLING = re.compile(r"^([O0])-\1(-\1)?[+#]?[!?]*$")
+
+PIECE_CODES = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+FILES = [0x0101010101010101 << x for x in range(8)] # FILES[x] : colonne x du repère `Position`
+
+class SanError(ValueError):
+    """Coup illisible, impossible ou ambigu dans la position"""
+
+def parse_san(bitboards:Bitboards, san:str) -> int:
+    """
+    Retourne le coup encodé (voir app.engine.compact) correspondant au coup SAN dans la position.
+    Les pièces pouvant aller sur la case d'arrivée sont trouvées par les attaques depuis cette case,
+    filtrées par la colonne ou la rangée donnée, puis seuls les coups restants sont vérifiés (roi pas en échec).
+
+    Raises
+    ------
+    SanError : si aucun coup légal ou plusieurs coups légaux correspondent
+    """
+    color = bitboards.turn
+    us = COLOR_INDEX[color]
+    o = us * 6
+    p = bitboards.pieces
+
+    castling = CASTLING.match(san)
+    if castling is not None:
+        king_sq = 60 if color == WHITE else 4
+        move = encode(king_sq, king_sq - 2 if castling.group(2) else king_sq + 2, flag=CASTLE)
+        if move not in bitboards.legal_moves(color, BB_SQUARES[king_sq]):
+            raise SanError(f"Roque impossible : {san}")
+        return move
+
+    match = SAN.match(san)
+    if match is None:
+        raise SanError(f"Coup illisible : {san}")
+    letter, file, rank, target, promotion = match.groups()
+    end = (8 - int(target[1])) * 8 + ord(target[0]) - ord("a")
+    end_bit = BB_SQUARES[end]
+    occupied = bitboards.occupancy[0] | bitboards.occupancy[1]
+    if bitboards.occupancy[us] & end_bit:
+        raise SanError(f"Case d'arrivée occupée : {san}")
+
+    flag = 0
+    code = PIECE_CODES[letter] if letter else PAWN
+    if code == PAWN:
+        step = 8 if us == 0 else -8 # Case d'où vient un pion qui avance
+        if file is not None and file != target[0]: # Prise
+            candidates = PAWN_ATTACKS[1 - us][end] & p[o + PAWN - 1]
+            if end == bitboards.en_passant and not occupied & end_bit:
+                flag = EN_PASSANT
+            elif not occupied & end_bit:
+                raise SanError(f"Aucune pièce à prendre : {san}")
+        elif occupied & end_bit:
+            raise SanError(f"Case d'arrivée occupée : {san}")
+        else:
+            candidates = p[o + PAWN - 1] & BB_SQUARES[end + step] if 0 <= end + step < 64 else 0
+            double_rank = RANKS[4] if us == 0 else RANKS[3]
+            if not candidates and end_bit & double_rank and not occupied & BB_SQUARES[end + step]:
+                candidates = p[o + PAWN - 1] & BB_SQUARES[end + 2 * step]
+        last_rank = RANKS[0] if us == 0 else RANKS[7]
+        if bool(end_bit & last_rank) != (promotion is not None):
+            raise SanError(f"Promotion manquante ou impossible : {san}")
+    else:
+        if promotion is not None:
+            raise SanError(f"Seuls les pions sont promus : {san}")
+        if code == KNIGHT:
+            attacks = KNIGHT_ATTACKS[end]
+        elif code == BISHOP:
+            attacks = bishop_attacks(end, occupied)
+        elif code == ROOK:
+            attacks = rook_attacks(end, occupied)
+        elif code == QUEEN:
+            attacks = bishop_attacks(end, occupied) | rook_attacks(end, occupied)
+        else:
+            attacks = KING_ATTACKS[end]
+        candidates = attacks & p[o + code - 1] # Pièces qui atteignent la case d'arrivée
+
+    # Désambiguïsation ("Nbd7", "R1e2", "Qh4e1")
+    if file is not None:
+        candidates &= FILES[ord(file) - ord("a")]
+    if rank is not None:
+        candidates &= RANKS[8 - int(rank)]
+
+    promotion_code = PIECE_CODES[promotion] if promotion is not None else 0
+    legal = [move for move in (encode(start, end, promotion_code, flag) for start in squares_of(candidates))
+             if not bitboards.play(move).in_check(color)]
+    if len(legal) != 1:
+        raise SanError(f"{'Coup ambigu' if legal else 'Coup impossible'} : {san}")
+    return legal[0]
+
+def san_to_move(board, san:str, bitboards:Optional[Bitboards] = None) -> Move:
+    """
+    Retourne l'objet `Move` (ou `Roque`, `Promotion`, `EnPassant`) correspondant au coup SAN sur un `ChessBoard`.
+    Le coup est légal : il peut être joué directement avec `board.make_move`.
+
+    Parameters
+    ----------
+    bitboards:Bitboards
+        Position de `board` sous forme de bitboards si elle est déjà calculée
+    """
+    if bitboards is None:
+        bitboards = board.bitboards()
+    return decode_move(board.board, parse_san(bitboards, san))
@@ -0,0 +1,207 @@
+# ---------------------------------------------------------------------
+# Stockage des parties : journal des évènements (SQLite en mode WAL) et instantanés
+#----------------------------------------------------------------------
+
+from contextlib import contextmanager
+from typing import Callable, Optional
+import json
+import sqlite3
+import threading
+import time
+
+from app.engine.chat import Message
+
+SNAPSHOT_INTERVAL = 20 # Evènements entre deux instantanés d'une partie
+BUSY_TIMEOUT = 10_000 # Millisecondes d'attente du verrou d'écriture (autres processus)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    game_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    message_id INTEGER, -- Id du message pour les évènements "message" (pages de l'historique du chat)
+    PRIMARY KEY (game_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_messages ON events (game_id, message_id) WHERE message_id IS NOT NULL;
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+class GameStore:
+    """
+    Journal en ajout seul des évènements de chaque partie (arrivée et départ des joueurs, coups, messages)
+    et instantané de la partie tous les `snapshot_interval` évènements.
+
+    Une partie est reconstruite à partir de son dernier instantané en rejouant seulement les évènements suivants.
+    Les instantanés sont écrits après la validation de la transaction qui atteint `snapshot_interval` évènements.
+    Plusieurs processus peuvent partager le même fichier : chaque modification d'une partie se fait dans une
+    transaction d'écriture qui commence par rejouer les évènements écrits par les autres processus.
+    """
+    def __init__(self, path:str, snapshot_interval:int = SNAPSHOT_INTERVAL):
+        """
+        Parameters
+        ----------
+        path:str
+            Fichier de la base SQLite
+        snapshot_interval:int
+            Nombre d'évènements entre deux instantanés d'une partie
+        """
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self._local = threading.local() # Une connexion par thread
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None : les transactions sont ouvertes explicitement (`transaction`)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT / 1000, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # ------------------------ Parties ------------------------
+    def register(self, key:str, game):
+        """Enregistre une nouvelle partie (ou rattache `game` à la partie créée entre temps par un autre processus)"""
+        self.connection().execute("INSERT OR IGNORE INTO games (id, created) VALUES (?, ?)", (key, time.time()))
+        game.attach(self, key)
+        self.sync(game)
+
+    def load(self, key:str, factory:Callable) -> Optional[object]:
+        """
+        Reconstruit une partie : dernier instantané puis évènements suivants
+
+        Returns
+        -------
+        Game : None si la partie n'existe pas
+        """
+        connection = self.connection()
+        if connection.execute("SELECT 1 FROM games WHERE id = ?", (key,)).fetchone() is None:
+            return None
+        game = factory()
+        game.attach(self, key)
+        self.rebuild(game)
+        return game
+
+    def rebuild(self, game):
+        """Remet la partie dans l'état du journal : dernier instantané puis évènements suivants"""
+        row = self.connection().execute("SELECT seq, state FROM snapshots WHERE game_id = ?", (game.key,)).fetchone()
+        if row is None:
+            game.reset()
+            game.seq = 0
+        else:
+            game.restore(json.loads(row[1]))
+            game.seq = row[0]
+        self.sync(game)
+
+    # ------------------------ Journal ------------------------
+    @contextmanager
+    def transaction(self, game):
+        """
+        Transaction d'écriture : la partie est d'abord mise à jour avec les évènements des autres processus.
+        Si la transaction échoue, la partie est reconstruite depuis le journal (les modifications en mémoire sont annulées).
+        """
+        connection = self.connection()
+        if connection.in_transaction: # Transaction déjà ouverte par l'appelant
+            yield
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.sync(game)
+            start = game.seq
+            yield
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            try:
+                self.rebuild(game)
+            except sqlite3.Error:
+                pass # Base inaccessible : l'erreur d'origine est remontée
+            raise
+
+        # Instantané après la validation : son échec ne touche ni le journal ni la partie
+        if game.seq // self.snapshot_interval > start // self.snapshot_interval:
+            try:
+                self.write_snapshot(game)
+            except sqlite3.Error:
+                pass
+
+    def append(self, game, kind:str, payload:dict):
+        """Ajoute un évènement au journal de la partie (`game.seq` n'avance que si l'écriture a réussi)"""
+        seq = game.seq + 1
+        self.connection().execute(
+            "INSERT INTO events (game_id, seq, kind, payload, message_id) VALUES (?, ?, ?, ?, ?)",
+            (game.key, seq, kind, json.dumps(payload), payload.get("id") if kind == "message" else None),
+        )
+        game.seq = seq
+
+    def write_snapshot(self, game):
+        """Instantané de la partie, gardé seulement s'il est plus récent que celui déjà enregistré"""
+        self.connection().execute(
+            "INSERT INTO snapshots (game_id, seq, state) VALUES (?, ?, ?) "
+            "ON CONFLICT (game_id) DO UPDATE SET seq = excluded.seq, state = excluded.state WHERE excluded.seq > snapshots.seq",
+            (game.key, game.seq, json.dumps(game.dump())),
+        )
+
+    def sync(self, game) -> int:
+        """Applique à la partie les évènements qu'elle n'a pas encore vus, retourne leur nombre"""
+        rows = self.connection().execute(
+            "SELECT seq, kind, payload FROM events WHERE game_id = ? AND seq > ? ORDER BY seq",
+            (game.key, game.seq),
+        ).fetchall()
+        for seq, kind, payload in rows:
+            game.apply_event(kind, json.loads(payload))
+            game.seq = seq
+        if rows:
+            game.notify()
+        return len(rows)
+
+    def latest_seqs(self, keys:list[str]) -> dict[str, int]:
+        """Numéro du dernier évènement de chaque partie (lu par la clé primaire, sans parcourir les journaux)"""
+        seqs = {}
+        for i in range(0, len(keys), 500): # Limite du nombre de paramètres d'une requête
+            chunk = keys[i:i + 500]
+            rows = self.connection().execute(
+                "SELECT id, (SELECT MAX(seq) FROM events WHERE game_id = games.id) FROM games "
+                f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            seqs.update((key, seq or 0) for key, seq in rows)
+        return seqs
+
+    def messages(self, key:str, after_id:int, before_id:int, limit:int, oldest:bool = False) -> list[Message]:
+        """
+        Messages du chat d'id dans ]after_id, before_id[ (les `limit` plus récents, ou plus anciens si `oldest`), lus dans le journal.
+        Seules les lignes de la page sont lues, par l'index `events_messages`.
+        """
+        rows = self.connection().execute(
+            "SELECT payload FROM events WHERE game_id = ? AND message_id > ? AND message_id < ? "
+            f"ORDER BY message_id {'ASC' if oldest else 'DESC'} LIMIT ?",
+            (key, after_id, before_id, limit),
+        ).fetchall()
+        payloads = [json.loads(row[0]) for row in (rows if oldest else reversed(rows))]
+        return [Message(payload["sender"], payload["content"], payload["id"]) for payload in payloads]
+
+    def events(self, key:str, after:int = 0) -> list[tuple[int, str, dict]]:
+        """Evènements de la partie après le numéro `after`"""
+        rows = self.connection().execute(
+            "SELECT seq, kind, payload FROM events WHERE game_id = ? AND seq > ? ORDER BY seq", (key, after)
+        ).fetchall()
+        return [(seq, kind, json.loads(payload)) for seq, kind, payload in rows]
@@ -44,16 +44,10 @@ class Piece:
         self.has_moved = False
 
     def get_moves(self, pos: Position, board) -> list:
-        if self.initial_position != pos:
-            self.has_moved = True
-
         return []
     
     def special_moves(self, pos:Position, board) -> list:
-        if self.initial_position != pos:
-            self.has_moved = True
-
-        return []
+        return [] # `has_moved` est mis à jour par `ChessBoard.make_move`
     
     def is_valid_pos(self, initial_pos: Position, new_pos: Position, board: list[list]) -> int:
         """
@@ -0,0 +1,91 @@
+"""
+Clés de Zobrist : identifiant 64 bits d'une position (pièces, trait, droits de roque, colonne de prise en passant).
+
+La clé d'une position est le XOR des clés de ses composants, ce qui permet de la mettre à jour
+à chaque coup en ne touchant que les cases modifiées (voir `ChessBoard.make_move`).
+"""
+
+import random
+from typing import Optional
+
+from app.engine.utils import Position, Piece, WHITE, BLACK
+from app.engine.pieces import Pawn
+
+_random = random.Random(0x5EED) # Graine fixe : les clés sont identiques d'un processus à l'autre
+
+def _key() -> int:
+    return _random.getrandbits(64)
+
+# PIECE_KEYS[indice de la pièce][case], indice = code de la pièce - 1 (+ 6 pour les noirs)
+PIECE_KEYS = [[_key() for _ in range(64)] for _ in range(12)]
+SIDE_KEY = _key() # Ajoutée quand les noirs ont le trait
+_CASTLING_BITS = [_key() for _ in range(4)]
+# Une clé par combinaison de droits de roque (`WHITE_KINGSIDE | ...`)
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit, _bit_key in enumerate(_CASTLING_BITS):
+        if _rights & (1 << _bit):
+            CASTLING_KEYS[_rights] ^= _bit_key
+EN_PASSANT_KEYS = [_key() for _ in range(8)]
+
+def piece_key(piece:Piece, pos:Position) -> int:
+    """Clé d'une pièce sur une case"""
+    return PIECE_KEYS[piece.CODE - 1 + (0 if piece.color == WHITE else 6)][pos.y * 8 + pos.x]
+
+def en_passant_key(board:list[list[Optional[Piece]]], en_passant:Optional[Position], turn:str) -> int:
+    """
+    Clé de la colonne de prise en passant, seulement si un pion de la couleur qui a le trait peut prendre :
+    deux positions identiques ne doivent pas avoir de clés différentes à cause d'une prise impossible
+    """
+    if en_passant is None:
+        return 0
+    y = en_passant.y + (1 if turn == WHITE else -1) # Rangée du pion qui vient d'avancer de deux cases
+    if not 0 <= y < 8:
+        return 0
+    for x in (en_passant.x - 1, en_passant.x + 1):
+        if 0 <= x < 8:
+            piece = board[y][x]
+            if isinstance(piece, Pawn) and piece.color == turn:
+                return EN_PASSANT_KEYS[en_passant.x]
+    return 0
+
+def hash_board(board:list[list[Optional[Piece]]], turn:str, castling:int, en_passant:Optional[Position] = None) -> int:
+    """
+    Calcule la clé complète d'une position
+
+    Parameters
+    ----------
+    board:list
+        Matrice 8x8 d'objets `Piece`
+    turn:str
+        Couleur qui doit jouer
+    castling:int
+        Masque des droits de roque
+    en_passant:Position
+        Case de prise en passant ou None
+    """
+    key = 0
+    for y, row in enumerate(board):
+        for x, piece in enumerate(row):
+            if piece is not None:
+                key ^= PIECE_KEYS[piece.CODE - 1 + (0 if piece.color == WHITE else 6)][y * 8 + x]
+    if turn == BLACK:
+        key ^= SIDE_KEY
+    return key ^ CASTLING_KEYS[castling] ^ en_passant_key(board, en_passant, turn)
+
+def hash_compact(compact) -> int:
+    """Calcule la clé d'une `CompactBoard` (identique à celle de la `ChessBoard` correspondante)"""
+    key = 0
+    for sq, code in enumerate(compact.squares):
+        if code:
+            key ^= PIECE_KEYS[code - 1 if code > 0 else -code + 5][sq]
+    if compact.turn == BLACK:
+        key ^= SIDE_KEY
+    key ^= CASTLING_KEYS[compact.castling]
+    if compact.en_passant != -1:
+        ep = compact.en_passant
+        y = ep // 8 + (1 if compact.turn == WHITE else -1)
+        pawn = Pawn.CODE if compact.turn == WHITE else -Pawn.CODE
+        if any(0 <= x < 8 and 0 <= y < 8 and compact.squares[y * 8 + x] == pawn for x in (ep % 8 - 1, ep % 8 + 1)):
+            key ^= EN_PASSANT_KEYS[ep % 8]
+    return key
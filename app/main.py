@@ -1,12 +1,17 @@
-from flask import Flask, render_template, request, jsonify, session
-from flask import redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, Response
+from flask import redirect, url_for, flash, abort, make_response
 
-from collections import defaultdict
+import atexit
+import json
+import os
 import uuid
 import logging
 
 import app.utils.logger_config # Initialise le logger
 from app.engine.game import Game
+from app.engine.registry import GameRegistry
+from app.engine.store import GameStore
+from app.bot.service import BotService
 from app.engine.board import board_to_fen
 from app.engine.utils import string_to_position, position_to_string, Move
 from app.engine.utils import WHITE, BLACK
@@ -14,6 +19,9 @@ from app.utils.constants import *
 
 ID_GAME_SIZE = 8
 MIN_USERNAME_SIZE = 4
+POLL_TIMEOUT = 25 # Secondes d'attente maximale d'une requête `/wait_update`
+KEEPALIVE_INTERVAL = 15 # Secondes entre deux commentaires envoyés sur un flux `/events` inactif
+MAX_BATCH_GAMES = 200 # Parties par requête `/get_boards`
 
 logger = logging.getLogger(app.utils.logger_config.APP_NAME)
 app = Flask(__name__)
@@ -23,16 +31,30 @@ app.secret_key = '5QuF6Rq9GQ'
 # Création des données
 # ---------------------------------------------------------------------------
 
+# Recherches du bot dans des processus séparés, partagés par toutes les parties
+# Si WEB_CHESS_BOOK est définie, le bot joue les coups de ce livre d'ouvertures tant que la position y est
+bot_service = BotService(book_path=os.environ.get("WEB_CHESS_BOOK") or None, split_workers=int(os.environ.get("WEB_CHESS_SPLIT_WORKERS") or 0))
+atexit.register(bot_service.shutdown, False)
+
 def create_game_instance():
-    game = Game()
+    game = Game(bot_service)
     return game
 
 def generate_username_uuid():
     return f"user_{str(uuid.uuid4())[:3]}"
 
-games = defaultdict(create_game_instance)
+# Si WEB_CHESS_DB est définie, les parties sont enregistrées dans cette base SQLite (partagée entre les processus du serveur)
+store = GameStore(os.environ["WEB_CHESS_DB"]) if os.environ.get("WEB_CHESS_DB") else None
+games = GameRegistry(create_game_instance, store=store) # Parties créées seulement en ouvrant leur page, retirées une fois terminées ou abandonnées
 players = set()
 
+def get_game(game_id:str) -> Game:
+    """Retourne la partie, répond 404 si elle n'existe pas (une requête ne crée jamais de partie)"""
+    game = games.get(game_id)
+    if game is None:
+        abort(make_response(jsonify({"error": PARTIE_INTROUVABLE}), 404))
+    return game
+
 @app.route("/is_valid_username", methods=["POST"])
 def is_valid_username():
     data = request.get_json()
@@ -89,18 +111,24 @@ def add_message():
     message = data.get("message")
     username = session.get("player")
 
-    result = games[id].add_message(message, username)
+    result = get_game(id).add_message(message, username)
 
     return jsonify({"valid": result})
 
 @app.route("/get_messages", methods=['POST'])
 def get_messages():
+    """
+    Messages du chat à partir d'un curseur (aucun index de lecture n'est gardé par le serveur)
+    ---
+    Reçoit : {"id": "id partie", "since_id": id du dernier message reçu} ou {"id": "id partie", "before_id": id} (historique)
+    Renvoie : {"messages": [{"id": int, "sender": str, "content": str}, ...]}
+    """
     data = request.get_json()
     id = data.get("id")
-    reset = data.get("reset")
-    username = session.get("player")
+    since_id = data.get("since_id") or 0
+    before_id = data.get("before_id")
 
-    messages = games[id].get_messages(username, reset)
+    messages = get_game(id).get_messages(since_id, before_id)
 
     return jsonify({"messages": messages})
 
@@ -115,15 +143,18 @@ def game_page(game_id):
         return redirect(url_for("home"))
     current_games = session.get("games", {})
     player = session.get("player")
-    logger.warning(games)
+    game = games.create(game_id)
+    if game is None:
+        flash(SERVEUR_COMPLET, "error")
+        return redirect(url_for("home"))
 
-    valid_join = games[game_id].join(player, None, False)
+    valid_join = game.join(player, None, False)
     
     if not valid_join:
         flash(ERROR_JOIN, "error")
         return redirect(url_for("home"))
     
-    orientation = games[game_id].get_orientation(player)
+    orientation = game.get_orientation(player)
     if game_id not in current_games:
         current_games[game_id] = orientation
         session["games"] = current_games
@@ -131,7 +162,7 @@ def game_page(game_id):
     else:
         orientation = session["games"][game_id]
 
-    games[game_id].join("bot1", None, True)
+    game.join("bot1", None, True)
 
     return render_template('game.html', game_id=game_id, orientation=orientation)
 
@@ -152,7 +183,7 @@ def get_moves():
     id = data.get('id')
     username = session.get("player")
 
-    moves_str = games[id].get_moves(source, username)
+    moves_str = get_game(id).get_moves(source, username)
 
     logger.debug(f"Coups trouvés pour la pièce ({source}) : {moves_str}")
     return jsonify({"moves": moves_str})
@@ -171,7 +202,7 @@ def move_piece():
     id = data.get("id")
     username = session.get("player")
 
-    valid = games[id].move(username, source, dest)
+    valid = get_game(id).move(username, source, dest)
     
     logger.debug(f"Validation du coups : {valid}")
     return jsonify({"valid": valid})
@@ -189,17 +220,93 @@ def get_board():
     data = request.get_json()
     id = data.get("id")
 
-    current_state = games[id].get_current_state()
+    current_state = get_game(id).get_current_state()
     
     return jsonify(current_state)
 
+@app.route("/get_boards", methods=["POST"])
+def get_boards():
+    """
+    Etat de plusieurs parties en une requête (pages de suivi des parties), seulement celles qui ont changé
+    ---
+    Reçoit : {"games": {"id partie": dernière version reçue, -1 si aucune}} ou {"games": ["id partie", ...]}
+    Renvoie : {"games": {"id partie": {...`get_current_state`, "version": int, "turn": str}}, "missing": [ids inconnus]}
+    """
+    data = request.get_json()
+    requested = data.get("games") or {}
+    if isinstance(requested, list):
+        requested = {game_id: -1 for game_id in requested}
+    if not isinstance(requested, dict):
+        return jsonify({"error": "\"games\" doit être un objet ou une liste"}), 400
+    if len(requested) > MAX_BATCH_GAMES:
+        return jsonify({"error": f"{MAX_BATCH_GAMES} parties au maximum par requête"}), 400
+
+    changed, missing = {}, []
+    for game_id, version in requested.items():
+        game = games.get(game_id) # Pas de création de partie pour un id inconnu
+        if game is None:
+            missing.append(game_id)
+            continue
+        state = game.get_state_since(version)
+        if state is not None:
+            changed[game_id] = state
+
+    return jsonify({"games": changed, "missing": missing})
+
 @app.route("/get_turn", methods=["POST"])
 def get_turn():
     """Retourne la couleur du joueur qui doit jouer"""
     data = request.get_json()
     id = data.get("id")
 
-    return jsonify({"turn": games[id].turn})
+    return jsonify({"turn": get_game(id).turn})
+
+# ---------------------------------------------------------------------------
+# Mises à jour poussées (remplacent l'interrogation toutes les 500 ms)
+# ---------------------------------------------------------------------------
+
+@app.route("/wait_update", methods=["POST"])
+def wait_update():
+    """
+    Attente longue : répond dès que la partie change ou après `POLL_TIMEOUT` secondes
+    ---
+    Reçoit : {"id": "id partie", "version": dernière version reçue, "since_id": id du dernier message reçu}
+    Renvoie : {"changed": False} ou {"changed": True, ...`Game.get_update`}
+    """
+    data = request.get_json()
+    game = get_game(data.get("id"))
+    version = data.get("version")
+    version = -1 if version is None else version
+    since_id = data.get("since_id") or 0
+
+    # Client en retard de plus d'une page de messages : la suite est envoyée sans attendre
+    if since_id >= game.chat.last_id and game.wait_for_change(version, POLL_TIMEOUT) == version:
+        return jsonify({"changed": False})
+    return jsonify({"changed": True, **game.get_update(since_id)})
+
+def event_stream(game, game_id:str, since_id:int):
+    """Flux Server-Sent Events : un évènement par changement de la partie, le premier contient l'état complet"""
+    version = -1
+    while True:
+        games.touch(game_id) # Partie regardée : pas retirée du registre tant que le flux est ouvert
+        if since_id >= game.chat.last_id and game.wait_for_change(version, KEEPALIVE_INTERVAL) == version:
+            yield ": keepalive\n\n" # Garde la connexion ouverte à travers les proxys
+            continue
+        update = game.get_update(since_id)
+        version, since_id = update["version"], update["last_message_id"]
+        yield f"id: {version}\ndata: {json.dumps(update)}\n\n"
+
+@app.route("/events/<game_id>")
+def events(game_id):
+    """Flux Server-Sent Events de la partie (voir `event_stream`)"""
+    since_id = request.args.get("since_id", 0, type=int)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(event_stream(get_game(game_id), game_id, since_id), mimetype="text/event-stream", headers=headers)
+
+@app.route("/stats")
+def stats():
+    """Parties en mémoire (nombre, mémoire approximative par partie) et recherches du bot"""
+    return jsonify({"games": games.stats()._asdict(), "bot": bot_service.stats()._asdict()})
 
 def main():
     app.run(host="0.0.0.0", debug=True)
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Serveur asynchrone (ASGI) : une connexion WebSocket par joueur sur `/ws/<id partie>`,
+les pages et l'API HTTP de `app.main` sont servies par la même application.
+
+Dépendances optionnelles : pip install starlette "uvicorn[standard]"
+
+Utilisation :
+    python -m app.realtime.asgi --port 8000
+    uvicorn app.realtime.asgi:app --port 8000
+"""
+
+from contextlib import asynccontextmanager
+import argparse
+import uuid
+
+try:
+    from starlette.applications import Starlette
+    from starlette.middleware.wsgi import WSGIMiddleware
+    from starlette.routing import Mount, WebSocketRoute
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+except ImportError as error:
+    raise ImportError('Le serveur asynchrone nécessite starlette : pip install starlette "uvicorn[standard]"') from error
+from itsdangerous import BadSignature
+
+from app.main import app as flask_app, games, bot_service
+from app.realtime.hub import GameHub
+
+hub = GameHub(games)
+
+def session_username(cookie:str) -> str:
+    """Nom du joueur de la session Flask (cookie signé), nom d'invité si la session est absente ou invalide"""
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if cookie and serializer is not None:
+        try:
+            player = serializer.loads(cookie).get("player")
+            if player:
+                return player
+        except BadSignature:
+            pass
+    return f"guest_{uuid.uuid4().hex[:6]}"
+
+async def game_socket(websocket:WebSocket):
+    await websocket.accept()
+    username = session_username(websocket.cookies.get(flask_app.config["SESSION_COOKIE_NAME"]))
+    connection = await hub.connect(websocket, websocket.path_params["game_id"], username)
+    if connection is None:
+        await websocket.close()
+        return
+    try:
+        while True:
+            data = await websocket.receive_json()
+            await hub.handle(connection, data if isinstance(data, dict) else {})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(connection)
+
+@asynccontextmanager
+async def lifespan(app):
+    hub.start()
+    yield
+    await hub.stop()
+    bot_service.shutdown(wait=False)
+
+app = Starlette(
+    routes=[
+        WebSocketRoute("/ws/{game_id}", game_socket),
+        Mount("/", WSGIMiddleware(flask_app)), # Pages, fichiers statiques et API HTTP existante
+    ],
+    lifespan=lifespan,
+)
+
+def main(argv=None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serveur d'échecs asynchrone (WebSocket)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
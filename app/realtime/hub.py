@@ -0,0 +1,316 @@
+# ---------------------------------------------------------------------
+# Diffusion des parties sur des connexions persistantes (WebSocket)
+#----------------------------------------------------------------------
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from typing import Callable, NamedTuple, Optional
+import asyncio
+import heapq
+
+from app.engine.game import Game
+from app.utils.constants import PARTIE_INTROUVABLE, SERVEUR_COMPLET
+from app.utils.logging import Logger
+
+logger = Logger()
+
+TICK = 0.25 # Secondes entre deux vérifications d'une partie où le bot a le trait
+SYNC_INTERVAL = 1.0 # Secondes entre deux lectures des évènements écrits par les autres processus (stockage)
+CLOCK_MARGIN = 0.05 # Une pendule est vérifiée juste après son expiration
+WORKERS = 8 # Threads exécutant les appels à `Game` (validation des coups, état de la partie)
+
+class HubStats(NamedTuple):
+    games:int # Parties ayant au moins une connexion
+    connections:int
+    sent:int # Messages envoyés aux clients
+    received:int
+
+class Connection:
+    """Connexion d'un joueur (ou spectateur) à une partie"""
+    def __init__(self, socket, game_id:str, username:str):
+        """
+        Parameters
+        ----------
+        socket
+            Objet possédant une coroutine `send_json(dict)` (`starlette.websockets.WebSocket`)
+        """
+        self.socket = socket
+        self.game_id = game_id
+        self.username = username
+        self.version = -1 # Dernière version de la partie envoyée
+        self.last_message_id = 0 # Id du dernier message du chat envoyé
+
+class GameHub:
+    """
+    Relie les connexions aux objets `Game` : un seul thread (la boucle asyncio) gère toutes les connexions,
+    les appels au registre et à `Game` (verrous, stockage) sont faits dans un exécuteur pour ne jamais bloquer la boucle.
+
+    Chaque changement d'une partie (`Game.notify`) réveille la boucle, qui envoie le nouvel état aux deux joueurs
+    et aux spectateurs. Seules les parties qui changent sans action des joueurs sont vérifiées à une date prévue
+    (`Game.next_update_in`) : coup du bot, expiration de la pendule du joueur qui a le trait.
+    """
+    def __init__(self, games, executor:Optional[ThreadPoolExecutor] = None, tick:float = TICK, sync_interval:float = SYNC_INTERVAL):
+        """
+        Parameters
+        ----------
+        games
+            Registre des parties (`app.main.games`)
+        tick:float
+            Secondes entre deux vérifications d'une partie où le bot a le trait
+        sync_interval:float
+            Secondes entre deux lectures des changements faits par les autres processus, les parties connectées
+            sont aussi marquées comme utilisées dans le registre
+        """
+        self.games = games
+        self.executor = executor or ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="game")
+        self.tick = tick
+        self.sync_interval = sync_interval
+        self.connections:dict[str, set[Connection]] = defaultdict(set) # Sous forme {"id partie": connexions}
+        self.watched:dict[str, tuple[Game, Callable[[], None]]] = {} # Parties observées : {"id partie": (partie, observateur)}
+        self.dirty:set[str] = set() # Parties changées depuis leur dernière diffusion
+        self.due:dict[str, float] = {} # Prochaine vérification : {"id partie": instant de la boucle}
+        self._schedule:list[tuple[float, str]] = [] # Tas des vérifications prévues (les entrées absentes de `due` sont ignorées)
+        self.sent = 0
+        self.received = 0
+        self._wakeup:Optional[asyncio.Event] = None
+        self._ticker:Optional[asyncio.Task] = None
+
+    async def run_sync(self, function, *args):
+        """Exécute une fonction bloquante dans l'exécuteur"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    # ------------------------ Connexions ------------------------
+    async def connect(self, socket, game_id:str, username:str) -> Optional[Connection]:
+        """Enregistre la connexion et lui envoie l'état complet de la partie, None si la partie ne peut pas être créée"""
+        game = await self.run_sync(self.games.create, game_id)
+        if game is None:
+            await socket.send_json({"type": "error", "message": SERVEUR_COMPLET})
+            return None
+        connection = Connection(socket, game_id, username)
+        self.connections[game_id].add(connection)
+        self.watch(game_id, game)
+        await self.publish(game_id, update=True)
+        return connection
+
+    def disconnect(self, connection:Connection):
+        connections = self.connections.get(connection.game_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.connections[connection.game_id]
+            self.unwatch(connection.game_id)
+
+    def watch(self, game_id:str, game:Game):
+        """Réveille la boucle à chaque changement de la partie (appelée dans la boucle)"""
+        current = self.watched.get(game_id)
+        if current is not None:
+            if current[0] is game:
+                return
+            self.unwatch(game_id) # Partie rechargée depuis le stockage : nouvel objet
+        loop = asyncio.get_running_loop()
+
+        def watcher():
+            try:
+                loop.call_soon_threadsafe(self._mark_dirty, game_id)
+            except RuntimeError: # Boucle arrêtée
+                pass
+
+        game.watchers.append(watcher)
+        self.watched[game_id] = (game, watcher)
+
+    def unwatch(self, game_id:str):
+        current = self.watched.pop(game_id, None)
+        if current is not None:
+            game, watcher = current
+            try:
+                game.watchers.remove(watcher)
+            except ValueError:
+                pass
+        self.dirty.discard(game_id)
+        self.due.pop(game_id, None)
+
+    def _mark_dirty(self, game_id:str):
+        if game_id in self.watched:
+            self.dirty.add(game_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def handle(self, connection:Connection, data:dict):
+        """
+        Traite un message d'un client
+
+        Types de messages :
+            {"type": "join", "color": "white"} -> {"type": "join", "valid": bool, "color": couleur obtenue}
+            {"type": "move", "source": "e2", "destination": "e4"} -> {"type": "move", "valid": bool}
+            {"type": "moves", "source": "e2"} -> {"type": "moves", "source": "e2", "moves": ["e3", "e4"]}
+            {"type": "moves"} -> {"type": "moves", "source": None, "moves": {"e2": ["e3", "e4"], ...}}
+            {"type": "message", "content": "..."}
+        """
+        self.received += 1
+        game = await self.run_sync(self.games.get, connection.game_id)
+        if game is None: # Retirée du registre
+            await self.send(connection, {"type": "error", "message": PARTIE_INTROUVABLE})
+            return
+        if connection.game_id in self.connections:
+            self.watch(connection.game_id, game)
+        kind = data.get("type")
+
+        if kind == "join":
+            valid = await self.run_sync(game.join, connection.username, data.get("color"))
+            await self.send(connection, {"type": "join", "valid": valid, "color": game.get_orientation(connection.username)})
+        elif kind == "move":
+            valid = await self.run_sync(game.move, connection.username, data.get("source"), data.get("destination"))
+            await self.send(connection, {"type": "move", "valid": valid})
+        elif kind == "moves":
+            source = data.get("source")
+            moves = await self.run_sync(self.legal_moves, game, connection.username, source)
+            await self.send(connection, {"type": "moves", "source": source, "moves": moves})
+        elif kind == "message":
+            content = data.get("content")
+            if content:
+                await self.run_sync(game.add_message, content, connection.username)
+        else:
+            await self.send(connection, {"type": "error", "message": f"Type de message inconnu : {kind}"})
+            return
+
+        await self.publish(connection.game_id)
+
+    @staticmethod
+    def legal_moves(game:Game, username:str, source:Optional[str] = None):
+        """Coups d'une case, ou de toutes les cases si `source` n'est pas spécifiée (vide si ce n'est pas le tour du joueur)"""
+        if source is not None:
+            return game.get_moves(source, username)
+        if game.end or game.players[game.turn] != username:
+            return {}
+        return game.snapshot().moves
+
+    # ------------------------ Diffusion ------------------------
+    async def send(self, connection:Connection, data:dict) -> bool:
+        try:
+            await connection.socket.send_json(data)
+        except Exception as e: # Connexion fermée pendant l'envoi
+            logger.warning(f"Envoi impossible à {connection.username} ({connection.game_id}) : {e}")
+            self.disconnect(connection)
+            return False
+        self.sent += 1
+        return True
+
+    def _collect(self, game:Game, connections:list[Connection], update:bool) -> tuple[list[tuple[Connection, dict]], Optional[float]]:
+        """
+        Exécutée dans l'exécuteur : états à envoyer aux connexions d'une partie dont la version est dépassée
+
+        Returns
+        -------
+        tuple : (connexions et états à envoyer, secondes avant la prochaine vérification ou None)
+        """
+        updates = []
+        # Verrou de la partie : une version n'est envoyée qu'une fois à chaque connexion, les autres parties ne sont pas bloquées
+        with game.lock:
+            if update:
+                game.update()
+            for connection in connections:
+                # Connexion à jour, à moins qu'il lui reste des pages de messages à recevoir
+                if connection.version == game.version and connection.last_message_id >= game.chat.last_id:
+                    continue
+                state = game.get_update(connection.last_message_id)
+                connection.version, connection.last_message_id = state["version"], state["last_message_id"]
+                updates.append((connection, {"type": "update", **state}))
+            return updates, game.next_update_in(self.tick)
+
+    async def publish(self, *game_ids:str, update:bool = False):
+        """
+        Envoie l'état des parties aux connexions qui ne l'ont pas encore reçu et prévoit leur prochaine vérification
+
+        Parameters
+        ----------
+        update:bool
+            Si True, `Game.update` est appelée avant (coup du bot, fin au temps)
+        """
+        targets = [(game_id, self.watched[game_id][0]) for game_id in game_ids if game_id in self.watched]
+        # Une tâche par partie : une partie lente (stockage, bot) ne retarde pas les autres
+        collected = await asyncio.gather(*(self.run_sync(self._collect, game, list(self.connections.get(game_id, ())), update)
+                                           for game_id, game in targets))
+        now = asyncio.get_running_loop().time()
+        updates = []
+        for (game_id, _), (game_updates, delay) in zip(targets, collected):
+            updates += game_updates
+            if game_id not in self.watched:
+                continue # Dernière connexion fermée pendant la collecte
+            if delay is None:
+                self.due.pop(game_id, None)
+            else:
+                self.due[game_id] = now + delay + CLOCK_MARGIN
+                heapq.heappush(self._schedule, (self.due[game_id], game_id))
+        if updates:
+            await asyncio.gather(*(self.send(connection, state) for connection, state in updates))
+
+    def _maintain(self, watched:list[tuple[str, Game]]):
+        """
+        Exécutée dans l'exécuteur : garde les parties connectées dans le registre et applique les évènements
+        écrits par les autres processus (`Game.sync` prévient alors la boucle par `Game.notify`)
+        """
+        for game_id, _ in watched:
+            self.games.touch(game_id)
+        store = getattr(self.games, "store", None)
+        if store is None or not watched:
+            return
+        seqs = store.latest_seqs([game_id for game_id, _ in watched])
+        for game_id, game in watched:
+            if game.seq < seqs.get(game_id, 0):
+                game.sync()
+
+    def _pop_due(self, now:float) -> list[str]:
+        """Parties dont la vérification prévue est passée"""
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            at, game_id = heapq.heappop(self._schedule)
+            if self.due.get(game_id) == at:
+                del self.due[game_id]
+                due.append(game_id)
+        return due
+
+    async def run(self):
+        """Diffuse les parties changées dès leur notification et vérifie les parties à la date prévue"""
+        loop = asyncio.get_running_loop()
+        next_sync = loop.time() + self.sync_interval
+        while True:
+            wake = min(next_sync, self._schedule[0][0]) if self._schedule else next_sync
+            if not self.dirty:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(wake - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            try:
+                now = loop.time()
+                if now >= next_sync:
+                    next_sync = now + self.sync_interval
+                    await self.run_sync(self._maintain, [(game_id, game) for game_id, (game, _) in self.watched.items()])
+                due = self._pop_due(now)
+                dirty = self.dirty.difference(due)
+                self.dirty.clear()
+                await asyncio.gather(self.publish(*dirty), self.publish(*due, update=True))
+            except Exception as e:
+                logger.error(f"Erreur pendant la diffusion des parties : {e}")
+
+    def start(self):
+        if self._ticker is None:
+            self._wakeup = asyncio.Event()
+            self._ticker = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+            self._wakeup = None
+        for game_id in list(self.watched):
+            self.unwatch(game_id)
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> HubStats:
+        return HubStats(len(self.connections), sum(len(connections) for connections in self.connections.values()), self.sent, self.received)
@@ -0,0 +1,121 @@
+"""
+Test de charge du serveur asynchrone : N parties simulées, deux connexions WebSocket par partie,
+chaque joueur joue un coup légal au hasard dès que c'est son tour.
+
+Dépendance optionnelle : pip install websockets
+
+Utilisation :
+    python -m app.realtime.asgi --port 8000 &
+    python -m app.realtime.loadtest --url ws://127.0.0.1:8000 --games 2000 --plies 40
+"""
+
+from typing import NamedTuple, Optional
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from app.engine.utils import WHITE, BLACK
+
+class LoadTestResult(NamedTuple):
+    games:int
+    moves:int
+    errors:int # Connexions échouées ou fermées par le serveur
+    elapsed:float
+    latencies:list[float] # Secondes entre l'envoi d'un coup et la réception de la position suivante
+
+    def percentile(self, p:float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+class Counters:
+    def __init__(self):
+        self.moves = 0
+        self.errors = 0
+        self.latencies:list[float] = []
+
+async def player(url:str, color:str, plies:int, hold:float, rng:random.Random, counters:Counters, connect_limit:asyncio.Semaphore):
+    """Un joueur simulé : rejoint la partie, joue au hasard jusqu'à `plies` demi-coups puis garde la connexion `hold` secondes"""
+    import websockets
+
+    async with connect_limit:
+        socket = await websockets.connect(url, open_timeout=60, max_size=None)
+    async with socket:
+        await socket.send(json.dumps({"type": "join", "color": color}))
+        turn, played, requested, sent_at = None, 0, False, None
+        async for raw in socket:
+            data = json.loads(raw)
+            kind = data.get("type")
+            if kind == "update":
+                if data["turn"] != turn:
+                    if turn is not None:
+                        played += 1
+                    turn, requested = data["turn"], False
+                    if sent_at is not None and turn != color:
+                        counters.latencies.append(time.perf_counter() - sent_at)
+                        sent_at = None
+                if data["end"] or played >= plies:
+                    break
+                if turn == color and all(data["players"]) and not requested:
+                    requested = True
+                    await socket.send(json.dumps({"type": "moves"}))
+            elif kind == "moves" and data["moves"]:
+                source = rng.choice(sorted(data["moves"]))
+                sent_at = time.perf_counter()
+                await socket.send(json.dumps({"type": "move", "source": source, "destination": rng.choice(data["moves"][source])}))
+            elif kind == "move":
+                if data["valid"]:
+                    counters.moves += 1
+                else: # Coup refusé : nouvelle demande des coups légaux
+                    sent_at = None
+                    await socket.send(json.dumps({"type": "moves"}))
+        await asyncio.sleep(hold)
+
+async def run(url:str, games:int, plies:int, hold:float = 0.0, concurrency:int = 200, seed:Optional[int] = None) -> LoadTestResult:
+    """
+    Parameters
+    ----------
+    url:str
+        Adresse du serveur (ws://hôte:port)
+    concurrency:int
+        Nombre maximal de connexions en cours d'ouverture
+    """
+    rng = random.Random(seed)
+    counters = Counters()
+    connect_limit = asyncio.Semaphore(concurrency)
+    prefix = f"loadtest-{uuid.uuid4().hex[:6]}"
+
+    async def guarded(coroutine):
+        try:
+            await coroutine
+        except Exception:
+            counters.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        guarded(player(f"{url}/ws/{prefix}-{i}", color, plies, hold, random.Random(rng.random()), counters, connect_limit))
+        for i in range(games) for color in (WHITE, BLACK)
+    ))
+    return LoadTestResult(games, counters.moves, counters.errors, time.perf_counter() - start, counters.latencies)
+
+def main(argv:Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge du serveur WebSocket")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-p", "--plies", type=int, default=40, help="Demi-coups joués par partie")
+    parser.add_argument("--hold", type=float, default=0.0, help="Secondes pendant lesquelles les connexions restent ouvertes après la partie")
+    parser.add_argument("--concurrency", type=int, default=200, help="Connexions ouvertes simultanément")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.url, args.games, args.plies, args.hold, args.concurrency, args.seed))
+    print(f"{result.games} parties, {result.moves} coups, {result.errors} erreurs en {result.elapsed:.1f}s ({result.moves / result.elapsed:.0f} coups/s)")
+    print(f"Latence coup -> position : médiane {result.percentile(0.5) * 1000:.1f} ms, p99 {result.percentile(0.99) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -61,6 +61,7 @@ function playSound(audio) {
 function addMessages(messages) {
     // messages : liste de messages
     messages.forEach(msg => {
+        lastMessageId = Math.max(lastMessageId, msg.id);
         const messageElement = document.createElement("div");
         messageElement.classList.add("message");
 
@@ -81,12 +82,11 @@ function addMessages(messages) {
 }
 
 async function updateMessages(reset=false) {
-    const messages = await getMessages(reset);
-
     if (reset) {
         messageList.innerHTML = "";
+        lastMessageId = 0;
     }
-
+    const messages = await getMessages(lastMessageId);
     addMessages(messages);
 }
 
@@ -200,7 +200,7 @@ async function getCurrentTurn() {
 // Messages Functions -> Server
 // ---------------------------------------------------------------------------
 
-async function getMessages(reset=false) {
+async function getMessages(sinceId=0) {
     const response = await fetch('/get_messages', {
         method: 'POST',
         headers: {
@@ -208,7 +208,7 @@ async function getMessages(reset=false) {
         },
         body: JSON.stringify({
             id: id,
-            reset: reset
+            since_id: sinceId
         })
     });
 
@@ -299,48 +299,163 @@ async function initBoard() {
     };
 
     changeTextById("turn", turn);
+    updatePlayers(boardFEN.players);
+
+    return Chessboard('board', config);
+}
+
+function updatePlayers(players) {
     if (playerOrientation == "white") {
-        changeTextById("currentPlayer", boardFEN.players[0]);
-        changeTextById("secondPlayer", boardFEN.players[1]);
+        changeTextById("currentPlayer", players[0]);
+        changeTextById("secondPlayer", players[1]);
     }
     else {
-        changeTextById("currentPlayer", boardFEN.players[1]);
-        changeTextById("secondPlayer", boardFEN.players[0]);
+        changeTextById("currentPlayer", players[1]);
+        changeTextById("secondPlayer", players[0]);
     }
+}
 
-    updateMessages(true);
+function updateClocks(whiteSeconds, blackSeconds) {
+    const whiteTime = formatTime(whiteSeconds);
+    const blackTime = formatTime(blackSeconds);
+    if (playerOrientation == "white") {
+        changeTextById("currentPlayerTime", whiteTime);
+        changeTextById("secondPlayerTime", blackTime);
+    }
+    else {
+        changeTextById("currentPlayerTime", blackTime);
+        changeTextById("secondPlayerTime", whiteTime);
+    }
+}
 
-    return Chessboard('board', config);
+function updateState(boardFEN) {
+    // Met à jour l'échiquier, l'état, les pendules et l'évaluation à partir de la réponse du serveur
+    if (boardFEN.board != board.fen()) {
+        board.position(boardFEN.board);
+    }
+    if (boardFEN.board_state != currentStatus) {
+        if (boardFEN.board_state == "check") {
+            playSound(checkSound);
+        }
+        changeTextById("status", boardFEN.board_state);
+        currentStatus = boardFEN.board_state;
+    }
+
+    updateClocks(boardFEN.white_time, boardFEN.black_time);
+    updateEvaluationBar(boardFEN.evaluation);
 }
 
-function main() {
-    let intervalID = setInterval(async function () {
-        const boardFEN = await getBoard();
+// ---------------------------------------------------------------------------
+// Mises à jour poussées par le serveur
+// ---------------------------------------------------------------------------
+
+function applyUpdate(update) {
+    // update : réponse de `Game.get_update` (état complet + nouveaux messages)
+    currentVersion = update.version;
+    lastMessageId = update.last_message_id;
+    clocks = {white: update.white_time, black: update.black_time, turn: update.turn, end: update.end, received: Date.now()};
+
+    updateState(update);
+    updatePlayers(update.players);
+    changeTextById("turn", update.turn);
+    addMessages(update.messages);
+}
+
+function tickClocks() {
+    // Les pendules ne sont envoyées qu'à chaque changement : décompte local entre deux mises à jour
+    if (clocks === null) return;
+    const elapsed = clocks.end ? 0 : (Date.now() - clocks.received) / 1000;
+    const white = clocks.turn == "white" ? Math.max(clocks.white - elapsed, 0) : clocks.white;
+    const black = clocks.turn == "black" ? Math.max(clocks.black - elapsed, 0) : clocks.black;
+    updateClocks(white, black);
+}
 
-        if (boardFEN.board != board.fen()) {
-            board.position(boardFEN.board);
+function startSocket() {
+    // WebSocket (serveur asynchrone `app.realtime.asgi`), Server-Sent Events si le serveur ne l'accepte pas
+    const protocol = location.protocol == "https:" ? "wss" : "ws";
+    const socket = new WebSocket(`${protocol}://${location.host}/ws/${id}`);
+    let opened = false;
+    let first = true;
+    socket.onopen = () => {
+        opened = true;
+    };
+    socket.onmessage = event => {
+        const data = JSON.parse(event.data);
+        if (data.type != "update") return;
+        if (first) {
+            // Chaque connexion commence par l'état complet, messages compris
+            messageList.innerHTML = "";
+            first = false;
         }
-        if (boardFEN.board_state != currentStatus) {
-            if (boardFEN.board_state == "check") {
-                playSound(checkSound);
-            }
-            changeTextById("status", boardFEN.board_state);
-            currentStatus = boardFEN.board_state;
+        applyUpdate(data);
+    };
+    socket.onclose = () => {
+        if (opened) {
+            setTimeout(startSocket, 1000);
         }
+        else {
+            startEvents();
+        }
+    };
+}
 
-        const whiteTime = formatTime(boardFEN.white_time);
-        const blackTime = formatTime(boardFEN.black_time);
-        if (playerOrientation == "white") {
-            changeTextById("currentPlayerTime", whiteTime);
-            changeTextById("secondPlayerTime", blackTime);
+function startEvents() {
+    // Server-Sent Events, attente longue si le flux n'est pas disponible
+    if (!window.EventSource) {
+        waitUpdates();
+        return;
+    }
+    const source = new EventSource(`/events/${id}?since_id=${lastMessageId}`);
+    source.onmessage = event => {
+        eventFailures = 0;
+        applyUpdate(JSON.parse(event.data));
+    };
+    source.onerror = () => {
+        // Reconnexion manuelle : le curseur des messages de l'URL doit suivre les messages reçus
+        source.close();
+        eventFailures += 1;
+        if (eventFailures >= MAX_EVENT_FAILURES) {
+            waitUpdates();
         }
         else {
-            changeTextById("currentPlayerTime", blackTime);
-            changeTextById("secondPlayerTime", whiteTime);
+            setTimeout(startEvents, 1000);
         }
+    };
+}
 
+async function waitUpdates() {
+    // Attente longue : chaque requête reste ouverte jusqu'au prochain changement de la partie
+    while (true) {
+        let update;
+        try {
+            const response = await fetch('/wait_update', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ id: id, version: currentVersion, since_id: lastMessageId })
+            });
+            if (!response.ok) {
+                throw new Error(`Erreur HTTP: ${response.status}`);
+            }
+            update = await response.json();
+        } catch (error) {
+            console.error("Attente longue indisponible, retour à l'interrogation :", error);
+            startPolling();
+            return;
+        }
+        if (update.changed) {
+            applyUpdate(update);
+        }
+    }
+}
+
+function startPolling() {
+    // Ancien mode : interrogation du serveur toutes les 500 ms
+    clearInterval(clockIntervalID);
+    updateMessages(true);
+    let intervalID = setInterval(async function () {
+        const boardFEN = await getBoard();
+        updateState(boardFEN);
         updateMessages();
-        updateEvaluationBar(boardFEN.evaluation);
 
         // Vérif fin partie
         if (boardFEN.end) {
@@ -350,7 +465,24 @@ function main() {
     }, 500);
 }
 
+function main() {
+    clockIntervalID = setInterval(tickClocks, 250);
+    if (window.WebSocket) {
+        startSocket();
+    }
+    else {
+        startEvents();
+    }
+}
+
+const MAX_EVENT_FAILURES = 3;
+
 let currentStatus = "NaN";
+let currentVersion = -1;
+let lastMessageId = 0;
+let clocks = null;
+let clockIntervalID = null;
+let eventFailures = 0;
 
 initBoard().then(instance => {
     board = instance;
@@ -10,4 +10,6 @@ NONE = "Normal"
 # Affichage messages
 ERROR_JOIN = "Partie non disponible"
 USERNAME_UTILISE = "Nom d'utilisateur déjà utilisé"
-NON_CONNECTE = "Nom d'utilisateur non-spécifié."
\ No newline at end of file
+NON_CONNECTE = "Nom d'utilisateur non-spécifié."
+PARTIE_INTROUVABLE = "Partie introuvable"
+SERVEUR_COMPLET = "Trop de parties en cours, réessayez plus tard"
\ No newline at end of file
@@ -59,6 +59,8 @@ def display(level):
 
         @wraps(function)
         def wrapper(cls, *args, time_counter=False):
+            if cls.LEVELS.index(level) < cls.min_level:
+                return None
             cls.messages_count[level] += 1
 
             if hasattr(cls, f"timer_{level}"):
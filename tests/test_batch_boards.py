@@ -0,0 +1,42 @@
+from app.main import app, games
+from app.engine.utils import WHITE, BLACK
+
+def test_only_changed_games_returned():
+    client = app.test_client()
+    for game_id in ("batch-a", "batch-b"):
+        game = games.create(game_id)
+        game.join("alice", WHITE)
+        game.join("bob", BLACK)
+
+    data = client.post("/get_boards", json={"games": ["batch-a", "batch-b", "batch-unknown"]}).get_json()
+    assert set(data["games"]) == {"batch-a", "batch-b"}
+    assert data["missing"] == ["batch-unknown"]
+    assert "batch-unknown" not in games
+    versions = {game_id: state["version"] for game_id, state in data["games"].items()}
+
+    data = client.post("/get_boards", json={"games": versions}).get_json()
+    assert data["games"] == {}
+
+    assert games.get("batch-b").move("alice", "e2", "e4")
+    data = client.post("/get_boards", json={"games": versions}).get_json()
+    assert list(data["games"]) == ["batch-b"]
+    assert data["games"]["batch-b"]["turn"] == BLACK
+
+def test_batch_size_limit():
+    client = app.test_client()
+    response = client.post("/get_boards", json={"games": [f"g{i}" for i in range(1000)]})
+    assert response.status_code == 400
+
+def test_invalid_games_value():
+    client = app.test_client()
+    for value in ("batch-a", 3, True):
+        assert client.post("/get_boards", json={"games": value}).status_code == 400
+
+def test_get_boards_is_read_only():
+    client = app.test_client()
+    game = games.create("batch-bot")
+    game.join("alice", WHITE)
+    calls = []
+    game.update = lambda: calls.append(1) # Ni fin de partie ni coup du bot depuis le tableau de suivi
+    data = client.post("/get_boards", json={"games": ["batch-bot"]}).get_json()
+    assert "batch-bot" in data["games"] and calls == []
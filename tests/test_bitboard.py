@@ -0,0 +1,56 @@
+from app.engine.board import ChessBoard
+from app.engine.bitboard import Bitboards, KNIGHT_ATTACKS, rook_attacks, BB_SQUARES
+from app.engine.compact import CompactBoard, decode_move, square
+from app.engine.utils import Position, Move, Roque, Check, BLACK
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+def perft(board:Bitboards, depth:int) -> int:
+    if depth == 0:
+        return 1
+    return sum(perft(board.play(move), depth - 1) for move in board.legal_moves())
+
+def targets(moves) -> set:
+    return {(move.king_move.start_pos if isinstance(move, Roque) else move.start_pos, move.pos) for move in moves}
+
+def test_attack_tables():
+    assert bin(KNIGHT_ATTACKS[square(Position(0, 0))]).count("1") == 2
+    assert bin(KNIGHT_ATTACKS[square(Position(4, 4))]).count("1") == 8
+    # Tour en a1 bloquée par une pièce en a4
+    attacks = rook_attacks(square(Position(0, 7)), BB_SQUARES[square(Position(0, 4))])
+    assert attacks & BB_SQUARES[square(Position(0, 4))]
+    assert not attacks & BB_SQUARES[square(Position(0, 3))]
+
+def test_perft():
+    assert perft(Bitboards.from_fen(), 3) == 8902
+    assert perft(Bitboards.from_fen(KIWIPETE), 2) == 2039
+    assert perft(Bitboards.from_fen("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"), 3) == 2812
+
+def test_same_moves_as_chessboard():
+    board = ChessBoard()
+    for move in [(4, 6, 4, 4), (3, 1, 3, 3), (4, 4, 3, 3), (6, 0, 5, 2), (5, 7, 1, 3)]:
+        compact = board.to_compact()
+        moves = [decode_move(board.board, move) for move in compact.legal_moves()]
+        assert targets(moves) == targets(board.get_all_actions())
+        board.move(Move(None, Position(move[0], move[1]), Position(move[2], move[3])))
+
+def test_same_moves_as_compact():
+    for fen in [KIWIPETE, "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"]:
+        assert sorted(Bitboards.from_fen(fen).legal_moves()) == sorted(CompactBoard.from_fen(fen).legal_moves())
+
+def test_pins_and_checks():
+    # Cavalier cloué : aucun coup, fou cloué : reste sur la diagonale
+    board = Bitboards.from_fen("4k3/4r3/8/8/4N3/8/8/4K3 w - - 0 1")
+    assert not board.legal_moves(from_mask=BB_SQUARES[square(Position(4, 4))])
+    board = Bitboards.from_fen("4k3/8/8/b7/8/8/3B4/4K3 w - - 0 1")
+    assert {(move >> 6) & 63 for move in board.legal_moves(from_mask=BB_SQUARES[square(Position(3, 6))])} == {square(Position(2, 5)), square(Position(1, 4)), square(Position(0, 3))}
+    # Double échec : seul le roi peut bouger
+    board = Bitboards.from_fen("4k3/4r3/8/8/8/5n2/3N4/R3K3 w - - 0 1")
+    assert all(move & 63 == square(Position(4, 7)) for move in board.legal_moves())
+
+def test_chessboard_fast_path():
+    board = ChessBoard.from_fen("4k3/8/8/8/1b6/8/8/4K2R w K - 0 1")
+    # En échec : pas de roque, et seules les parades sont proposées
+    assert not any(isinstance(move, Roque) for move in board.get_all_actions())
+    assert board.get_moves(Position(4, 0)) == [] # Pas le trait
+    assert board.get_state() == Check(BLACK)
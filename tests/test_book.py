@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from app.bot.learning.book import OpeningBook, build_book, write_book, HEADER, ENTRY_SIZE
+from app.bot.learning.ingest import OpeningStats
+from app.bot.service import search_position
+from app.engine.board import ChessBoard
+from app.engine.compact import encode_move
+from app.engine.san import san_to_move
+
+GAMES = [
+    ("1-0", "2600", "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 1-0"),
+    ("1/2-1/2", "2400", "1. e4 e5 2. Nf3 Nf6 3. Nxe5 d6 1/2-1/2"),
+    ("0-1", "2500", "1. e4 c5 2. Nf3 d6 0-1"),
+    ("1-0", "2700", "1. d4 d5 2. c4 e6 1-0"),
+]
+
+def write_pgn(path):
+    text = "".join(f'[Event "Partie"]\n[WhiteElo "{elo}"]\n[BlackElo "2300"]\n[Result "{result}"]\n\n{moves}\n\n' for result, elo, moves in GAMES)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def play(*moves):
+    board = ChessBoard()
+    for move in moves:
+        board.make_move(san_to_move(board, move))
+    return board
+
+def test_build_and_probe(tmp_path):
+    book_path = str(tmp_path / "book.bin")
+    result = build_book(write_pgn(tmp_path / "games.pgn"), book_path, workers=1, min_count=1)
+    assert result.ingest.games == 4 and result.size == HEADER.size + result.entries * ENTRY_SIZE
+
+    with OpeningBook(book_path) as book:
+        assert len(book) == result.entries
+        entries = book.probe(ChessBoard())
+        assert [entry.uci for entry in entries] == ["e2e4", "d2d4"] # Le plus joué en premier
+        e4 = entries[0]
+        assert (e4.count, e4.white, e4.draws, e4.black, e4.elo) == (3, 1, 1, 1, 2500)
+        assert e4.white_score == pytest.approx(0.5)
+
+        # Position atteinte par deux parties : l'Elo moyen est celui des noirs
+        after_e4 = book.probe(play("e4"))
+        assert {entry.uci: entry.count for entry in after_e4} == {"e7e5": 2, "c7c5": 1}
+        assert after_e4[0].elo == 2300
+        assert book.probe(play("a4")) == []
+
+def test_min_count_and_choose(tmp_path):
+    book_path = str(tmp_path / "book.bin")
+    build_book(write_pgn(tmp_path / "games.pgn"), book_path, workers=1) # Coups joués au moins deux fois
+    with OpeningBook(book_path) as book:
+        assert [entry.uci for entry in book.probe(ChessBoard())] == ["e2e4"]
+        assert book.probe(play("e4", "e5", "Nf3")) == []
+        move = book.choose(play("e4", "e5"), rng=random.Random(1))
+        assert encode_move(move) == encode_move(play("e4", "e5").move_from_uci("g1f3"))
+        assert book.choose(play("d4")) is None
+
+def test_collisions_and_errors(tmp_path):
+    board = ChessBoard()
+    stats = OpeningStats()
+    stats.add(board.hash, encode_move(board.move_from_uci("e2e4")), 1, 2000)
+    stats.add(board.hash, encode_move(play("e4").move_from_uci("e7e5")), 1, 2000) # Coup d'une autre position
+    path = str(tmp_path / "book.bin")
+    assert write_book(path, stats, min_count=1) == 2
+    with OpeningBook(path) as book:
+        assert len(book.entries(board.hash)) == 2
+        assert [entry.uci for entry in book.probe(board)] == ["e2e4"] # Le coup illégal est ignoré
+
+    (tmp_path / "bad.bin").write_bytes(b"pas un livre" * 4)
+    with pytest.raises(ValueError):
+        OpeningBook(str(tmp_path / "bad.bin"))
+    (tmp_path / "cut.bin").write_bytes(open(path, "rb").read()[:-1])
+    with pytest.raises(ValueError):
+        OpeningBook(str(tmp_path / "cut.bin"))
+
+def test_search_uses_book(tmp_path):
+    book_path = str(tmp_path / "book.bin")
+    build_book(write_pgn(tmp_path / "games.pgn"), book_path, workers=1)
+    fen = play("e4").to_fen()
+    assert search_position(fen, 0.1, table_size_mb=1, book_path=book_path) == "e7e5"
@@ -0,0 +1,65 @@
+from app.engine.chat import ChatLog, Message, PAGE_SIZE
+from app.engine.game import Game
+from app.engine.registry import GameRegistry
+from app.engine.store import GameStore
+
+def ids(messages):
+    return [message.id for message in messages]
+
+def test_ring_buffer_keeps_last_messages():
+    chat = ChatLog(capacity=5)
+    for i in range(12):
+        chat.append("alice", f"message {i}")
+    assert len(chat) == 5
+    assert (chat.first_id, chat.last_id) == (8, 12)
+    assert ids(chat.since(0)) == [8, 9, 10, 11, 12] # Messages sortis du tampon et aucun stockage
+    assert ids(chat.since(10)) == [11, 12]
+    assert chat.since(12) == []
+
+def test_cursor_reads():
+    chat = ChatLog()
+    for i in range(10):
+        chat.append("bob", str(i))
+    assert ids(chat.since(0, limit=3)) == [1, 2, 3] # Les plus anciens : la page suivante part du dernier id reçu
+    assert ids(chat.since(3, limit=3)) == [4, 5, 6]
+    assert ids(chat.before(8, limit=3)) == [5, 6, 7]
+    assert ids(chat.before(2)) == [1]
+    assert chat.since(4)[0] == Message("bob", "4", 5)
+
+def test_game_has_no_per_user_state():
+    game = Game()
+    game.add_message("bonjour", "alice")
+    game.add_message("salut", "bob")
+    assert [message["content"] for message in game.get_messages()] == ["bonjour", "salut"]
+    assert game.get_messages(since_id=1) == [{"id": 2, "sender": "bob", "content": "salut"}]
+    assert game.get_messages() == game.get_messages() # Lire ne change rien
+
+def test_older_messages_paged_from_store(tmp_path):
+    registry = GameRegistry(store=GameStore(str(tmp_path / "games.db")))
+    game = registry.create("g1")
+    game.chat.buffer = type(game.chat.buffer)(maxlen=3)
+    for i in range(10):
+        game.add_message(str(i), "alice")
+    assert ids(game.chat) == [8, 9, 10]
+
+    assert [message["id"] for message in game.get_messages(since_id=4)] == [5, 6, 7, 8, 9, 10]
+    assert [message["id"] for message in game.get_messages(before_id=8, limit=4)] == [4, 5, 6, 7]
+
+def test_late_client_receives_every_message(tmp_path):
+    registry = GameRegistry(store=GameStore(str(tmp_path / "games.db")))
+    game = registry.create("g1")
+    game.chat.buffer = type(game.chat.buffer)(maxlen=PAGE_SIZE)
+    for i in range(2 * PAGE_SIZE + 10):
+        game.add_message(str(i), "alice")
+
+    received, cursor = [], 0
+    while True:
+        update = game.get_update(cursor)
+        if not update["messages"]:
+            break
+        assert len(update["messages"]) <= PAGE_SIZE
+        received += [message["id"] for message in update["messages"]]
+        cursor = update["last_message_id"]
+        assert cursor == received[-1] # Curseur : dernier message envoyé
+    assert received == list(range(1, 2 * PAGE_SIZE + 11))
+    assert game.get_update(cursor)["last_message_id"] == cursor
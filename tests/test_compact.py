@@ -0,0 +1,71 @@
+import pytest
+from app.engine.board import ChessBoard, board_to_fen
+from app.engine.compact import CompactBoard, START_FEN, encode, square, CASTLE, EN_PASSANT
+from app.engine.utils import Position, Move, WHITE, BLACK
+from app.bot.evaluation import final_evaluation, evaluation_materielle, Coefficients
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+def perft(board:CompactBoard, depth:int) -> int:
+    if depth == 0:
+        return 1
+    total = 0
+    for move in board.legal_moves():
+        child = board.copy()
+        child.apply(move)
+        total += perft(child, depth - 1)
+    return total
+
+def test_fen_round_trip():
+    for fen in [START_FEN, KIWIPETE, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - e3 0 12"]:
+        assert CompactBoard.from_fen(fen).to_fen() == fen
+
+def test_invalid_fen():
+    with pytest.raises(ValueError):
+        CompactBoard.from_fen("rnbqkbnr/pppppppp/8/8 w - - 0 1")
+
+def test_same_position_as_chessboard():
+    board = ChessBoard()
+    compact = board.to_compact()
+    assert compact.to_fen() == START_FEN
+    assert board_to_fen(compact) == board_to_fen(board.board)
+    assert ChessBoard.from_fen(START_FEN).to_fen() == START_FEN
+
+def test_copy_is_independent():
+    board = CompactBoard.from_fen()
+    copy = board.copy()
+    copy.apply(encode(square(Position(4, 6)), square(Position(4, 4))))
+    assert board.to_fen() == START_FEN
+    assert copy.turn == BLACK
+    assert copy.en_passant == square(Position(4, 5))
+
+def test_perft():
+    assert perft(CompactBoard.from_fen(), 1) == 20
+    assert perft(CompactBoard.from_fen(), 2) == 400
+    assert perft(CompactBoard.from_fen(KIWIPETE), 1) == 48
+    assert perft(CompactBoard.from_fen(KIWIPETE), 2) == 2039
+
+def test_special_moves():
+    board = CompactBoard.from_fen(KIWIPETE)
+    moves = board.legal_moves()
+    assert sum(1 for move in moves if move >> 15 == CASTLE) == 2
+
+    board = CompactBoard.from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+    assert encode(square(Position(4, 3)), square(Position(3, 2)), flag=EN_PASSANT) in board.legal_moves()
+
+def test_castling_through_check():
+    board = CompactBoard.from_fen("4k3/8/8/8/8/8/5r2/4K2R w K - 0 1")
+    assert not any(move >> 15 == CASTLE for move in board.legal_moves())
+
+def test_evaluation_on_compact():
+    board = ChessBoard()
+    compact = board.to_compact()
+    assert evaluation_materielle(compact) == pytest.approx(0.0)
+    assert final_evaluation(compact, Coefficients()) == pytest.approx(final_evaluation(board, Coefficients()))
+
+def test_chessboard_from_fen_turn():
+    board = ChessBoard.from_fen("4k3/8/8/8/8/8/4P3/4K3 b - - 0 1")
+    assert board.turn == BLACK
+    assert board.move(Move(None, Position(4, 6), Position(4, 4))) == 1 # Mauvais tours
+    board = ChessBoard.from_fen("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1")
+    assert board.turn == WHITE
@@ -0,0 +1,60 @@
+from app.engine.board import ChessBoard
+from app.engine.game import Game
+from app.bot.evaluation import EvaluationCache, Coefficients, final_evaluation
+
+def test_hit_after_first_evaluation():
+    board = ChessBoard()
+    cache = EvaluationCache()
+    assert cache.evaluate(board) == final_evaluation(board, Coefficients())
+    assert cache.evaluate(board) == final_evaluation(board, Coefficients())
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+def test_keyed_by_coefficients():
+    board = ChessBoard()
+    cache = EvaluationCache()
+    material_only = Coefficients(1, 0, 0, 0, 0)
+    assert cache.evaluate(board, material_only) == final_evaluation(board, material_only)
+    cache.evaluate(board)
+    assert cache.stats().misses == 2
+
+def test_lru_eviction():
+    board = ChessBoard()
+    cache = EvaluationCache(capacity=2)
+    first = board.clone()
+    cache.evaluate(first)
+    moves = board.get_all_actions()
+    for move in moves[:2]:
+        undo = board.make_move(move)
+        cache.evaluate(board)
+        board.unmake_move(undo)
+    stats = cache.stats()
+    assert (stats.size, stats.evictions) == (2, 1)
+    cache.evaluate(first) # Position la plus ancienne : retirée
+    assert cache.stats().misses == 4
+
+def test_invalidate():
+    board = ChessBoard()
+    cache = EvaluationCache()
+    cache.evaluate(board)
+    cache.evaluate(board, Coefficients(1, 0, 0, 0, 0))
+    assert cache.invalidate(board) == 2
+    assert cache.stats().size == 0
+    cache.evaluate(board)
+    assert cache.invalidate() == 1
+
+def test_idle_game_evaluated_once():
+    game = Game()
+    game.evaluations = EvaluationCache()
+    game.join("a")
+    game.join("b")
+    for _ in range(5):
+        game.get_evaluation()
+    assert game.evaluations.stats().misses == 1
+
+    start_key = game.chessboard.hash
+    assert game.move("a", "e2", "e4")
+    game.get_evaluation()
+    assert game.evaluations.stats().size == 1 # Position précédente retirée
+    assert start_key not in {key for key, _ in game.evaluations.entries}
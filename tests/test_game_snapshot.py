@@ -0,0 +1,72 @@
+import pytest
+
+from app.engine.board import ChessBoard
+from app.engine.game import Game
+from app.engine.utils import WHITE, BLACK, Position, position_to_string
+
+def new_game() -> Game:
+    game = Game()
+    game.join("alice", WHITE)
+    game.join("bob", BLACK)
+    return game
+
+def test_moves_match_chessboard():
+    game = new_game()
+    for source, target in [("e2", "e4"), ("e7", "e5"), ("g1", "f3"), ("b8", "c6"), ("f1", "c4"), ("g8", "f6")]:
+        player = game.players[game.turn]
+        assert game.move(player, source, target)
+
+    board = game.chessboard
+    player = game.players[game.turn]
+    for y in range(8):
+        for x in range(8):
+            pos = Position(x, y)
+            expected = [position_to_string(move.pos) for move in board.get_moves(pos)]
+            assert game.get_moves(position_to_string(pos), player) == expected
+    assert "g1" in game.get_moves("e1", player) # Roque
+
+def test_polling_reuses_snapshot():
+    game = new_game()
+    snapshot = game.snapshot()
+    state = game.get_current_state()
+    assert game.snapshot() is snapshot
+    assert state["board"] == snapshot.board == ChessBoard().to_fen().split(" ")[0]
+    assert sorted(game.get_moves("e2", "alice")) == ["e3", "e4"]
+    assert game.get_moves("e2", "bob") == []
+
+def test_snapshot_updated_after_move():
+    game = new_game()
+    before = game.snapshot()
+    assert game.move("alice", "e2", "e4")
+    after = game.snapshot()
+    assert after is not before
+    assert (after.ply, after.turn) == (1, BLACK)
+    assert game.get_current_state()["board"] == after.board
+    assert "e5" in game.get_moves("e7", "bob")
+
+def test_checkmate_ends_game():
+    game = new_game()
+    for source, target in [("f2", "f3"), ("e7", "e5"), ("g2", "g4"), ("d8", "h4")]:
+        assert game.move(game.players[game.turn], source, target)
+    assert game.snapshot().finished
+    assert game.get_current_state()["end"]
+    assert game.get_moves("e1", "alice") == []
+
+def test_bot_recovers_from_failed_search(monkeypatch):
+    from app.engine import game as game_module
+
+    game = Game()
+    game.white_time = 2
+    game.join("bot", WHITE, bot=True)
+    game.join("alice", BLACK)
+    search = game_module.iterative_deepening
+    def failing(*args, **kwargs):
+        raise RuntimeError("recherche interrompue")
+    monkeypatch.setattr(game_module, "iterative_deepening", failing)
+    with pytest.raises(RuntimeError):
+        game.play_bot()
+    assert not game.processing # Le bot n'est pas bloqué pour le reste de la partie
+
+    monkeypatch.setattr(game_module, "iterative_deepening", search)
+    assert game.play_bot() and game.turn == BLACK
+    assert game_module.shared_transposition_table().stats().stores > 0 # Table commune à toutes les parties
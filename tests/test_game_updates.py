@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+
+from app.engine.game import Game
+from app.engine.utils import WHITE, BLACK
+
+def new_game() -> Game:
+    game = Game()
+    game.join("alice", WHITE)
+    game.join("bob", BLACK)
+    return game
+
+def test_wait_returns_immediately_on_old_version():
+    game = new_game()
+    assert game.wait_for_change(-1, 5) == game.version
+
+def test_wait_times_out_without_change():
+    game = new_game()
+    start = time.monotonic()
+    assert game.wait_for_change(game.version, 0.3) == game.version
+    assert time.monotonic() - start >= 0.3
+
+def test_move_wakes_waiter():
+    game = new_game()
+    version = game.version
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(game.wait_for_change(version, 10)))
+    waiter.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    assert game.move("alice", "e2", "e4")
+    waiter.join(5)
+    assert result == [game.version] and game.version > version
+    assert time.monotonic() - start < 1
+
+def test_update_contains_new_messages_only():
+    game = new_game()
+    game.add_message("bonjour", "alice")
+    update = game.get_update()
+    assert update["messages"] == [{"id": 1, "sender": "alice", "content": "bonjour"}]
+    assert (update["last_message_id"], update["turn"]) == (1, WHITE)
+
+    version = update["version"]
+    game.add_message("salut", "bob")
+    assert game.wait_for_change(version, 1) != version
+    update = game.get_update(update["last_message_id"])
+    assert update["messages"] == [{"id": 2, "sender": "bob", "content": "salut"}]
+
+def test_wait_update_endpoint():
+    from app.main import app, games
+    client = app.test_client()
+    game = games.create("updates-test")
+    game.join("alice", WHITE)
+
+    data = client.post("/wait_update", json={"id": "updates-test", "version": -1}).get_json()
+    assert data["changed"] and data["board"] == game.snapshot().board
+
+    game.add_message("bonjour", "alice")
+    data = client.post("/wait_update", json={"id": "updates-test", "version": data["version"], "since_id": data["last_message_id"]}).get_json()
+    assert data["changed"] and [message["content"] for message in data["messages"]] == ["bonjour"]
+
+    # Champs nuls envoyés par le client (premier appel) : traités comme absents
+    data = client.post("/wait_update", json={"id": "updates-test", "version": None, "since_id": None}).get_json()
+    assert data["changed"] and [message["content"] for message in data["messages"]] == ["bonjour"]
+
+def test_event_stream_first_event():
+    from app.main import event_stream
+    game = new_game()
+    stream = event_stream(game, "updates-stream", 0)
+    event = next(stream)
+    assert event.startswith(f"id: {game.version}\n")
+    update = json.loads(event.split("data: ", 1)[1])
+    assert update["players"] == ["alice", "bob"]
+
+    game.move("alice", "e2", "e4")
+    update = json.loads(next(stream).split("data: ", 1)[1])
+    assert update["turn"] == BLACK
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.engine.registry import GameRegistry
+from app.engine.utils import WHITE, BLACK
+from app.realtime.hub import GameHub
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_json(self, data):
+        self.received.append(data)
+
+    def of_type(self, kind):
+        return [data for data in self.received if data["type"] == kind]
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_connect_sends_full_state():
+    async def scenario():
+        hub = GameHub(GameRegistry())
+        socket = FakeSocket()
+        await hub.connect(socket, "g1", "alice")
+        assert hub.stats().connections == 1
+        return socket
+    socket = run(scenario())
+    update = socket.of_type("update")[0]
+    assert update["board"] == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+    assert update["turn"] == WHITE
+
+def test_move_and_chat_broadcast_to_both_players():
+    async def scenario():
+        hub = GameHub(GameRegistry())
+        white, black = FakeSocket(), FakeSocket()
+        alice = await hub.connect(white, "g1", "alice")
+        bob = await hub.connect(black, "g1", "bob")
+        await hub.handle(alice, {"type": "join", "color": WHITE})
+        await hub.handle(bob, {"type": "join", "color": BLACK})
+        await hub.handle(alice, {"type": "move", "source": "e2", "destination": "e4"})
+        await hub.handle(bob, {"type": "message", "content": "bien joué"})
+        return white, black
+    white, black = run(scenario())
+    assert white.of_type("join")[0] == {"type": "join", "valid": True, "color": WHITE}
+    assert white.of_type("move") == [{"type": "move", "valid": True}]
+    for socket in (white, black):
+        last = socket.of_type("update")[-1]
+        assert last["board"].startswith("rnbqkbnr/pppppppp/8/8/4P3")
+        assert last["turn"] == BLACK
+        messages = [message for update in socket.of_type("update") for message in update["messages"]]
+        assert messages == [{"id": 1, "sender": "bob", "content": "bien joué"}] # Chaque message n'est envoyé qu'une fois
+
+def test_legal_moves():
+    async def scenario():
+        hub = GameHub(GameRegistry())
+        socket = FakeSocket()
+        alice = await hub.connect(socket, "g1", "alice")
+        await hub.handle(alice, {"type": "join", "color": WHITE})
+        await hub.handle(alice, {"type": "moves", "source": "g1"})
+        await hub.handle(alice, {"type": "moves"})
+        await hub.handle(alice, {"type": "unknown"})
+        return socket
+    socket = run(scenario())
+    single, every = socket.of_type("moves")
+    assert sorted(single["moves"]) == ["f3", "h3"]
+    assert sum(len(targets) for targets in every["moves"].values()) == 20
+    assert socket.of_type("error")
+
+def test_ticker_publishes_changes_made_elsewhere():
+    async def scenario():
+        games = GameRegistry()
+        hub = GameHub(games, tick=0.05)
+        socket = FakeSocket()
+        await hub.connect(socket, "g1", "alice")
+        hub.start()
+        games.get("g1").add_message("depuis HTTP", "bob") # Requête HTTP classique, hors du hub
+        await asyncio.sleep(0.3)
+        await hub.stop()
+        return socket
+    socket = run(scenario())
+    assert socket.of_type("update")[-1]["messages"] == [{"id": 1, "sender": "bob", "content": "depuis HTTP"}]
+
+def test_slow_game_blocks_neither_loop_nor_other_games():
+    async def scenario():
+        games = GameRegistry()
+        hub = GameHub(games)
+        await hub.connect(FakeSocket(), "slow", "alice")
+        socket = FakeSocket()
+        bob = await hub.connect(socket, "fast", "bob")
+        release = threading.Event()
+        games.get("slow").update = lambda: release.wait(5) # Stockage ou bot lent
+        blocked = asyncio.create_task(hub.publish("slow", update=True))
+        await asyncio.sleep(0.05)
+        # La boucle continue et l'autre partie est diffusée pendant que "slow" est occupée
+        await asyncio.wait_for(hub.handle(bob, {"type": "message", "content": "toujours là"}), 2)
+        assert not blocked.done()
+        release.set()
+        await blocked
+        return socket
+    socket = run(scenario())
+    assert socket.of_type("update")[-1]["messages"] == [{"id": 1, "sender": "bob", "content": "toujours là"}]
+
+def test_connected_games_are_not_evicted():
+    clock = [0.0]
+    async def scenario():
+        games = GameRegistry(idle_ttl=100, clock=lambda: clock[0])
+        hub = GameHub(games, tick=0.01, sync_interval=0.01)
+        await hub.connect(FakeSocket(), "watched", "alice")
+        games.create("abandoned")
+        hub.start()
+        for clock[0] in (60, 120, 180):
+            await asyncio.sleep(0.05) # Vérifications périodiques des parties connectées
+        await hub.stop()
+        games.sweep()
+        return list(games)
+    assert run(scenario()) == ["watched"]
+
+def test_idle_games_are_not_polled():
+    calls = []
+    async def scenario():
+        hub = GameHub(GameRegistry(), tick=0.01, sync_interval=0.01)
+        for i in range(20):
+            await hub.connect(FakeSocket(), f"g{i}", "alice")
+        collect = hub._collect
+        hub._collect = lambda *args: calls.append(args) or collect(*args)
+        hub.start()
+        await asyncio.sleep(0.2)
+        await hub.stop()
+    run(scenario())
+    assert calls == [] # Aucune partie n'a changé : rien n'est relu
+
+def test_clock_expiry_is_scheduled():
+    async def scenario():
+        games = GameRegistry()
+        hub = GameHub(games)
+        socket = FakeSocket()
+        alice = await hub.connect(socket, "g1", "alice")
+        game = games.get("g1")
+        await hub.handle(alice, {"type": "join", "color": WHITE})
+        game.join("bob", BLACK)
+        game.white_time = 0.2
+        game.start_timer()
+        game.notify() # Pendule modifiée : nouvelle date de vérification
+        hub.start()
+        await asyncio.sleep(0.5)
+        await hub.stop()
+        return socket
+    socket = run(scenario())
+    assert socket.of_type("update")[-1]["end"] # Fin au temps envoyée sans requête
+
+def test_changes_from_other_processes(tmp_path):
+    from app.engine.store import GameStore
+    async def scenario():
+        path = str(tmp_path / "games.db")
+        games, other = GameRegistry(store=GameStore(path)), GameRegistry(store=GameStore(path))
+        hub = GameHub(games, sync_interval=0.05)
+        socket = FakeSocket()
+        await hub.connect(socket, "g1", "alice")
+        hub.start()
+        await asyncio.to_thread(other.get("g1").add_message, "autre serveur", "bob")
+        await asyncio.sleep(0.3)
+        await hub.stop()
+        return socket
+    socket = run(scenario())
+    assert socket.of_type("update")[-1]["messages"] == [{"id": 1, "sender": "bob", "content": "autre serveur"}]
+
+def test_disconnect():
+    async def scenario():
+        hub = GameHub(GameRegistry())
+        connection = await hub.connect(FakeSocket(), "g1", "alice")
+        hub.disconnect(connection)
+        return hub.stats()
+    stats = run(scenario())
+    assert (stats.games, stats.connections) == (0, 0)
+
+def test_asgi_websocket():
+    pytest.importorskip("starlette")
+    pytest.importorskip("httpx")
+    from starlette.testclient import TestClient
+    from app.realtime.asgi import app
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/asgi-test") as socket:
+            assert socket.receive_json()["type"] == "update"
+            socket.send_json({"type": "join", "color": WHITE})
+            assert socket.receive_json() == {"type": "join", "valid": True, "color": WHITE}
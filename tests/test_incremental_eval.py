@@ -0,0 +1,65 @@
+import random
+
+from app.engine.board import ChessBoard
+from app.engine.utils import WHITE, BLACK
+from app.bot.evaluation import final_evaluation, Coefficients
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+PROMOTION = "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1"
+
+def fresh_terms(board:ChessBoard) -> list[int]:
+    return ChessBoard.from_fen(board.to_fen()).eval_terms()
+
+def test_terms_follow_make_unmake():
+    rng = random.Random(1)
+    for fen in [None, KIWIPETE, PROMOTION]:
+        board = ChessBoard() if fen is None else ChessBoard.from_fen(fen)
+        board.eval_terms()
+        undos = []
+        for _ in range(40):
+            moves = board.get_all_actions()
+            if not moves:
+                break
+            undos.append(board.make_move(rng.choice(moves)))
+            assert board.eval_terms() == fresh_terms(board)
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+            assert board.eval_terms() == fresh_terms(board)
+
+def test_summary_matches_compact_board():
+    rng = random.Random(2)
+    board = ChessBoard.from_fen(KIWIPETE)
+    for _ in range(20):
+        compact = board.to_compact()
+        for color in (WHITE, BLACK):
+            assert board.get_total_moves_score(color) == compact.get_total_moves_score(color)
+            assert board.threat_score(color) == compact.threat_score(color)
+            assert board.get_position_value(color) == compact.get_position_value(color)
+        assert board.get_state() == compact.get_state()
+        moves = board.get_all_actions()
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+
+def test_summary_cached_until_next_move():
+    board = ChessBoard()
+    summary = board.attack_summary()
+    assert board.attack_summary() is summary
+    undo = board.make_move(board.get_all_actions()[0])
+    assert board.attack_summary() is not summary
+    board.unmake_move(undo)
+    assert board.attack_summary() == summary
+
+def test_evaluation_unchanged_by_make_unmake():
+    board = ChessBoard.from_fen(KIWIPETE)
+    before = final_evaluation(board, Coefficients())
+    for move in board.get_all_actions():
+        board.unmake_move(board.make_move(move))
+    assert final_evaluation(board, Coefficients()) == before
+
+def test_position_term_is_opt_in():
+    board = ChessBoard.from_fen(KIWIPETE)
+    default = Coefficients()
+    assert default.position == 0
+    assert final_evaluation(board, default) == final_evaluation(board, default[:4]) # Mêmes scores qu'avant les tables pièce-case
+    assert final_evaluation(board, default._replace(position=1.0)) != final_evaluation(board, default)
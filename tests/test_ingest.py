@@ -0,0 +1,59 @@
+from app.bot.learning.ingest import shard_ranges, ingest, ingest_range, OpeningStats, EVENT
+from app.engine.board import ChessBoard
+from app.engine.compact import encode_move
+
+GAMES = [
+    ("1-0", "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Bxc6 dxc6 5. O-O f6 6. d4 exd4 1-0"),
+    ("0-1", "1. d4 d5 2. c4 e6 3. Nc3 Nf6 4. Bg5 Be7 0-1"),
+    ("1/2-1/2", "1. e4 c5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 1/2-1/2"),
+    ("1-0", "1. e4 e5 2. Nf3 Nf6 3. Nxe5 d6 4. Nf3 Nxe4 1-0"),
+    ("0-1", "1. e4 e5 2. Qh5 Nc6 3. Bc4 Zz9 0-1"), # Coup illisible : partie ignorée
+]
+
+def write_pgn(path, repeat:int = 5):
+    parts = []
+    for i in range(repeat):
+        for result, movetext in GAMES:
+            parts.append(f'[Event "Partie {i}"]\n[WhiteElo "2500"]\n[BlackElo "2400"]\n[Result "{result}"]\n\n{movetext}\n\n')
+    path.write_text("".join(parts), encoding="utf-8")
+    return str(path)
+
+def test_shards_start_on_event_lines(tmp_path):
+    path = write_pgn(tmp_path / "games.pgn")
+    ranges = shard_ranges(path, 7)
+    data = open(path, "rb").read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start # Plages contiguës
+    for start, _ in ranges:
+        assert data[start:].startswith(EVENT)
+
+def test_shards_cover_every_game(tmp_path):
+    path = write_pgn(tmp_path / "games.pgn")
+    total = OpeningStats()
+    games = skipped = 0
+    for start, end in shard_ranges(path, 6):
+        shard_games, shard_skipped, stats = ingest_range(path, start, end)
+        games, skipped = games + shard_games, skipped + shard_skipped
+        total.merge(stats)
+    assert (games, skipped) == (20, 5)
+    assert total == ingest(path, workers=1).stats
+
+def test_stats_content(tmp_path):
+    path = write_pgn(tmp_path / "games.pgn", repeat=1)
+    stats = ingest(path, workers=1).stats.moves
+    board = ChessBoard()
+    e4 = encode_move(board.move_from_uci("e2e4"))
+    # Trois parties comptées commencent par e4 (la dernière, ignorée, ne compte pas)
+    assert stats[(board.hash, e4)] == [3, 2, 1, 0, 7500]
+    d4 = encode_move(board.move_from_uci("d2d4"))
+    assert stats[(board.hash, d4)] == [1, 0, 0, 1, 2500]
+
+def test_parallel_matches_sequential(tmp_path):
+    path = write_pgn(tmp_path / "games.pgn")
+    sequential = ingest(path, workers=1)
+    progress = []
+    parallel = ingest(path, workers=2, on_progress=progress.append, interval=0.05)
+    assert (parallel.games, parallel.skipped) == (sequential.games, sequential.skipped) == (20, 5)
+    assert parallel.stats == sequential.stats
+    assert parallel.stats.positions() <= len(parallel.stats)
@@ -0,0 +1,74 @@
+import random
+
+from app.engine.board import ChessBoard, blank_board
+from app.engine.pieces import Pawn, Rook, King, Queen, Knight
+from app.engine.utils import Position, Move, Promotion, EnPassant, Roque, WHITE, BLACK
+from app.bot.minimax_ab import Node
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+def snapshot(board:ChessBoard):
+    pieces = [(piece, piece.has_moved) for row in board.board for piece in row if piece is not None]
+    return board.to_fen(), pieces, len(board.moves)
+
+def test_random_games_restore_position():
+    rng = random.Random(0)
+    for fen in [None, KIWIPETE]:
+        board = ChessBoard() if fen is None else ChessBoard.from_fen(fen)
+        before = snapshot(board)
+        undos = []
+        for _ in range(30):
+            moves = board.get_all_actions()
+            if not moves:
+                break
+            undos.append(board.make_move(rng.choice(moves)))
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+        assert snapshot(board) == before
+
+def test_capture_and_promotion():
+    board = ChessBoard(blank_board())
+    pawn = Pawn(WHITE, Position(1, 6))
+    rook = Rook(BLACK, Position(0, 0))
+    board.board[1][1] = pawn
+    board.board[0][0] = rook
+    undo = board.make_move(Promotion(pawn, Position(1, 1), Position(0, 0), Knight))
+    assert isinstance(board.board[0][0], Knight)
+    assert board.turn == BLACK
+    board.unmake_move(undo)
+    assert board.board[1][1] is pawn and board.board[0][0] is rook
+    assert not pawn.has_moved
+    assert board.turn == WHITE
+
+def test_en_passant_and_castling():
+    board = ChessBoard.from_fen("r3k2r/8/8/8/3pP3/8/8/R3K2R b KQkq e3 0 1")
+    move = next(move for move in board.get_moves(Position(3, 4)) if isinstance(move, EnPassant))
+    undo = board.make_move(move)
+    assert board.board[4][4] is None
+    board.unmake_move(undo)
+    assert isinstance(board.board[4][4], Pawn)
+    assert board.en_passant == Position(4, 5)
+
+    board = ChessBoard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    before = snapshot(board)
+    castling = next(move for move in board.get_moves(Position(4, 7)) if isinstance(move, Roque))
+    board.make_move(castling)
+    assert isinstance(board.board[7][6], King) and isinstance(board.board[7][5], Rook)
+    assert "KQ" not in board.to_fen()
+    board.undo()
+    assert snapshot(board) == before
+
+def test_undo_restores_capture():
+    board = ChessBoard()
+    for start, end in [("e2", "e4"), ("d7", "d5"), ("e4", "d5")]:
+        board.move(Move(None, Position(ord(start[0]) - 97, 8 - int(start[1])), Position(ord(end[0]) - 97, 8 - int(end[1]))))
+    board.undo()
+    assert board.board[3][3] is not None and board.board[3][3].color == BLACK
+    assert board.turn == WHITE
+
+def test_search_keeps_board():
+    board = ChessBoard.from_fen("4k3/3p4/8/8/8/8/4P3/R3K3 w Q - 0 1")
+    fen = board.to_fen()
+    best = Node(board, None, 2).get_best_move()
+    assert board.to_fen() == fen
+    assert best.move in board.get_all_actions()
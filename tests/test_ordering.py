@@ -0,0 +1,30 @@
+from app.bot.ordering import MoveOrdering
+from app.bot.minimax_ab import Node, SearchContext
+from app.engine.board import ChessBoard
+from app.engine.compact import encode_move
+from app.engine.utils import Position, Move
+
+def test_mvv_lva():
+    # La dame noire en d5 peut être prise par le pion e4 ou la dame d1 : le pion d'abord
+    board = ChessBoard.from_fen("4k3/8/8/3q4/4P3/8/8/3QK3 w - - 0 1")
+    moves = MoveOrdering().sort(board, board.get_all_actions(), 0)
+    assert (moves[0].start_pos, moves[0].pos) == (Position(4, 4), Position(3, 3))
+    assert (moves[1].start_pos, moves[1].pos) == (Position(3, 7), Position(3, 3))
+
+def test_killers_and_history():
+    board = ChessBoard()
+    ordering = MoveOrdering()
+    quiet = next(move for move in board.get_all_actions() if move.start_pos == Position(6, 7) and move.pos == Position(5, 5))
+    ordering.cutoff(board, quiet, 2, 3, 4)
+    assert ordering.killers[2] == [encode_move(quiet)]
+    assert ordering.sort(board, board.get_all_actions(), 2)[0] == quiet
+    # Pas de killer à un autre ply, mais l'historique garde le coup en tête
+    assert ordering.sort(board, board.get_all_actions(), 1)[0] == quiet
+    assert ordering.cutoffs == 1 and ordering.first_move_cutoff_rate == 0
+
+def test_first_move_cutoff_rate():
+    board = ChessBoard.from_fen("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+    context = SearchContext()
+    Node(board, None, 2, context).get_best_move()
+    assert context.ordering.cutoffs > 0
+    assert context.ordering.first_move_cutoff_rate > 0.5
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from app.bot.parallel import RootSplitSearch, ParallelResult, benchmark
+from app.bot.minimax_ab import Node
+from app.engine.board import ChessBoard
+
+FEN = "4k3/3p4/8/8/8/8/4P3/R3K3 w Q - 0 1"
+
+def test_root_split_matches_single_core():
+    board = ChessBoard.from_fen(FEN)
+    single = Node(board, None, 2).get_best_move()
+    with RootSplitSearch(2, table_size_mb=1) as search:
+        result = search.search(board, 2)
+        assert result.value == pytest.approx(single.value)
+        assert board.move_from_uci(result.move) is not None
+        assert result.searched == len(board.get_all_actions())
+
+        result = search.iterative(board, 1.0)
+        assert board.move_from_uci(result.move) is not None
+
+def test_benchmark():
+    result = benchmark(FEN, 1, workers=1)
+    assert result.workers == 1 and result.speedup > 0
+
+class ScriptedSearch:
+    """Résultats imposés pour chaque profondeur (sans processus)"""
+    def __init__(self, results):
+        self.results = results
+
+    def search(self, board, depth, coeffs=None, time_limit=None, stop=None):
+        return self.results[depth - 1]
+
+def test_partial_depth_kept_only_if_not_worse():
+    board = ChessBoard.from_fen(FEN) # Blancs au trait : la plus grande valeur est la meilleure
+    total = len(board.get_all_actions())
+    full = ParallelResult("e2e4", 0.1, 10, total, 0.0)
+    better = ParallelResult("a1a8", 0.3, 10, 2, 0.0)
+    worse = ParallelResult("e1d1", -0.2, 10, 2, 0.0)
+    assert RootSplitSearch.iterative(ScriptedSearch([full, better]), board, 60).move == "a1a8"
+    assert RootSplitSearch.iterative(ScriptedSearch([full, worse]), board, 60).move == "e2e4"
+
+def test_stop_interrupts_moves_in_progress():
+    board = ChessBoard()
+    stop = threading.Event()
+    with RootSplitSearch(2, table_size_mb=1) as search:
+        search.warm_up()
+        threading.Timer(0.3, stop.set).start()
+        start = time.perf_counter()
+        result = search.search(board, 8, stop=stop) # Bien plus long que le délai sans arrêt
+        assert time.perf_counter() - start < 5
+        assert result.searched < len(board.get_all_actions())
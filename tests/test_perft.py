@@ -0,0 +1,22 @@
+import os
+import pytest
+from app.engine.perft import PERFT_SUITE, run_suite, divide, main
+from app.engine.compact import START_FEN
+
+# Budget de noeuds par position, à augmenter pour une vérification plus poussée (PERFT_MAX_NODES=1000000 pytest)
+MAX_NODES = int(os.environ.get("PERFT_MAX_NODES", 10_000))
+
+@pytest.mark.parametrize("backend", ["chessboard", "bitboard"])
+def test_perft_suite(backend):
+    for result in run_suite(MAX_NODES, backend):
+        assert result.ok, f"{result.name} profondeur {result.depth} : {result.nodes} au lieu de {result.expected}"
+
+def test_divide():
+    counts = divide(START_FEN, 2)
+    assert len(counts) == 20
+    assert counts["e2e4"] == 20
+    assert sum(counts.values()) == PERFT_SUITE[0].nodes[1]
+
+def test_cli(capsys):
+    assert main(["--fen", START_FEN, "-d", "2"]) == 0
+    assert "400" in capsys.readouterr().out
@@ -0,0 +1,59 @@
+import bz2
+import gzip
+
+from app.bot.learning.pgn_parser import tokenize_movetext, read_games, get_moves, iter_games
+
+PGN = """[Event "Rated Blitz game"]
+[Site "https://lichess.org/abc"]
+[WhiteElo "2650"]
+[BlackElo "2590"]
+[Result "1-0"]
+
+1. e4 {Ouverture du pion roi} e5 $1 2. Nf3 (2. f4 exf4 (2... d5 3. exd5) 3. Nf3) 2... Nc6
+3. Bb5 a6 ; la variante d'échange
+4. Bxc6 dxc6 5. O-O f6 6. d4 1-0
+
+[Event "Rated Blitz game"]
+[WhiteElo "2400"]
+[Result "0-1"]
+
+1. d4 d5 0-1
+
+[Event "Rated Bullet game"]
+[WhiteElo "2500"]
+[BlackElo "2510"]
+[Result "1/2-1/2"]
+
+1. c4 e5 2. Nc3 Nf6 3. g3 d5 4. cxd5 Nxd5 5. Bg2 Nb6 6. 0-0 Be7 7. d3 O-O 1/2-1/2
+"""
+
+def moves(game):
+    return [move.move for move in game.Moves]
+
+def test_tokenizer_skips_comments_nags_and_variations():
+    tokens, result = tokenize_movetext("1. e4! {bon coup} e5?! $2 2. Nf3 (2. f4 (2. d4)) 2... Nc6 3. e8=Q+ *")
+    assert [move.move for move in tokens] == ["e4", "e5", "Nf3", "Nc6", "e8=Q+"]
+    assert tokens[-1].special == "promotion" and tokens[-1].piece == "q"
+    assert result == "*"
+
+def test_get_moves_compatible():
+    assert [move.move for move in get_moves("1. Nf3 Nf6 2. d4 g6 3. c4 Bg7 4. Nc3 O-O 5. Bf4 d5")] == ["Nf3", "Nf6", "d4", "g6", "c4", "Bg7", "Nc3", "O-O", "Bf4", "d5"]
+
+def test_read_games(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    games = list(read_games(str(path)))
+    assert len(games) == 2 # La deuxième partie n'a pas l'Elo des noirs
+    assert moves(games[0]) == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Bxc6", "dxc6", "O-O", "f6", "d4"]
+    assert (games[0].WhiteElo, games[0].Result) == ("2650", "1-0")
+    assert moves(games[1])[-3:] == ["Be7", "d3", "O-O"] and games[1].Result == "1/2-1/2"
+    assert moves(games[1])[10] == "O-O" # 0-0 normalisé
+
+    assert len(list(iter_games(PGN.splitlines(), complete_only=False))) == 3
+
+def test_compressed_files(tmp_path):
+    for suffix, module in ((".gz", gzip), (".bz2", bz2)):
+        path = tmp_path / f"games.pgn{suffix}"
+        with module.open(path, "wt", encoding="utf-8") as f:
+            f.write(PGN)
+        assert [moves(game) for game in read_games(str(path))] == [moves(game) for game in iter_games(PGN.splitlines())]
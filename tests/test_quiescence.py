@@ -0,0 +1,21 @@
+from app.bot.minimax_ab import Node, SearchContext
+from app.bot.evaluation import Coefficients, pawn_value
+from app.engine.board import ChessBoard
+
+def test_quiescence_sees_recapture():
+    # La dame blanche en d5 est en prise : l'évaluation statique ne le voit pas
+    board = ChessBoard.from_fen("4k3/8/4p3/3Q4/8/8/8/4K3 b - - 0 1")
+    fen = board.to_fen()
+    static = Node(board, None, 0, SearchContext(quiescence=False)).get_best_move().value
+    context = SearchContext()
+    quiet = Node(board, None, 0, context).get_best_move().value
+    assert quiet < static - 4 * pawn_value(Coefficients())
+    assert context.qnodes > 0 and context.nodes == 1
+    assert board.to_fen() == fen
+
+def test_stand_pat_without_captures():
+    board = ChessBoard()
+    context = SearchContext()
+    value = Node(board, None, 0, context).get_best_move().value
+    assert value == Node(board, None, 0, SearchContext(quiescence=False)).get_best_move().value
+    assert context.qnodes == 1
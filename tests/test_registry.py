@@ -0,0 +1,84 @@
+from app.engine.game import Game
+from app.engine.registry import GameRegistry
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_never_creates():
+    registry = GameRegistry()
+    assert registry.get("inconnue") is None
+    assert len(registry) == 0
+    game = registry.create("a")
+    assert registry.create("a") is game and registry.get("a") is game
+    assert registry.stats().created == 1
+
+def test_idle_and_finished_eviction():
+    clock = FakeClock()
+    registry = GameRegistry(idle_ttl=100, finished_ttl=10, clock=clock)
+    registry.create("active")
+    registry.create("finished").end = True
+    registry.create("abandoned")
+
+    clock.now = 5
+    assert registry.sweep() == 0
+    clock.now = 50
+    registry.get("active") # Recherche automatique des parties à retirer (partie terminée)
+    assert "finished" not in registry and "abandoned" in registry
+
+    clock.now = 120
+    assert registry.sweep() == 1 # Partie sans requête depuis plus de 100 s
+    assert list(registry) == ["active"]
+    assert registry.stats().evicted == 2
+
+def test_watched_games_are_kept():
+    clock = FakeClock()
+    registry = GameRegistry(idle_ttl=100, clock=clock)
+    registry.create("watched")
+    registry.create("abandoned")
+    for clock.now in (60, 120, 180):
+        assert registry.touch("watched") # Flux SSE ou WebSocket ouvert, sans requête HTTP
+    assert registry.sweep() == 1
+    assert list(registry) == ["watched"]
+    assert not registry.touch("abandoned")
+
+def test_event_stream_touches_game():
+    from app.main import games, event_stream
+    game = games.create("registry-stream")
+    games.last_access["registry-stream"] = 0.0
+    stream = event_stream(game, "registry-stream", 0)
+    assert next(stream).startswith("id: ")
+    assert games.last_access["registry-stream"] > 0
+    stream.close()
+
+def test_max_games():
+    registry = GameRegistry(max_games=2)
+    registry.create("a").end = True
+    registry.create("b")
+    assert registry.create("c") is not None # La partie terminée laisse sa place
+    assert "a" not in registry
+    assert registry.create("d") is None
+    assert registry.stats().rejected == 1
+
+def test_memory_accounting():
+    registry = GameRegistry()
+    for i in range(3):
+        registry.create(str(i))
+    stats = registry.stats()
+    assert stats.games == 3
+    assert 1000 < stats.bytes_per_game < 1_000_000
+    assert stats.total_bytes == 3 * stats.bytes_per_game
+
+def test_endpoints_do_not_create_games():
+    from app.main import app, games
+    client = app.test_client()
+    response = client.post("/get_messages", json={"id": "registry-bogus"})
+    assert response.status_code == 404
+    assert "registry-bogus" not in games
+
+    data = client.get("/stats").get_json()
+    assert data["games"]["games"] == len(games)
+    assert "workers" in data["bot"]
@@ -0,0 +1,76 @@
+import pytest
+
+from app.engine.board import ChessBoard
+from app.engine.pieces import Pawn, Queen, Knight, King
+from app.engine.san import san_to_move, parse_san, SanError
+from app.engine.compact import move_to_uci
+from app.engine.utils import Position, Roque, Promotion, EnPassant
+from app.bot.learning.pgn_parser import get_moves
+from app.bot.learning.probability import string_to_move
+
+def uci(fen, san):
+    return move_to_uci(parse_san(ChessBoard.from_fen(fen).bitboards(), san))
+
+def test_game_replay():
+    board = ChessBoard()
+    for move in get_moves("1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Bxc6 dxc6 5. O-O f6 6. d4 exd4 7. Nxd4 c5 8. Nb3 Qxd1 9. Rxd1 Bd6 10. Nc3 Ne7 11. Be3 b6 12. a4 Bb7 13. f3 O-O-O"):
+        board.make_move(string_to_move(move, board))
+    assert board.to_fen() == "2kr3r/1bp1n1pp/pp1b1p2/2p5/P3P3/1NN1BP2/1PP3PP/R2R2K1 w - - 1 14"
+
+def test_disambiguation():
+    fen = "4k3/8/8/8/8/8/8/R3K2R w - - 0 1"
+    assert uci(fen, "Rad1") == "a1d1"
+    assert uci(fen, "Rd1") == "a1d1" # Le roi bloque la tour h1
+    assert uci(fen, "Rhf1") == "h1f1"
+    with pytest.raises(SanError):
+        uci(fen, "Rag1")
+    fen = "4k3/8/8/8/R7/8/8/R3K3 w - - 0 1"
+    assert uci(fen, "R1a2") == "a1a2"
+    assert uci(fen, "R4a2") == "a4a2"
+    with pytest.raises(SanError, match="ambigu"):
+        uci(fen, "Ra2")
+    assert uci("4k3/8/8/8/8/8/8/Q3K2Q w - - 0 1", "Qa1b1") == "a1b1"
+
+def test_pinned_piece_is_not_a_candidate():
+    # Le cavalier c3 est cloué par le fou b4 : "Ne2" désigne sans ambiguïté le cavalier g1
+    fen = "4k3/8/8/8/1b6/2N5/8/4K1N1 w - - 0 1"
+    assert uci(fen, "Ne2") == "g1e2"
+
+def test_special_moves_are_typed():
+    board = ChessBoard.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    castle = san_to_move(board, "O-O-O")
+    assert isinstance(castle, Roque) and castle.pos == Position(2, 7)
+    assert isinstance(san_to_move(board, "0-0+"), Roque)
+
+    board = ChessBoard.from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+    move = san_to_move(board, "exd6")
+    assert isinstance(move, EnPassant) and move.captured_pawn == Position(3, 3)
+
+    board = ChessBoard.from_fen("1r2k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+    move = san_to_move(board, "axb8=N+")
+    assert isinstance(move, Promotion) and move.new_piece is Knight and move.end_pos == Position(1, 0)
+    assert san_to_move(board, "a8Q").new_piece is Queen
+    assert Pawn.NEW_PIECE_TYPE is Queen # Aucun état global modifié
+
+    board.make_move(move)
+    assert isinstance(board.board[0][1], Knight)
+
+def test_invalid_moves():
+    board = ChessBoard()
+    for san in ["e5", "Nd4", "Ke2", "O-O", "exd3", "e8=Q", "Zz9", "Bb5"]:
+        with pytest.raises(SanError):
+            san_to_move(board, san)
+    # Roque interdit à travers une case attaquée
+    with pytest.raises(SanError):
+        uci("4kr2/8/8/8/8/8/8/4K2R w K - 0 1", "O-O")
+    # Promotion obligatoire sur la dernière rangée
+    with pytest.raises(SanError):
+        uci("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a8")
+
+def test_black_moves():
+    fen = "r3k2r/pppppppp/8/8/8/8/8/4K3 b kq - 0 1"
+    assert uci(fen, "O-O") == "e8g8"
+    assert uci(fen, "e5") == "e7e5"
+    assert uci(fen, "e6") == "e7e6"
+    assert uci("4k3/8/8/8/8/8/p7/4K3 b - - 0 1", "a1=Q+") == "a2a1q"
+    assert isinstance(san_to_move(ChessBoard.from_fen("4k3/8/8/8/8/8/8/4K3 b - - 0 1"), "Kd7").piece, King)
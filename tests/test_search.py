@@ -0,0 +1,34 @@
+import time
+
+from app.bot.search import iterative_deepening, allocate_time, MIN_TIME
+from app.bot.minimax_ab import Node, SearchContext, SearchTimeout
+from app.bot.transposition import TranspositionTable
+from app.engine.board import ChessBoard
+
+FEN = "4k3/3p4/8/8/8/8/4P3/R3K3 w Q - 0 1"
+
+def test_allocate_time():
+    assert allocate_time(600) == 20
+    assert allocate_time(600, moves_to_go=10) == 60
+    assert allocate_time(1) <= 0.5
+    assert allocate_time(0) == MIN_TIME
+
+def test_iterative_deepening():
+    board = ChessBoard.from_fen(FEN)
+    fen = board.to_fen()
+    start = time.perf_counter()
+    result = iterative_deepening(board, 0.5, table=TranspositionTable(1))
+    assert time.perf_counter() - start < 1.5
+    assert result.depth >= 1
+    assert result.move in board.get_all_actions()
+    assert board.to_fen() == fen
+
+def test_timeout_restores_board():
+    board = ChessBoard.from_fen(FEN)
+    fen = board.to_fen()
+    try:
+        Node(board, None, 6, SearchContext(deadline=time.perf_counter())).get_best_move()
+        assert False, "La recherche aurait dû être interrompue"
+    except SearchTimeout:
+        pass
+    assert board.to_fen() == fen and not board.history
@@ -0,0 +1,87 @@
+import logging
+import time
+
+from app.bot import minimax_ab
+from app.bot.service import BotService, search_position, _init_worker
+from app.engine.board import ChessBoard
+from app.engine.game import Game
+from app.engine.utils import WHITE, BLACK
+
+FEN = "4k3/3p4/8/8/8/8/4P3/R3K3 w Q - 0 1"
+
+def test_search_position():
+    board = ChessBoard.from_fen(FEN)
+    assert board.move_from_uci(search_position(FEN, 0.1, table_size_mb=1)) is not None
+
+def test_service_and_cancellation():
+    service = BotService(workers=1, table_size_mb=1)
+    try:
+        future = service.submit("a", FEN, 0.2)
+        assert service.submit("a", FEN, 0.2) is future # Une seule recherche par partie
+        assert ChessBoard.from_fen(FEN).move_from_uci(future.result(timeout=60)) is not None
+        assert service.result("a") is not None and not service.pending("a")
+
+        long_search = service.submit("b", FEN, 60)
+        queued = service.submit("c", FEN, 60)
+        assert service.stats().queued + service.stats().running == 2
+        while not long_search.running():
+            time.sleep(0.01)
+        assert service.cancel("c")
+        assert service.cancel("b")
+        assert long_search.result(timeout=30) is None # Arrêtée avant la fin du temps alloué
+        # Le pool peut déjà avoir transmis la recherche en attente à un processus : elle est alors arrêtée
+        assert queued.cancelled() or queued.result(timeout=30) is None
+        stats = service.stats()
+        assert (stats.submitted, stats.completed, stats.cancelled, stats.queued, stats.running) == (3, 1, 2, 0, 0)
+    finally:
+        service.shutdown()
+
+def test_game_with_service():
+    service = BotService(workers=1, table_size_mb=1)
+    try:
+        game = Game(service)
+        game.black_time = 10
+        game.join("joueur", WHITE)
+        game.join("bot", BLACK, bot=True)
+        assert game.move("joueur", "e2", "e4")
+
+        start = time.time()
+        game.get_current_state() # Lance la recherche sans attendre
+        assert time.time() - start < 1 and game.turn == BLACK
+        while game.turn == BLACK and time.time() - start < 60:
+            time.sleep(0.05)
+            game.get_current_state()
+        assert game.turn == WHITE and len(game.chessboard.moves) == 2
+    finally:
+        service.shutdown()
+
+def test_workers_are_quiet(capsys):
+    level = minimax_ab.logger.min_level
+    try:
+        _init_worker()
+        minimax_ab.logger.warning("Itération")
+        assert capsys.readouterr().out == ""
+    finally:
+        minimax_ab.logger.min_level = level
+        logging.disable(logging.NOTSET)
+
+def test_split_search_service():
+    service = BotService(workers=2, table_size_mb=1, split_workers=2)
+    try:
+        future = service.submit("a", FEN, 0.5)
+        assert ChessBoard.from_fen(FEN).move_from_uci(future.result(timeout=60)) is not None
+        assert service.result("a") is not None and service.stats().completed == 1
+
+        # Deux parties cherchent en même temps, chacune sur ses deux processus
+        searches = [service.submit(game_id, FEN, 60) for game_id in ("b", "c")]
+        start = time.time()
+        while not all(search.running() for search in searches) and time.time() - start < 30:
+            time.sleep(0.01)
+        assert service.stats().running == 2
+        time.sleep(0.5)
+        start = time.time()
+        assert service.cancel("b") and service.cancel("c")
+        assert [search.result(timeout=30) for search in searches] == [None, None]
+        assert time.time() - start < 5 # Arrêtées pendant la profondeur en cours
+    finally:
+        service.shutdown()
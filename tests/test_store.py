@@ -0,0 +1,143 @@
+import threading
+import time
+import sqlite3
+
+import pytest
+
+from app.engine.game import Game, Bot
+from app.engine.registry import GameRegistry
+from app.engine.store import GameStore
+from app.engine.utils import WHITE, BLACK
+
+MOVES = [("e2", "e4"), ("e7", "e5"), ("g1", "f3"), ("b8", "c6"), ("f1", "c4"), ("g8", "f6"), ("e1", "g1")]
+
+def play(game:Game, moves):
+    for source, target in moves:
+        assert game.move(game.players[game.turn], source, target)
+
+def new_registry(path, snapshot_interval:int = 20) -> GameRegistry:
+    return GameRegistry(store=GameStore(str(path), snapshot_interval))
+
+def test_restart_rebuilds_game(tmp_path):
+    registry = new_registry(tmp_path / "games.db")
+    game = registry.create("g1")
+    game.join("alice", WHITE)
+    game.join("bot1", None, True)
+    play(game, MOVES)
+    game.add_message("bonjour", "alice")
+
+    restarted = new_registry(tmp_path / "games.db") # Nouveau processus : rien en mémoire
+    assert len(restarted) == 0
+    recovered = restarted.get("g1")
+    assert recovered.chessboard.to_fen().split(" ")[:4] == game.chessboard.to_fen().split(" ")[:4]
+    assert (recovered.turn, recovered.white_time, recovered.black_time) == (game.turn, game.white_time, game.black_time)
+    assert recovered.players == game.players and type(recovered.players[BLACK]) is Bot
+    assert list(recovered.chat) == list(game.chat)
+    assert restarted.get("inconnue") is None
+
+def test_recovery_replays_only_events_after_snapshot(tmp_path):
+    registry = new_registry(tmp_path / "games.db", snapshot_interval=5)
+    game = registry.create("g1")
+    game.join("alice", WHITE)
+    game.join("bob", BLACK)
+    play(game, MOVES) # 9 évènements : instantané au 5e
+    assert game.seq == 9
+
+    store = GameStore(str(tmp_path / "games.db"), 5)
+    replayed = []
+    class Recording(Game):
+        def apply_event(self, kind, payload):
+            replayed.append(kind)
+            super().apply_event(kind, payload)
+    recovered = store.load("g1", Recording)
+    assert replayed == ["move"] * 4
+    assert recovered.snapshot().board == game.snapshot().board
+    assert recovered.seq == 9
+
+def test_two_workers_share_a_game(tmp_path):
+    worker1 = new_registry(tmp_path / "games.db")
+    worker2 = new_registry(tmp_path / "games.db")
+    game1 = worker1.create("g1")
+    game1.join("alice", WHITE)
+    game2 = worker2.create("g1") # Déjà créée par l'autre processus : état rattrapé
+    assert game2.players[WHITE] == "alice"
+    game2.join("bob", BLACK)
+
+    assert game1.move("alice", "e2", "e4") # La transaction rattrape d'abord l'arrivée de bob
+    assert worker2.get("g1").chessboard.to_fen() == game1.chessboard.to_fen()
+    assert not game2.move("alice", "d2", "d4") # Plus le tour des blancs
+    assert game2.move("bob", "e7", "e5")
+    assert worker1.get("g1").turn == WHITE
+    assert [kind for _, kind, _ in worker1.store.events("g1")] == ["join", "join", "move", "move"]
+
+def test_failed_write_leaves_game_unchanged(tmp_path, monkeypatch):
+    registry = new_registry(tmp_path / "games.db")
+    game = registry.create("g1")
+    game.join("alice", WHITE)
+    game.join("bob", BLACK)
+    fen, seq = game.chessboard.to_fen(), game.seq
+
+    def failing_append(game, kind, payload):
+        raise sqlite3.OperationalError("disque plein")
+    monkeypatch.setattr(registry.store, "append", failing_append)
+    with pytest.raises(sqlite3.OperationalError):
+        game.move("alice", "e2", "e4")
+    assert (game.chessboard.to_fen(), game.seq, game.turn) == (fen, seq, WHITE)
+    monkeypatch.undo()
+
+    # Erreur après la modification en mémoire : la transaction est annulée et la partie reconstruite depuis le journal
+    def failing_snapshot():
+        raise RuntimeError("erreur")
+    monkeypatch.setattr(game, "update_snapshot", failing_snapshot)
+    with pytest.raises(RuntimeError):
+        game.move("alice", "e2", "e4")
+    assert (game.chessboard.to_fen(), game.seq, game.turn) == (fen, seq, WHITE)
+    assert [kind for _, kind, _ in registry.store.events("g1")] == ["join", "join"]
+    monkeypatch.undo()
+    assert game.move("alice", "e2", "e4") and game.seq == 3
+
+def test_invalid_event_is_skipped(tmp_path):
+    registry = new_registry(tmp_path / "games.db")
+    game = registry.create("g1")
+    game.join("alice", WHITE)
+    connection = sqlite3.connect(str(tmp_path / "games.db"))
+    with connection:
+        connection.execute("INSERT INTO events (game_id, seq, kind, payload) VALUES ('g1', 2, 'move', ?)",
+                           ('{"uci": "e2e5", "white_time": 600, "black_time": 600, "start_time": 0}',))
+    connection.close()
+    fen = game.chessboard.to_fen()
+    assert game.sync() == 1
+    assert game.chessboard.to_fen() == fen and game.turn == WHITE and game.seq == 2
+
+def test_waiters_see_moves_from_other_workers(tmp_path):
+    worker1 = new_registry(tmp_path / "games.db")
+    worker2 = new_registry(tmp_path / "games.db")
+    game1 = worker1.create("g1")
+    game1.join("alice", WHITE)
+    game1.join("bob", BLACK)
+    game2 = worker2.get("g1")
+    assert game1.version == game2.version # Version tirée du journal : la même dans tous les processus
+    version = game1.version
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(game1.wait_for_change(version, 5)))
+    waiter.start()
+    time.sleep(0.1)
+    assert game2.move("alice", "e2", "e4")
+    waiter.join(5)
+    assert result == [game2.version] and result[0] != version
+    assert game1.chessboard.to_fen() == game2.chessboard.to_fen()
+
+def test_message_pages_use_index(tmp_path):
+    registry = new_registry(tmp_path / "games.db")
+    game = registry.create("g1")
+    for i in range(30):
+        game.add_message(str(i), "alice")
+    store = registry.store
+    assert [message.id for message in store.messages("g1", 10, 31, 5, oldest=True)] == [11, 12, 13, 14, 15]
+    assert [message.id for message in store.messages("g1", 0, 20, 3)] == [17, 18, 19]
+    plan = store.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT payload FROM events WHERE game_id = ? AND message_id > ? AND message_id < ? ORDER BY message_id LIMIT ?",
+        ("g1", 0, 20, 3),
+    ).fetchall()
+    assert "events_messages" in plan[0][-1] # Page lue par l'index, sans parcourir le journal
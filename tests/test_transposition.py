@@ -0,0 +1,46 @@
+from app.bot.transposition import TranspositionTable, ENTRY_SIZE, EXACT, LOWER, UPPER
+from app.bot.minimax_ab import Node, SearchContext
+from app.engine.board import ChessBoard
+
+def test_memory_cap():
+    table = TranspositionTable(1)
+    assert table.size * ENTRY_SIZE <= 1024 * 1024
+    assert table.size & (table.size - 1) == 0
+
+def test_store_and_probe():
+    table = TranspositionTable(0.01)
+    assert table.probe(42) is None
+    table.store(42, 3, 0.5, EXACT, 7)
+    entry = table.probe(42)
+    assert (entry.depth, entry.value, entry.bound, entry.move) == (3, 0.5, EXACT, 7)
+
+    # Même case, autre position : collision
+    other = 42 + table.size
+    assert table.probe(other) is None
+    stats = table.stats()
+    assert (stats.hits, stats.misses, stats.collisions) == (1, 2, 1)
+
+def test_depth_preferred_replacement():
+    table = TranspositionTable(0.01)
+    other = 42 + table.size
+    table.store(42, 4, 0.5, LOWER)
+    table.store(other, 2, 0.1, UPPER)
+    assert table.probe(42) is not None and table.stats().rejected == 1
+    # Une entrée d'une recherche précédente est toujours remplaçable
+    table.new_search()
+    table.store(other, 2, 0.1, UPPER)
+    assert table.probe(other) is not None and table.probe(42) is None
+
+def test_search_with_table():
+    board = ChessBoard.from_fen("4k3/3p4/8/8/8/8/4P3/R3K3 w Q - 0 1")
+    table = TranspositionTable(1)
+    without = Node(board, None, 2).get_best_move()
+    first = Node(board, None, 2, SearchContext(table)).get_best_move()
+    assert first.value == without.value
+    assert table.stats().stores > 0
+
+    # Deuxième recherche : la racine est trouvée dans la table
+    hits = table.stats().hits
+    second = Node(board, None, 2, SearchContext(table)).get_best_move()
+    assert second.value == first.value and table.stats().hits > hits
+    assert second.move in board.get_all_actions()
@@ -0,0 +1,52 @@
+import random
+
+from app.engine.board import ChessBoard
+from app.engine.compact import CompactBoard, castling_rights
+from app.engine.utils import Position, Move
+from app.engine import zobrist
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+def full_hash(board:ChessBoard) -> int:
+    return zobrist.hash_board(board.board, board.turn, castling_rights(board.board), board.en_passant)
+
+def play(board:ChessBoard, moves:list[str]):
+    for move in moves:
+        board.move(Move(None, Position(ord(move[0]) - 97, 8 - int(move[1])), Position(ord(move[2]) - 97, 8 - int(move[3]))))
+
+def test_incremental_hash_matches_full_hash():
+    rng = random.Random(1)
+    for fen in [None, KIWIPETE, "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"]:
+        board = ChessBoard() if fen is None else ChessBoard.from_fen(fen)
+        hashes = [board.hash]
+        undos = []
+        for _ in range(40):
+            moves = board.get_all_actions()
+            if not moves:
+                break
+            undos.append(board.make_move(rng.choice(moves)))
+            assert board.hash == full_hash(board)
+            hashes.append(board.hash)
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+            hashes.pop()
+            assert board.hash == hashes[-1]
+
+def test_transposition_and_side_to_move():
+    board = ChessBoard()
+    start = board.hash
+    play(board, ["g1f3", "g8f6", "f3g1", "f6g8"])
+    assert board.hash == start
+
+    # Même position, trait différent
+    assert ChessBoard.from_fen("4k3/8/8/8/8/8/8/4K3 w - - 0 1").hash != ChessBoard.from_fen("4k3/8/8/8/8/8/8/4K3 b - - 0 1").hash
+
+def test_castling_and_en_passant_keys():
+    assert ChessBoard.from_fen(KIWIPETE).hash != ChessBoard.from_fen(KIWIPETE.replace("KQkq", "Kkq")).hash
+    # Colonne de prise en passant seulement si un pion peut prendre
+    assert ChessBoard.from_fen("4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1").hash == ChessBoard.from_fen("4k3/8/8/8/4P3/8/8/4K3 b - - 0 1").hash
+    assert ChessBoard.from_fen("4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1").hash != ChessBoard.from_fen("4k3/8/8/8/3pP3/8/8/4K3 b - - 0 1").hash
+
+def test_compact_hash():
+    for fen in [KIWIPETE, "4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1"]:
+        assert zobrist.hash_compact(CompactBoard.from_fen(fen)) == ChessBoard.from_fen(fen).hash